@@ -1,13 +1,21 @@
-import csv
 import os
 import numpy as np  # For fast numerical operations
+from mmap_store import load_columns  # Cached (snapshot or mmap) validated roster
+from columnar import iter_rosters
+from grading import GradingPolicy  # Weights, missing-score policy, letter cutoffs
+from stats import RunningStats  # Mergeable streaming mean/SD/median
+from groupby import group_stats  # Per-section aggregates in one bincount pass
+import profiling  # Opt-in phase timings (no-op unless enabled)
 
 
 # ---------------- CONFIGURATION ----------------
 FILENAME = "studentRecord.csv"
 
 
-# Grade weights (must total 1.0)
+# Grade weights (must total 1.0). These are not the weights reports.py
+# grades with (0.3/0.3/0.3/0.1): the analytics menu has always weighted the
+# final exam more, and the two are kept apart so neither module's grades
+# change. Only the weights differ; both go through grading.GradingPolicy.
 QUIZ_WEIGHT = 0.20
 MIDTERM_WEIGHT = 0.30
 FINAL_WEIGHT = 0.40
@@ -16,97 +24,85 @@ ATTENDANCE_WEIGHT = 0.10
 
 
 
-# ---------------- WEIGHTED GRADE FUNCTION ----------------
-def compute_weighted(row):
-    """Calculate weighted grade for one student."""
-    try:
-        # Get quiz scores (skip blanks)
-        quizzes = [
-            float(row[f"quiz{i}"])
-            for i in range(1, 6)
-            if row[f"quiz{i}"] not in ("", "None", None)
-        ]
-        quizzes = np.array(quizzes, dtype=float)
+# ---------------- GRADING POLICY ----------------
+POLICY = GradingPolicy({
+    "quiz": QUIZ_WEIGHT,
+    "midterm": MIDTERM_WEIGHT,
+    "final": FINAL_WEIGHT,
+    "attendance": ATTENDANCE_WEIGHT,
+})
 
 
-        # Get other grades
-        midterm = float(row["midterm"]) if row["midterm"] not in ("", "None", None) else np.nan
-        final = float(row["final"]) if row["final"] not in ("", "None", None) else np.nan
-        attendance = float(row.get("attendance_percent", 0)) if row.get("attendance_percent") not in ("", "None", None) else np.nan
-
-
-        # Average quiz grade
-        avg_quiz = np.nanmean(quizzes) if quizzes.size > 0 else np.nan
-
-
-        # Combine grades and weights
-        components = np.array([avg_quiz, midterm, final, attendance], dtype=float)
-        weights = np.array([QUIZ_WEIGHT, MIDTERM_WEIGHT, FINAL_WEIGHT, ATTENDANCE_WEIGHT], dtype=float)
-
-
-        # Handle missing data
-        if np.isnan(components).all():
-            return None
-        components = np.nan_to_num(components, nan=0.0)
+def _load(filename):
+    """Load the validated roster and its weighted grades, or None if the file is missing."""
+    with profiling.phase("analytics.read") as p:
+        loaded = load_columns(filename)
+        if loaded is not None:
+            p.add(rows=len(loaded[0]))
+    if loaded is None:
+        print("File not found.")
+        return None
+    roster = loaded[0]
+    with profiling.phase("analytics.grade", rows=len(roster)):
+        return roster, POLICY.grades(roster.scores)
 
 
-        # Weighted grade
-        weighted = np.dot(components, weights)
-        return round(float(weighted), 2)
-    except Exception:
-        return None
+def _graded(grades):
+    """Mask of students that count as graded (a 0.00 grade is treated as no grade)."""
+    return ~np.isnan(grades) & (grades != 0)
 
 
 
 
 # ---------------- COMPUTE GRADES ----------------
+@profiling.profiled("analytics.compute_grades")
 def compute_grades(filename=FILENAME):
     """Show all students with their weighted grades."""
-    if not os.path.exists(filename):
-        print("File not found.")
+    loaded = _load(filename)
+    if loaded is None:
         return
+    roster, grades = loaded
+    graded = _graded(grades)
 
+    print("\n=== WEIGHTED GRADES ===")
+    print("-" * 50)
+    print(f"{'ID':<10}{'Name':<20}{'Weighted Grade':>15}")
+    print("-" * 50)
 
-    with open(filename, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-
-
-        print("\n=== WEIGHTED GRADES ===")
-        print("-" * 50)
-        print(f"{'ID':<10}{'Name':<20}{'Weighted Grade':>15}")
-        print("-" * 50)
-
-
-        for row in reader:
-            grade = compute_weighted(row)
-            name = f"{row['last_name']}, {row['first_name']}"
-            print(f"{row['student_id']:<10}{name:<20}{(grade if grade else 'N/A'):>15}")
-        print("-" * 50)
+    for sid, last, first, grade, ok in zip(roster.ids, roster.last_names, roster.first_names, grades.tolist(), graded):
+        name = f"{last}, {first}"
+        print(f"{sid:<10}{name:<20}{(grade if ok else 'N/A'):>15}")
+    print("-" * 50)
 
 
 
 
 # ---------------- GRADE DISTRIBUTION ----------------
-def grade_distribution(filename=FILENAME):
-    """Show grade counts (A–F)."""
-    if not os.path.exists(filename):
-        print("File not found.")
-        return
-
-
-    with open(filename, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        grades = np.array([compute_weighted(r) for r in reader if compute_weighted(r)], dtype=float)
-
-
-    bins = {
-        "A": np.sum(grades >= 90),
-        "B": np.sum((grades >= 80) & (grades < 90)),
-        "C": np.sum((grades >= 70) & (grades < 80)),
-        "D": np.sum((grades >= 60) & (grades < 70)),
-        "F": np.sum(grades < 60),
-    }
-
+def _letter_counts(grades):
+    """Count graded students per letter (A–F)."""
+    return POLICY.letter_counts(grades[_graded(grades)])
+
+
+@profiling.profiled("analytics.grade_distribution")
+def grade_distribution(filename=FILENAME, batch_size=None):
+    """Show grade counts (A–F).
+
+    With batch_size set, the file is streamed through the validated ingest
+    path one batch at a time instead of being loaded whole.
+    """
+    if batch_size:
+        if not os.path.exists(filename):
+            print("File not found.")
+            return
+        bins = dict.fromkeys(POLICY.letter_order, 0)
+        for roster in iter_rosters(filename, batch_size):
+            for k, v in _letter_counts(POLICY.grades(roster.scores)).items():
+                bins[k] += v
+    else:
+        loaded = _load(filename)
+        if loaded is None:
+            return
+        bins = _letter_counts(loaded[1])
 
     print("\n=== GRADE DISTRIBUTION ===")
     for k, v in bins.items():
@@ -116,86 +112,138 @@ def grade_distribution(filename=FILENAME):
 
 
 # ---------------- PERCENTILES ----------------
-def percentiles(filename=FILENAME):
-    """Show top and bottom 10% students."""
-    if not os.path.exists(filename):
-        print("File not found.")
+def _select(grades, k, largest):
+    """Indices of the k largest (or smallest) grades in O(n) with np.partition.
+
+    Picks and orders exactly like the stable ascending argsort the
+    percentiles report used to slice: the k smallest are its first k
+    (equal grades in file order), the k largest its last k read backwards
+    (highest first, equal grades latest row first). So ties at the cut-off
+    go to the earliest rows for the smallest and the latest for the largest.
+    """
+    grades = np.asarray(grades, dtype=float)
+    k = min(max(int(k), 0), len(grades))
+    if k == 0:
+        return np.array([], dtype=np.intp)
+
+    keys = -grades if largest else grades  # Always select the smallest keys
+    cutoff = np.partition(keys, k - 1)[k - 1]
+    inside = np.flatnonzero(keys < cutoff)
+    ties = np.flatnonzero(keys == cutoff)
+    ties = ties[len(ties) - (k - len(inside)):] if largest else ties[: k - len(inside)]
+    chosen = np.concatenate([inside, ties])
+    return chosen[np.lexsort((-chosen if largest else chosen, keys[chosen]))]
+
+
+def top_k(grades, k):
+    """Indices of the k highest grades, highest first, equal grades latest row first (O(n + k log k))."""
+    return _select(grades, k, largest=True)
+
+
+def bottom_k(grades, k):
+    """Indices of the k lowest grades, lowest first, equal grades in file order (O(n + k log k))."""
+    return _select(grades, k, largest=False)
+
+
+def grade_quantiles(grades, quantiles):
+    """Grade at each quantile in [0, 1] (linear interpolation, partition-based)."""
+    grades = np.asarray(grades, dtype=float)
+    quantiles = np.asarray(quantiles, dtype=float)
+    if grades.size == 0:
+        return np.full(quantiles.shape, np.nan)
+    if ((quantiles < 0) | (quantiles > 1)).any():
+        raise ValueError("quantiles must be between 0 and 1")
+    return np.quantile(grades, quantiles)
+
+
+@profiling.profiled("analytics.percentiles")
+def percentiles(filename=FILENAME, top=None, bottom=None, quantiles=None):
+    """Show top and bottom students (10% each by default) and optional quantiles.
+
+    top/bottom are student counts; quantiles is a list (or array) of values in [0, 1].
+    """
+    loaded = _load(filename)
+    if loaded is None:
         return
+    roster, grades = loaded
+    graded = _graded(grades)
+    ids, grades = roster.ids[graded], grades[graded]
 
-
-    with open(filename, "r", encoding="utf-8") as f:
-        reader = list(csv.DictReader(f))
-
-
-    results = np.array(
-        [(r["student_id"], compute_weighted(r)) for r in reader if compute_weighted(r)],
-        dtype=object,
-    )
-
-
-    if results.size == 0:
+    if grades.size == 0:
         print("No valid grades.")
         return
 
+    n = len(grades)
+    n_top = max(1, n // 10) if top is None else top
+    n_bottom = max(1, n // 10) if bottom is None else bottom
 
-    results = results[np.argsort(results[:, 1].astype(float))[::-1]]
-    n = len(results)
-
+    print(f"\n=== TOP {'10%' if top is None else n_top} ===")
+    for i in top_k(grades, n_top):
+        print(f"{ids[i]}: {grades[i]:.2f}")
 
-    top = results[: max(1, n // 10)]
-    bottom = results[-max(1, n // 10):]
+    # Bottom list is shown highest to lowest, like the top list
+    low = bottom_k(grades, n_bottom)[::-1]
+    print(f"\n=== BOTTOM {'10%' if bottom is None else n_bottom} ===")
+    for i in low:
+        print(f"{ids[i]}: {grades[i]:.2f}")
 
-
-    print("\n=== TOP 10% ===")
-    for sid, g in top:
-        print(f"{sid}: {float(g):.2f}")
-
-
-    print("\n=== BOTTOM 10% ===")
-    for sid, g in bottom:
-        print(f"{sid}: {float(g):.2f}")
+    if quantiles is not None and len(quantiles):
+        print("\n=== QUANTILES ===")
+        for q, value in zip(quantiles, grade_quantiles(grades, quantiles)):
+            print(f"p{q * 100:g}: {value:.2f}")
 
 
 
 
 # ---------------- OUTLIERS ----------------
-def outliers(filename=FILENAME):
-    """Detect grades far from average (±1.5 SD)."""
-    if not os.path.exists(filename):
-        print("File not found.")
-        return
-
-
-    with open(filename, "r", encoding="utf-8") as f:
-        reader = list(csv.DictReader(f))
-
-
-    grades, ids = [], []
-    for r in reader:
-        g = compute_weighted(r)
-        if g:
-            grades.append(float(g))
-            ids.append(r["student_id"])
-
-
-    if len(grades) < 2:
+def _graded_batches(filename, batch_size):
+    """Yield (ids, grades) of the graded students one validated batch at a time."""
+    for roster in iter_rosters(filename, batch_size):
+        grades = POLICY.grades(roster.scores)
+        graded = _graded(grades)
+        yield roster.ids[graded], grades[graded]
+
+
+@profiling.profiled("analytics.outliers")
+def outliers(filename=FILENAME, batch_size=None):
+    """Detect grades far from average (±1.5 SD).
+
+    With batch_size set, mean and SD are accumulated batch by batch and a
+    second streamed pass lists the outliers, so memory stays constant.
+    """
+    if batch_size:
+        if not os.path.exists(filename):
+            print("File not found.")
+            return
+        batches = lambda: _graded_batches(filename, batch_size)
+    else:
+        loaded = _load(filename)
+        if loaded is None:
+            return
+        roster, grades = loaded
+        graded = _graded(grades)
+        whole = [(roster.ids[graded], grades[graded])]
+        batches = lambda: whole
+
+    acc = RunningStats()
+    for _, grades in batches():
+        acc.update(grades)
+
+    if acc.count < 2:
         print("Not enough data.")
         return
 
-
-    grades = np.array(grades, dtype=float)
-    mean, stdev = np.mean(grades), np.std(grades)
-
+    mean, stdev = acc.mean, acc.stdev()
 
     print(f"\nMean = {mean:.2f}, SD = {stdev:.2f}")
     print("=== OUTLIERS ===")
 
-
     found = False
-    for sid, g in zip(ids, grades):
-        if abs(g - mean) > 1.5 * stdev:
+    for ids, grades in batches():
+        far = np.abs(grades - mean) > 1.5 * stdev
+        for sid, g in zip(ids[far], grades[far]):
             print(f"{sid}: {g:.2f}")
-            found = True
+        found = found or far.any()
     if not found:
         print("None found.")
 
@@ -203,35 +251,49 @@ def outliers(filename=FILENAME):
 
 
 # ---------------- IMPROVEMENT ----------------
+@profiling.profiled("analytics.improvement")
 def improvement(filename=FILENAME):
     """Compare midterm vs final grades."""
-    if not os.path.exists(filename):
-        print("File not found.")
+    loaded = _load(filename)
+    if loaded is None:
         return
 
-
-    mids, finals, ids = [], [], []
-
-
-    with open(filename, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            try:
-                mid = float(r["midterm"]) if r["midterm"] not in ("", "None", None) else np.nan
-                fin = float(r["final"]) if r["final"] not in ("", "None", None) else np.nan
-                mids.append(mid)
-                finals.append(fin)
-                ids.append(r["student_id"])
-            except:
-                continue
-
-
-    mids, finals = np.array(mids, dtype=float), np.array(finals, dtype=float)
-    diffs = finals - mids
-
+    roster = loaded[0]
+    ids = roster.ids
+    diffs = roster.column("final") - roster.column("midterm")
 
     print("\n=== IMPROVEMENT (Final - Midterm) ===")
     for sid, diff in zip(ids, diffs):
         if not np.isnan(diff):
             sign = "+" if diff >= 0 else ""
             print(f"{sid}: {sign}{diff:.2f}")
+
+
+
+
+# ---------------- SECTION STATISTICS ----------------
+@profiling.profiled("analytics.section_stats")
+def section_stats(filename=FILENAME):
+    """Per-section count, mean, SD, min/max and A–F counts, in one group-by pass."""
+    loaded = _load(filename)
+    if loaded is None:
+        return
+    roster, grades = loaded
+    codes, names = roster.section_codes()
+    if not len(names):
+        print("No sections found.")
+        return
+
+    grades = np.where(_graded(grades), grades, np.nan)
+    result = group_stats(codes, len(names), grades, POLICY)
+
+    letters = POLICY.letter_order
+    print("\n=== SECTION STATISTICS ===")
+    print(f"{'Section':<12}{'Count':>6}{'Mean':>8}{'SD':>8}{'Min':>8}{'Max':>8}  "
+          + "".join(f"{k:>4}" for k in letters))
+    print("-" * (52 + 4 * len(letters)))
+    for code in np.argsort(names, kind="stable"):
+        count = result["count"][code]
+        cells = [f"{result[k][code]:>8.2f}" if count else f"{'N/A':>8}" for k in ("mean", "stdev", "min", "max")]
+        print(f"{names[code]:<12}{count:>6}" + "".join(cells) + "  "
+              + "".join(f"{v:>4}" for v in result["letters"][code].tolist()))
@@ -1,7 +1,15 @@
 import csv
+import json
 import os
 import re
 from ingest import clean_ingest  # Function to read and validate CSV data
+from store import StudentStore  # Indexed in-memory records
+import changelog  # Append-only log of adds/updates/deletes
+import mmap_store  # Memory-mapped columns for big files
+import extsort  # Run-and-merge sort for files bigger than memory
+import query  # Vectorized filters over the columnar data
+from columnar import roster_from_rows
+import numpy as np
 
 FILENAME = "studentRecord.csv"
 HEADER = [
@@ -33,20 +41,247 @@ def save_to_csv(data, filename=FILENAME):
 
 
 def save_cleaned_csv(valid_rows, filename=FILENAME):
-    """Overwrites CSV file with cleaned/updated data."""
-    with open(filename, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(HEADER)
-        writer.writerows(valid_rows)
+    """Overwrites CSV file with cleaned/updated data (atomic, clears the change log)."""
+    changelog.write_base(filename, HEADER, valid_rows)
     print(f"Cleaned data saved to {filename}")
 
 
+def log_changes(op, rows, filename=FILENAME):
+    """Records adds/updates/deletes in the change log instead of rewriting the CSV."""
+    if not os.path.exists(filename):
+        changelog.write_base(filename, HEADER, [])
+    changelog.record(filename, op, rows)
+    changelog.maybe_compact(filename, HEADER)
+
+
+PRINT_CHUNK = 10000  # Values decoded per step when printing a mapped column
+EXTERNAL_SORT_BYTES = 512 * 1024 * 1024  # CSVs this big are sorted on disk in runs
+
+
+def _in_step(existing_records, filename=FILENAME):
+    """True if the records are a store holding exactly filename's validated rows
+    in file order, so row i of the file's cached columns is row i here. A
+    matching row count is not enough: a student deleted and added again
+    moves to the end in memory but keeps their old place in the file."""
+    return isinstance(existing_records, StudentStore) and existing_records.in_step(filename)
+
+
+def _mapped_roster(existing_records, filename=FILENAME):
+    """Memory-mapped columns of filename when the mmap format is in use and in
+    step with the records, else None (callers then use the rows in memory)."""
+    if not mmap_store.use_mmap(filename) or not _in_step(existing_records, filename):
+        return None
+    mapped = mmap_store.open_mmap(filename, HEADER)
+    if mapped is None or len(mapped) != len(existing_records):
+        return None
+    return mapped
+
+
+def _sort_order(keys, reverse):
+    """Stable lexicographic argsort over several key arrays (first key first).
+
+    reverse holds one flag per key; equal keys keep file order, also when
+    descending.
+    """
+    codes = []
+    for column, descending in zip(keys, reverse):
+        _, inverse = np.unique(column, return_inverse=True)
+        inverse = inverse.ravel()
+        codes.append(-inverse if descending else inverse)
+    return np.lexsort(codes[::-1])
+
+
+def _roster(existing_records, filename=FILENAME):
+    """Columnar copy of the records for queries: the cached one (snapshot or
+    mmap) when it matches the records in memory, else built from the rows."""
+    loaded = mmap_store.load_columns(filename, HEADER) if _in_step(existing_records, filename) else None
+    if loaded is not None and len(loaded[0]) == len(existing_records):
+        return loaded[0]
+    return roster_from_rows(list(existing_records))
+
+
+def _ask_filter():
+    """Read an optional filter and compile it. Returns None for no filter;
+    raises ValueError for a filter that cannot be read."""
+    text = input('Filter (e.g. section == "AS" and final < 75), Enter for all: ').strip()
+    return query.Predicate(text) if text else None
+
+
+def _as_store(existing_records):
+    """Accept either a StudentStore or a plain list of rows."""
+    if isinstance(existing_records, StudentStore):
+        return existing_records
+    return StudentStore(existing_records or [])
+
+
 # ---------------------- ADD DATA ----------------------
 
+IMPORT_SUFFIXES = (".csv", ".jsonl")
+
+
+def check_field(idx, val, taken_ids=()):
+    """Applies the add-student rule for HEADER[idx] to one stripped value.
+
+    Returns (value, None) when it passes (scores become floats), or
+    (None, message) when it does not. taken_ids holds the IDs that count
+    as duplicates.
+    """
+    # STUDENT ID
+    if idx == 0:
+        if val == "":
+            return None, "Student ID cannot be empty."
+        if not re.fullmatch(r"[A-Za-z0-9-]+", val):
+            return None, "Student ID must contain only letters, numbers, or hyphens (e.g., A-123)."
+        if val in taken_ids:
+            return None, "This Student ID already exists."
+        return val, None
+
+    # LAST NAME / FIRST NAME
+    if idx in (1, 2):
+        label = "Last name" if idx == 1 else "First name"
+        if val == "":
+            return None, f"{label} cannot be empty."
+        if not re.fullmatch(r"[A-Za-z\s-]+", val):
+            return None, f"{label} can only contain letters, spaces, or hyphens."
+        return val, None
+
+    # SECTION
+    if idx == 3:
+        if val == "":
+            return None, "Section cannot be empty."
+        if not re.fullmatch(r"[A-Za-z0-9-]+", val):
+            return None, "Section must contain only letters, numbers, or hyphens (e.g., A1, B-2)."
+        return val, None
+
+    # SCORES / ATTENDANCE
+    if val == "":
+        return None, "Scores cannot be empty."
+    try:
+        num = float(val)
+    except ValueError:
+        return None, "Please enter a valid numeric value."
+    if num < 0 or num > 100:
+        return None, "Scores must be between 0 and 100."
+    return num, None
+
+
+# How the add_data prompts word a rule failure (default: "<message> Try again.")
+_PROMPT_MESSAGES = {
+    "This Student ID already exists.": "This Student ID already exists. Please enter a unique ID.",
+    "Scores must be between 0 and 100.": "Scores must be between 0 and 100.",
+    "Please enter a valid numeric value.": "Please enter a valid numeric value.",
+}
+
+
+def _read_import(path):
+    """Yields (line_number, record dict, parse error) from a .csv (with header)
+    or .jsonl file; the error is None for a record that could be read, else
+    the record is empty and the error says why."""
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".jsonl"):
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield line_no, {}, f"Invalid JSON: {e}"
+                    continue
+                if isinstance(record, list):
+                    record = dict(zip(HEADER, record))
+                if not isinstance(record, dict):
+                    yield line_no, {}, "Each line must be a JSON object or list."
+                    continue
+                yield line_no, record, None
+        else:
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record, None
+
+
+def bulk_import(path, existing_records, filename=FILENAME, rejects_file=None):
+    """Adds every valid student in a .csv or .jsonl file, without prompts.
+
+    Each record (CSV header or JSON keys named like HEADER; a JSON list is
+    taken in HEADER order) goes through the same rules as add_data.
+    Duplicates are checked against the existing IDs and earlier rows of
+    the same file. All accepted rows are appended to the change log in one
+    write. Returns (store, accepted_rows, rejections), where rejections is
+    a list of (line_number, student_id, reason). If rejects_file is given,
+    rejected records are written there with the reason as a last column.
+    """
+    store = _as_store(existing_records)
+    taken = set(store.ids())
+    accepted, rejections, rejected_records = [], [], []
+
+    for line_no, record, reason in _read_import(path):
+        sid = str(record.get(HEADER[0], "") or "").strip()
+        row = []
+        if reason is None:
+            for idx, field in enumerate(HEADER):
+                raw = record.get(field)
+                value, error = check_field(idx, "" if raw is None else str(raw).strip(), taken)
+                if error:
+                    reason = f"{field}: {error}"
+                    break
+                row.append(value)
+        if reason:
+            rejections.append((line_no, sid, reason))
+            rejected_records.append([record.get(field, "") for field in HEADER] + [reason])
+            continue
+        taken.add(row[0])
+        accepted.append(row)
+
+    if accepted:
+        log_changes(changelog.ADD, accepted, filename)
+        store.add_many(accepted)
+
+    if rejects_file and rejected_records:
+        with open(rejects_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADER + ["error"])
+            writer.writerows(rejected_records)
+    return store, accepted, rejections
+
+
+def _import_file(store, path):
+    """Menu side of bulk_import: runs it and prints the per-row report."""
+    if not os.path.exists(path):
+        print("File not found.")
+        return store
+    try:
+        store, accepted, rejections = bulk_import(path, store)
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        print(f"Could not import {path}: {e}")
+        return store
+
+    for line_no, sid, reason in rejections:
+        print(f"Line {line_no} ({sid or 'no ID'}) rejected: {reason}")
+    print(f"\nImported {len(accepted)} student(s), rejected {len(rejections)}.")
+    if accepted:
+        print(f"Data saved to {FILENAME}")
+    return store
+
+
+class _Taken:
+    """IDs in the store plus the ones typed so far, without copying either."""
+
+    def __init__(self, store, new_ids):
+        self.store = store
+        self.new_ids = new_ids
+
+    def __contains__(self, student_id):
+        return student_id in self.store or student_id in self.new_ids
+
+
 def add_data(existing_records):
+    store = _as_store(existing_records)
     new_rows = []
+    new_ids = set()
     while True:
-        n_input = input("How many students you need to add? ").strip()
+        n_input = input("How many students you need to add? (or a .csv/.jsonl file to import) ").strip()
+        if n_input.lower().endswith(IMPORT_SUFFIXES):
+            return _import_file(store, n_input)
         if n_input == "":
             print("Invalid input. Please enter a number.")
             continue
@@ -71,91 +306,37 @@ def add_data(existing_records):
         for idx, field in enumerate(HEADER):
             while True:
                 val = input(f"Enter {field}: ").strip()
-
-                # STUDENT ID
+                value, error = check_field(idx, val, _Taken(store, new_ids))
+                if error:
+                    print(_PROMPT_MESSAGES.get(error, f"{error} Try again."))
+                    continue
+                student.append(value)
                 if idx == 0:
-                    if val == "":
-                        print("Student ID cannot be empty. Try again.")
-                        continue
-                    if not re.fullmatch(r"[A-Za-z0-9-]+", val):
-                        print("Student ID must contain only letters, numbers, or hyphens (e.g., A-123). Try again.")
-                        continue
-                    existing_ids = [row[0] for row in existing_records]
-                    if val in existing_ids:
-                        print("This Student ID already exists. Please enter a unique ID.")
-                        continue
-                    student.append(val)
-                    break
-
-                # LAST NAME
-                elif idx == 1:
-                    if val == "":
-                        print("Last name cannot be empty. Try again.")
-                        continue
-                    if not re.fullmatch(r"[A-Za-z\s-]+", val):
-                        print("Last name can only contain letters, spaces, or hyphens. Try again.")
-                        continue
-                    student.append(val)
-                    break
-
-                # FIRST NAME
-                elif idx == 2:
-                    if val == "":
-                        print("First name cannot be empty. Try again.")
-                        continue
-                    if not re.fullmatch(r"[A-Za-z\s-]+", val):
-                        print("First name can only contain letters, spaces, or hyphens. Try again.")
-                        continue
-                    student.append(val)
-                    break
-
-                # SECTION
-                elif idx == 3:
-                    if val == "":
-                        print("Section cannot be empty. Try again.")
-                        continue
-                    if not re.fullmatch(r"[A-Za-z0-9-]+", val):
-                        print("Section must contain only letters, numbers, or hyphens (e.g., A1, B-2). Try again.")
-                        continue
-                    student.append(val)
-                    break
-
-                # SCORES / ATTENDANCE
-                else:
-                    if val == "":
-                        print("Scores cannot be empty. Try again.")
-                        continue
-                    try:
-                        num = float(val)
-                        if num < 0 or num > 100:
-                            print("Scores must be between 0 and 100.")
-                            continue
-                        student.append(num)
-                        break
-                    except ValueError:
-                        print("Please enter a valid numeric value.")
-                        continue
+                    new_ids.add(value)
+                break
 
         new_rows.append(student)
 
-    save_to_csv(new_rows)
-    return existing_records + new_rows
+    log_changes(changelog.ADD, new_rows)
+    print(f"Data saved to {FILENAME}")
+    store.add_many(new_rows)
+    return store
 
 
 
 # ---------------------- DELETE DATA ----------------------
 
 def delete_data(existing_records):
+    store = _as_store(existing_records)
     student_id = input("Enter Student ID to delete: ")
-    updated_rows = [row for row in existing_records if row[0] != student_id]
 
-    if len(updated_rows) == len(existing_records):
+    if not store.delete(student_id):
         print("No student found with that ID.")
-        return existing_records
+        return store
 
-    save_cleaned_csv(updated_rows)
+    log_changes(changelog.DELETE, [[student_id]])
     print(f"Deleted Student ID: {student_id} successfully.")
-    return updated_rows
+    return store
 
 
 # ---------------------- SELECT COLUMN ----------------------
@@ -174,8 +355,32 @@ def select_column(existing_records):
         print("Invalid column name.")
         return
 
+    try:
+        predicate = _ask_filter()
+    except ValueError as e:
+        print(f"Invalid filter: {e}")
+        return
+
     index = HEADER.index(col_name)
     print(f"\nValues under '{col_name}':")
+
+    if predicate is not None:
+        _, rows = query.run_query(_roster(existing_records), predicate, [col_name])
+        for (value,) in rows:
+            print(value)
+        if not rows:
+            print("No matching students.")
+        return
+
+    # Big files: read the single column from the mmap instead of every row
+    mapped = _mapped_roster(existing_records)
+    if mapped is not None:
+        column = mapped.column(col_name)
+        for start in range(0, len(column), PRINT_CHUNK):
+            for value in column[start:start + PRINT_CHUNK].tolist():
+                print(None if value != value else value)
+        return
+
     for row in existing_records:
         print(row[index])
 
@@ -187,55 +392,105 @@ def select_row(existing_records):
         print("No valid data.")
         return
 
-    student_id = input("Enter Student ID to view: ")
-    for row in existing_records:
-        if row[0] == student_id:
-            print("\nStudent Information:")
-            for h, v in zip(HEADER, row):
-                print(f"{h}: {v}")
-            return
+    store = _as_store(existing_records)
+    student_id = input("Enter Student ID to view (or: where <filter>): ")
+    if student_id.lower().startswith("where "):
+        _print_matches(store, student_id[len("where "):])
+        return
 
-    print("No student found with that ID.")
+    row = store.get(student_id)
+    if row is None:
+        print("No student found with that ID.")
+        return
+
+    print("\nStudent Information:")
+    for h, v in zip(HEADER, row):
+        print(f"{h}: {v}")
 
 
 # ---------------------- SORT DATA ----------------------
 
-def sort_data(existing_records):
-    if not existing_records:
+def _sort_keys(store, col_name, filename=FILENAME):
+    """One sort-key array for a column (from filename's mmap for big files
+    the store is in step with); missing scores sort as -inf."""
+    col_index = HEADER.index(col_name)
+    is_numeric = col_index in range(4, 12)
+    mapped = _mapped_roster(store, filename)
+    if mapped is not None:
+        keys = mapped.column(col_name)
+        return np.where(np.isnan(keys), -np.inf, keys) if is_numeric else np.char.lower(keys)
+    if is_numeric:
+        return np.array([float(row[col_index]) if row[col_index] is not None else float('-inf')
+                         for row in store], dtype=float)
+    return np.array([str(row[col_index]).lower() if row[col_index] is not None else ""
+                     for row in store], dtype=str)
+
+
+def sort_data(existing_records, filename=FILENAME):
+    store = _as_store(existing_records)
+    if not store:
         print("No valid data to sort.")
-        return existing_records
+        return store
 
     print("\nAvailable columns to sort by:")
     for i, col in enumerate(HEADER):
         print(f"{i+1}. {col}")
 
-    col_name = input("\nEnter column name to sort by: ").strip()
-    if col_name not in HEADER:
+    names = input("\nEnter column name to sort by (several: comma-separated, e.g. section,final): ")
+    col_names = [name.strip() for name in names.split(",") if name.strip()]
+    if not col_names or any(name not in HEADER for name in col_names):
         print("Invalid column name.")
-        return existing_records
+        return store
 
-    col_index = HEADER.index(col_name)
+    reverse = []
+    for col_name in col_names:
+        print(f"\nSort order{'' if len(col_names) == 1 else f' for {col_name}'}:")
+        print("1. Ascending (A→Z, 0→100)")
+        print("2. Descending (Z→A, 100→0)")
+        order = input("Enter choice (1 or 2): ").strip()
+        reverse.append(True if order == "2" else False)
+
+    described = ", ".join(f"'{c}' ({'descending' if r else 'ascending'})" for c, r in zip(col_names, reverse))
+    try:
+        if _in_step(store, filename) and os.path.getsize(filename) >= EXTERNAL_SORT_BYTES:
+            # Too big to sort comfortably in memory: sorted runs on disk, merged into the file.
+            # Only while the store holds exactly the file's rows, since the file is what gets sorted
+            extsort.external_sort(filename, HEADER, list(zip(col_names, reverse)))
+            store = StudentStore.from_csv(filename, HEADER)
+            print(f"\nData sorted by {described}")
+            return store
+
+        keys = [_sort_keys(store, col_name, filename) for col_name in col_names]
+        rows = store.rows()
+        sorted_rows = [rows[i] for i in _sort_order(keys, reverse)]
+        save_cleaned_csv(sorted_rows, filename)
+        store.reorder(sorted_rows)
+        print(f"\nData sorted by {described}")
+        return store
+    except Exception as e:
+        print(f"Error during sorting: {e}")
+        return store
 
-    print("\nSort order:")
-    print("1. Ascending (A→Z, 0→100)")
-    print("2. Descending (Z→A, 100→0)")
-    order = input("Enter choice (1 or 2): ").strip()
-    reverse = True if order == "2" else False
 
-    is_numeric = col_index in range(4, 12)
+def _print_matches(store, text):
+    """Show every student that passes a filter, in the same layout as one student.
 
-    def sort_key(row):
-        value = row[col_index]
-        if is_numeric:
-            return float(value) if value is not None else float('-inf')
+    While the store matches the file, the query runs on the file, so a
+    filter on one indexed column is a lookup in its sorted index."""
+    try:
+        if _in_step(store):
+            columns, rows = query.select(FILENAME, text, header=HEADER)
         else:
-            return str(value).lower() if value is not None else ""
+            columns, rows = query.run_query(_roster(store), text)
+    except ValueError as e:
+        print(f"Invalid filter: {e}")
+        return
+    if not rows:
+        print("No matching students.")
+        return
 
-    try:
-        sorted_rows = sorted(existing_records, key=sort_key, reverse=reverse)
-        save_cleaned_csv(sorted_rows)
-        print(f"\nData sorted by '{col_name}' ({'descending' if reverse else 'ascending'})")
-        return sorted_rows
-    except Exception as e:
-        print(f"Error during sorting: {e}")
-        return existing_records
+    for row in rows:
+        print("\nStudent Information:")
+        for h, v in zip(columns, row):
+            print(f"{h}: {v}")
+    print(f"\n{len(rows)} student(s) found.")
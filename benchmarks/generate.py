@@ -0,0 +1,87 @@
+"""Synthetic studentRecord.csv-schema rosters for benchmarks.
+
+    python benchmarks/generate.py roster.csv --rows 1000000 --sections 40 --missing 0.05 --bad 0.01
+
+The same arguments (and --seed) always give the same file. Rows are
+written in blocks, so 10M-row files need little memory.
+"""
+import argparse
+import csv
+import sys
+
+import numpy as np
+
+HEADER = [
+    "student_id", "last_name", "first_name", "section",
+    "quiz1", "quiz2", "quiz3", "quiz4", "quiz5",
+    "midterm", "final", "attendance_percent"]
+BLOCK = 50000     # Rows generated per step
+
+LAST_NAMES = ["Santos", "Reyes", "Cruz", "Bautista", "Garcia", "Mendoza", "Torres", "Tan", "Lim", "Chua"]
+FIRST_NAMES = ["Ana", "Juan", "Maria", "Jose", "Mark", "Grace", "Paolo", "Joy", "Carlo", "Liza"]
+MISSING_CELLS = ["", "none"]
+
+
+def generate_roster(path, rows, sections=40, missing_rate=0.05, bad_rate=0.01, seed=0):
+    """Write a roster of rows students to path.
+
+    sections      number of distinct sections (SEC01, SEC02, ...)
+    missing_rate  share of score cells left blank or "none"
+    bad_rate      share of rows clean_ingest rejects: rows without a
+                  student ID, half of them also cut short (a short row
+                  with an ID is padded and kept)
+
+    Scores are whole numbers around 75 (0-100), so grades spread over
+    every letter. Returns the number of data rows written.
+    """
+    if rows < 0 or sections < 1:
+        raise ValueError("rows must be >= 0 and sections >= 1")
+    if not (0 <= missing_rate <= 1 and 0 <= bad_rate <= 1):
+        raise ValueError("missing_rate and bad_rate must be between 0 and 1")
+
+    rng = np.random.default_rng(seed)
+    names = [f"SEC{i + 1:02d}" for i in range(sections)]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for start in range(0, rows, BLOCK):
+            n = min(BLOCK, rows - start)
+            scores = np.clip(rng.normal(75, 15, (n, 8)).round(), 0, 100).astype(int).astype(str).astype(object)
+            blank = rng.random((n, 8)) < missing_rate
+            scores[blank] = rng.choice(MISSING_CELLS, blank.sum())
+            section = rng.integers(0, sections, n).tolist()
+            last = rng.integers(0, len(LAST_NAMES), n).tolist()
+            first = rng.integers(0, len(FIRST_NAMES), n).tolist()
+            bad = rng.random(n) < bad_rate
+            short = (bad & (rng.random(n) < 0.5)).tolist()
+            bad = bad.tolist()
+
+            block = []
+            for i, row_scores in enumerate(scores.tolist()):
+                row = [f"S{start + i:08d}", LAST_NAMES[last[i]], FIRST_NAMES[first[i]], names[section[i]]]
+                row += row_scores
+                if bad[i]:
+                    row[0] = ""
+                if short[i]:
+                    row = row[:6]
+                block.append(row)
+            writer.writerows(block)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic student roster CSV.")
+    parser.add_argument("path", help="CSV file to write")
+    parser.add_argument("--rows", type=int, default=100000, help="data rows (default: 100000)")
+    parser.add_argument("--sections", type=int, default=40, help="distinct sections (default: 40)")
+    parser.add_argument("--missing", type=float, default=0.05, help="share of blank score cells (default: 0.05)")
+    parser.add_argument("--bad", type=float, default=0.01, help="share of rejected rows (default: 0.01)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    args = parser.parse_args(argv)
+    generate_roster(args.path, args.rows, args.sections, args.missing, args.bad, args.seed)
+    print(f"Wrote {args.rows} rows to {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""Benchmark the main data operations on a synthetic roster.
+
+    python benchmarks/run.py --rows 1000000 --repeat 3
+    python benchmarks/run.py --rows 1000000 --save-baseline    # record the numbers to beat
+    python benchmarks/run.py --rows 1000000 --ops clean_ingest,sort_data
+
+Each operation runs in its own process on a generated roster (see
+generate.py) and reports its best time, rows/sec and peak memory (peak
+RSS of that process). Runs are cold by default: the snapshot, mmap and
+index caches next to the CSV are removed first; --warm builds them
+before timing instead.
+
+Results are compared with the saved baseline (benchmarks/baseline.json
+unless --baseline says otherwise) when its roster settings match. An
+operation more than --tolerance slower, or using that much more memory,
+is a regression and the exit status is 1.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from generate import generate_roster
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+CACHE_SUFFIXES = (".npz", ".cols", ".idx", ".log")   # Sidecars of a CSV (snapshot, mmap, index, change log)
+
+OPERATIONS = ["clean_ingest", "compute_grades", "grade_distribution", "percentiles",
+              "summary_report", "export_at_risk", "sort_data"]
+# Answers to sort_data's prompts: sort by final, descending
+SORT_ANSWERS = "final\n2\n"
+
+
+
+
+# ---------------- WORKER (one operation, in its own process) ----------------
+def _peak_mb():
+    """Peak resident memory of this process in MiB, or None where unknown."""
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_operation(op, filename, warm):
+    """Time one operation (output discarded). Imports and set-up are not timed."""
+    sys.path.insert(0, REPO)
+    import ingest, analytics, reports, array_operations
+    from store import StudentStore
+    from mmap_store import load_columns
+
+    if warm:
+        load_columns(filename)
+    calls = {
+        "clean_ingest": lambda: ingest.clean_ingest(filename, verbose=False),
+        "compute_grades": lambda: analytics.compute_grades(filename),
+        "grade_distribution": lambda: analytics.grade_distribution(filename),
+        "percentiles": lambda: analytics.percentiles(filename),
+        "summary_report": lambda: reports.summary_report(filename, out_folder="reports"),
+        "export_at_risk": lambda: reports.export_at_risk(filename, os.path.join("reports", "at_risk_students.csv")),
+    }
+    if op == "sort_data":
+        store = StudentStore.from_csv(filename, verbose=False)
+        calls[op] = lambda: array_operations.sort_data(store, filename)
+
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        start = time.perf_counter()
+        calls[op]()
+        seconds = time.perf_counter() - start
+    print(json.dumps({"seconds": seconds, "peak_mb": _peak_mb()}))
+
+
+
+
+# ---------------- RUNNER ----------------
+def _clear_caches(filename):
+    for suffix in CACHE_SUFFIXES:
+        path = filename + suffix
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def measure(op, roster, folder, repeat, warm):
+    """Best time and highest peak memory of op over repeat runs."""
+    times, peaks = [], []
+    for _ in range(repeat):
+        filename = os.path.join(folder, "studentRecord.csv")
+        shutil.copyfile(roster, filename)  # sort_data rewrites the file
+        _clear_caches(filename)
+        done = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", op, filename] + (["--warm"] if warm else []),
+            cwd=folder, input=SORT_ANSWERS if op == "sort_data" else "",
+            capture_output=True, text=True)
+        if done.returncode:
+            raise RuntimeError(f"{op} failed:\n{done.stderr.strip()}")
+        result = json.loads(done.stdout.strip().splitlines()[-1])
+        times.append(result["seconds"])
+        peaks.append(result["peak_mb"])
+    peak = max(peaks) if None not in peaks else None
+    return {"seconds": min(times), "peak_mb": peak}
+
+
+def compare(results, baseline, tolerance):
+    """Lines describing each operation against the baseline, and whether any regressed."""
+    lines, regressed = [], False
+    for op, now in results.items():
+        old = baseline.get(op)
+        if old is None:
+            lines.append(f"{op:<20} (not in baseline)")
+            continue
+        notes = []
+        change = now["seconds"] / old["seconds"] - 1
+        notes.append(f"time {change:+.0%}")
+        slow = change > tolerance
+        fat = False
+        if now["peak_mb"] is not None and old.get("peak_mb"):
+            grow = now["peak_mb"] / old["peak_mb"] - 1
+            notes.append(f"memory {grow:+.0%}")
+            fat = grow > tolerance
+        flag = "REGRESSION" if slow or fat else "ok"
+        regressed |= slow or fat
+        lines.append(f"{op:<20} {flag:<10} " + ", ".join(notes))
+    return lines, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark data operations on a synthetic roster.")
+    parser.add_argument("--rows", type=int, default=100000, help="roster size (default: 100000)")
+    parser.add_argument("--sections", type=int, default=40, help="distinct sections (default: 40)")
+    parser.add_argument("--missing", type=float, default=0.05, help="share of blank score cells (default: 0.05)")
+    parser.add_argument("--bad", type=float, default=0.01, help="share of rejected rows (default: 0.01)")
+    parser.add_argument("--seed", type=int, default=0, help="roster random seed (default: 0)")
+    parser.add_argument("--ops", default=",".join(OPERATIONS),
+                        help="comma-separated operations (default: all): " + ", ".join(OPERATIONS))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per operation, best time kept (default: 3)")
+    parser.add_argument("--warm", action="store_true", help="build the data caches before timing")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown or memory growth before failing (default: 0.25)")
+    parser.add_argument("--worker", nargs=2, metavar=("OP", "CSV"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        _run_operation(*args.worker, args.warm)
+        return 0
+
+    ops = [op.strip() for op in args.ops.split(",") if op.strip()]
+    unknown = [op for op in ops if op not in OPERATIONS]
+    if unknown or args.repeat < 1:
+        parser.error(f"unknown operation: {', '.join(unknown)}" if unknown else "--repeat must be at least 1")
+
+    settings = {"rows": args.rows, "sections": args.sections, "missing": args.missing,
+                "bad": args.bad, "seed": args.seed, "warm": args.warm}
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench-") as folder:
+        roster = os.path.join(folder, "roster.csv")
+        generate_roster(roster, args.rows, args.sections, args.missing, args.bad, args.seed)
+        work = os.path.join(folder, "work")
+        os.makedirs(work)
+
+        print(f"{'operation':<20} {'seconds':>9} {'rows/sec':>12} {'peak MiB':>9}")
+        print("-" * 53)
+        for op in ops:
+            result = measure(op, roster, work, args.repeat, args.warm)
+            result["rows_per_sec"] = args.rows / result["seconds"] if result["seconds"] else None
+            results[op] = result
+            peak = "-" if result["peak_mb"] is None else f"{result['peak_mb']:.0f}"
+            rate = "-" if result["rows_per_sec"] is None else f"{result['rows_per_sec']:,.0f}"
+            print(f"{op:<20} {result['seconds']:>9.3f} {rate:>12} {peak:>9}")
+
+    status = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("settings") != settings:
+            print(f"\nBaseline {args.baseline} was recorded with other settings; not compared.")
+        else:
+            lines, regressed = compare(results, saved["results"], args.tolerance)
+            print(f"\nAgainst baseline ({saved.get('recorded', '?')}, tolerance {args.tolerance:.0%}):")
+            print("\n".join(lines))
+            status = 1 if regressed else 0
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "recorded": time.strftime("%Y-%m-%d %H:%M"),
+                       "python": platform.python_version(), "machine": platform.machine(),
+                       "results": results}, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Time from launching `python main.py` to its first menu prompt.
+
+    python benchmarks/startup.py [--rows 200000] [--runs 5] [--limit-ms 100]
+
+main.py runs in a temporary folder holding a roster of --rows students,
+so a large data file is part of the measurement. Exits with status 1
+when the median time-to-prompt is over --limit-ms.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from generate import generate_roster
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(REPO, "main.py")
+PROMPT = b"Enter choice:"
+
+
+def time_to_prompt(folder):
+    """Seconds until main.py shows its first prompt; then answers 9 (Exit)."""
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, MAIN], cwd=folder, env=env,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    seen = b""
+    while PROMPT not in seen:
+        chunk = os.read(proc.stdout.fileno(), 4096)
+        if not chunk:
+            proc.wait()
+            raise RuntimeError("main.py exited before showing the menu")
+        seen = seen[-len(PROMPT):] + chunk
+    elapsed = time.perf_counter() - start
+    proc.communicate(b"9\n")
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Startup (time-to-first-prompt) benchmark for main.py.")
+    parser.add_argument("--rows", type=int, default=200000, help="students in the roster (default: 200000)")
+    parser.add_argument("--runs", type=int, default=5, help="timed launches (default: 5)")
+    parser.add_argument("--limit-ms", type=float, default=100.0, help="fail above this median (default: 100)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="startup-") as folder:
+        generate_roster(os.path.join(folder, "studentRecord.csv"), args.rows)
+        time_to_prompt(folder)  # Warm-up: OS file cache, .pyc files and the data snapshot
+        times = [time_to_prompt(folder) * 1000 for _ in range(args.runs)]
+
+    median = statistics.median(times)
+    print(f"time to first prompt, {args.rows} rows: median {median:.1f} ms "
+          f"(min {min(times):.1f}, max {max(times):.1f}, {args.runs} runs)")
+    if median > args.limit_ms:
+        print(f"FAIL: over the {args.limit_ms:g} ms limit")
+        return 1
+    print(f"OK: under the {args.limit_ms:g} ms limit")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+import csv
+import io
+import os
+import shutil
+import tempfile
+import threading
+
+
+# ---------------------- CONFIGURATION ----------------------
+
+
+LOG_SUFFIX = ".log"                  # studentRecord.csv -> studentRecord.csv.log
+COMPACT_THRESHOLD = 1024 * 1024      # Compact once the log passes 1 MiB
+
+# Operations stored as the first column of each log record
+ADD = "add"
+UPDATE = "update"
+DELETE = "delete"
+OPS = (ADD, UPDATE, DELETE)
+
+# Held while the base file is being replaced so appends never race a compaction
+LOCK = threading.RLock()
+
+
+
+
+# ---------------------- WRITING THE LOG ----------------------
+
+
+def log_path(filename):
+    """Path of the change log that sits next to the base CSV."""
+    return filename + LOG_SUFFIX
+
+
+def record(filename, op, rows):
+    """Durably appends one log record per row.
+
+    ADD/UPDATE rows are full student rows, DELETE rows only need the ID
+    in the first column. All records go out in one write, which is flushed
+    and fsynced before returning. A partial last record left by an earlier
+    crash is cut off first, so the new records never join onto it.
+    """
+    if op not in OPS:
+        raise ValueError(f"Unknown log operation: {op}")
+    text = io.StringIO(newline="")
+    writer = csv.writer(text)
+    for row in rows:
+        writer.writerow([op] + list(row if op != DELETE else row[:1]))
+    with LOCK:
+        with open(log_path(filename), "a+b") as f:
+            _drop_partial_record(f)
+            f.write(text.getvalue().encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _drop_partial_record(f):
+    """Truncate an open log back to the end of its last complete record
+    (read_log ignores what comes after it anyway). The log is compacted
+    once it passes COMPACT_THRESHOLD, so reading it whole stays cheap."""
+    f.seek(0)
+    data = f.read()
+    end = record_end(data)
+    if end != len(data):
+        f.truncate(end)
+
+
+def record_end(data):
+    """Offset just past the last complete CSV record in data (str or bytes).
+
+    That is the last newline outside a quoted field, so a record cut off
+    inside a quoted multi-line value is not taken for a whole one. 0 if
+    there is none.
+    """
+    quote, newline = ('"', "\n") if isinstance(data, str) else (b'"', b"\n")
+    parts = data.split(quote)
+    # Even-numbered parts lie outside quotes ("" inside a field splits into an empty part)
+    end = len(data)
+    for i in range(len(parts) - 1, -1, -1):
+        end -= len(parts[i])
+        if i % 2 == 0 and newline in parts[i]:
+            return end + parts[i].rfind(newline) + 1
+        end -= 1
+    return 0
+
+
+
+
+# ---------------------- READING AND REPLAYING ----------------------
+
+
+def read_log(filename):
+    """Returns the list of log records (op, *fields) for a base CSV file.
+
+    A last record without its newline (or cut off inside a quoted
+    field) is a write that was cut off by a crash and is ignored.
+    """
+    path = log_path(filename)
+    if not os.path.exists(path):
+        return []
+
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        text = f.read()
+    text = text[:record_end(text)]
+
+    # Parse the text as a file, not line by line, so quoted fields keep their newlines
+    return [entry for entry in csv.reader(io.StringIO(text, newline="")) if entry and entry[0] in OPS]
+
+
+def fold(entries):
+    """Reduces log records to the final state per student ID (row, or None if deleted).
+
+    ADD and UPDATE both mean "this is now the row", so replaying the same
+    log twice (e.g. after a crash during compaction) gives the same result.
+    """
+    state = {}
+    for op, *fields in entries:
+        if not fields:
+            continue
+        state[fields[0]] = None if op == DELETE else fields
+    return state
+
+
+def replay(rows, entries):
+    """Yields the base rows with the log applied on top, in a single pass.
+
+    Changed students keep their position in the base file, deleted ones
+    are skipped, and students that only exist in the log come last.
+    """
+    state = fold(entries)
+    if not state:
+        yield from rows
+        return
+
+    seen = set()
+    yield from apply_state(rows, state, seen)
+    yield from tail_rows(state, seen)
+
+
+def apply_state(rows, state, seen):
+    """Yields rows with a fold() state applied, adding each changed ID met to seen.
+
+    Only the first row of a changed ID (not already in seen) is replaced;
+    later ones are skipped. Students that only exist in the log are left
+    to tail_rows.
+    """
+    for row in rows:
+        sid = row[0] if row else ""
+        if sid in state:
+            if sid not in seen:
+                seen.add(sid)
+                if state[sid] is not None:
+                    yield state[sid]
+            continue
+        yield row
+
+
+def tail_rows(state, seen):
+    """Yields the rows of students that are in the log but were never met in the base file."""
+    for sid, row in state.items():
+        if sid not in seen and row is not None:
+            yield row
+
+
+
+
+# ---------------------- BASE FILE AND COMPACTION ----------------------
+
+
+def keep_mode(tmp, target):
+    """Give a temp file the permissions of the file it replaces (mkstemp uses 0600)."""
+    if os.path.exists(target):
+        shutil.copymode(target, tmp)
+    else:
+        os.chmod(tmp, 0o644)
+
+
+def write_base(filename, header, rows):
+    """Atomically replaces the base CSV with header + rows and clears the log.
+
+    Rows go to a temp file in the same folder which is fsynced and then
+    renamed over the base, so readers see either the old or the new file.
+    """
+    folder = os.path.dirname(os.path.abspath(filename))
+    with LOCK:
+        fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=".csv", dir=folder)
+        try:
+            with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(rows)
+                f.flush()
+                os.fsync(f.fileno())
+            keep_mode(tmp, filename)
+            os.replace(tmp, filename)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        if os.path.exists(log_path(filename)):
+            os.remove(log_path(filename))
+
+
+def compact(filename, header):
+    """Merges the log into a new base file. Returns True if there was anything to merge."""
+    with LOCK:
+        entries = read_log(filename)
+        if not entries:
+            return False
+
+        rows = []
+        if os.path.exists(filename):
+            with open(filename, "r", newline="", encoding="utf-8") as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                rows = list(replay(reader, entries))
+        else:
+            rows = list(replay([], entries))
+
+        write_base(filename, header, rows)
+        return True
+
+
+def log_size(filename):
+    """Size of the change log in bytes (0 if there is none)."""
+    path = log_path(filename)
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def maybe_compact(filename, header, threshold=COMPACT_THRESHOLD, background=True):
+    """Compacts once the log passes threshold bytes.
+
+    Runs in a background thread by default and returns it (or None when no
+    compaction was needed). The thread is not a daemon: the interpreter
+    waits for it at exit instead of killing it in the middle of
+    write_base, which would leave its .tmp- file behind.
+    """
+    if log_size(filename) < threshold:
+        return None
+    if not background:
+        compact(filename, header)
+        return None
+
+    worker = threading.Thread(target=compact, args=(filename, header), name="log-compaction")
+    worker.start()
+    return worker
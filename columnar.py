@@ -0,0 +1,193 @@
+import csv
+import os
+import numpy as np  # For fast numerical operations
+from changelog import read_log, replay
+from ingest import DEFAULT_FILE, DEFAULT_HEADER, DEFAULT_BATCH_SIZE, iter_clean_batches
+
+
+# ---------------- CONFIGURATION ----------------
+FILENAME = DEFAULT_FILE
+HEADER = DEFAULT_HEADER
+
+TEXT_COLUMNS = HEADER[0:4]    # student_id, last_name, first_name, section
+SCORE_COLUMNS = HEADER[4:12]  # quiz1..quiz5, midterm, final, attendance_percent
+QUIZ_SLICE = slice(0, 5)      # Quiz columns inside the score matrix
+MIDTERM, FINAL, ATTENDANCE = 5, 6, 7
+
+MISSING = ("", "none")
+
+
+
+
+# ---------------- ROSTER (COLUMNAR DATA) ----------------
+class Roster:
+    """Column-oriented copy of the student records.
+
+    Text fields are kept as NumPy string arrays and all eight score columns
+    live in a single float64 matrix of shape (N, 8) with NaN for missing.
+    """
+
+    def __init__(self, ids, last_names, first_names, sections, scores):
+        self.ids = ids
+        self.last_names = last_names
+        self.first_names = first_names
+        self.sections = sections
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.ids)
+
+    def to_rows(self):
+        """Return list rows in HEADER order (None for missing scores)."""
+        scores = [[None if v != v else v for v in row] for row in self.scores.tolist()]
+        text = zip(self.ids.tolist(), self.last_names.tolist(),
+                   self.first_names.tolist(), self.sections.tolist())
+        return [list(t) + s for t, s in zip(text, scores)]
+
+    def section_codes(self):
+        """Dictionary-encoded sections: (codes, names), see encode_sections.
+
+        Computed once per roster and cached.
+        """
+        encoded = self.__dict__.get("_section_codes")
+        if encoded is None:
+            encoded = self._section_codes = encode_sections(self.sections)
+        return encoded
+
+    def column(self, name):
+        """Return one column (text or score) by its header name."""
+        if name in SCORE_COLUMNS:
+            return self.scores[:, SCORE_COLUMNS.index(name)]
+        return {
+            "student_id": self.ids,
+            "last_name": self.last_names,
+            "first_name": self.first_names,
+            "section": self.sections,
+        }[name]
+
+
+def encode_sections(sections):
+    """Map section names to small integer codes.
+
+    Returns (codes, names): codes is an int32 array with one entry per row
+    and names[code] is the section name, with surrounding blanks stripped.
+    Codes follow the order each section first appears in the file; rows
+    without a section get -1.
+    """
+    stripped = np.char.strip(np.asarray(sections, dtype=str))
+    if not stripped.size:
+        return np.array([], dtype=np.int32), np.array([], dtype=str)
+
+    names, first, inverse = np.unique(stripped, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind="stable")   # Sorted-unique -> first-appearance order
+    rank = np.empty(len(names), dtype=np.int32)
+    rank[order] = np.arange(len(names), dtype=np.int32)
+    codes = rank[inverse.ravel()]
+    names = names[order]
+
+    blanks = np.flatnonzero(names == "")
+    if blanks.size:
+        blank = int(blanks[0])
+        codes = np.where(codes == blank, -1, codes - (codes > blank)).astype(np.int32)
+        names = np.delete(names, blank)
+    return codes, names
+
+
+def parse_score(val):
+    """Convert one CSV cell to float, NaN when empty or not numeric."""
+    if val is None:
+        return np.nan
+    if isinstance(val, (float, int)):
+        return float(val)
+    s = str(val).strip()
+    if s.lower() in MISSING:
+        return np.nan
+    try:
+        return float(s)
+    except ValueError:
+        return np.nan
+
+
+def _score_text(val):
+    """Normalize a cell to text NumPy can parse ("nan" for missing)."""
+    if val is None:
+        return "nan"
+    s = str(val).strip()
+    return "nan" if s.lower() in MISSING else s
+
+
+def parse_score_column(values):
+    """Convert a whole column of cells to a float64 array in one call.
+
+    Validated columns (floats and None, as clean_ingest returns them) are
+    converted directly. Falls back to cell-by-cell parsing only when the
+    column holds a value NumPy cannot parse (e.g. stray text).
+    """
+    try:
+        return np.array(values, dtype=float)   # None becomes NaN
+    except (TypeError, ValueError):
+        pass
+    cells = [_score_text(v) for v in values]
+    arr = np.array(cells, dtype=str) if cells else np.array([], dtype=str)
+    try:
+        return arr.astype(float)
+    except ValueError:
+        return np.array([parse_score(v) for v in values], dtype=float)
+
+
+def _padded_columns(rows):
+    """Transpose list rows in HEADER order into columns (short rows padded with None)."""
+    width = len(HEADER)
+    if rows and set(map(len, rows)) == {width}:
+        return list(zip(*rows))   # Already the right width (validated rows)
+    padded = [list(row[:width]) + [None] * (width - len(row)) for row in rows]
+    return list(zip(*padded)) if padded else [()] * width
+
+
+def score_matrix(rows, columns=None):
+    """(N, 8) float64 score matrix from list rows in HEADER order (NaN for missing)."""
+    if columns is None:
+        columns = _padded_columns(rows)
+    scores = np.empty((len(columns[0]), len(SCORE_COLUMNS)), dtype=float)
+    for c in range(len(SCORE_COLUMNS)):
+        scores[:, c] = parse_score_column(columns[c + len(TEXT_COLUMNS)])
+    return scores
+
+
+def roster_from_rows(rows):
+    """Build a Roster from list rows in HEADER order (e.g. clean_ingest output)."""
+    columns = _padded_columns(rows)
+    text = [
+        np.array(["" if v is None else str(v) for v in columns[c]], dtype=str)
+        for c in range(len(TEXT_COLUMNS))
+    ]
+    return Roster(*text, score_matrix(rows, columns))
+
+
+def load_roster(filename=FILENAME):
+    """Read a student CSV into a Roster. Returns None if the file is missing."""
+    if not os.path.exists(filename):
+        return None
+
+    entries = read_log(filename)
+    with open(filename, "r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        file_header = next(reader, None)
+        if file_header is None:
+            return roster_from_rows([])
+
+        # Map columns by name so files with a different column order still load
+        positions = [file_header.index(h) if h in file_header else None for h in HEADER]
+        rows = [
+            [row[p] if p is not None and p < len(row) else None for p in positions]
+            for row in replay(reader, entries)
+            if row
+        ]
+
+    return roster_from_rows(rows)
+
+
+def iter_rosters(filename=FILENAME, batch_size=DEFAULT_BATCH_SIZE, rejects_file=None):
+    """Stream a large CSV as one Roster per validated batch (bounded memory)."""
+    for batch in iter_clean_batches(filename, HEADER, batch_size, rejects_file):
+        yield roster_from_rows(batch)
@@ -0,0 +1,162 @@
+import csv
+import heapq
+import os
+import tempfile
+import numpy as np  # Vectorized in-run sorting
+from ingest import DEFAULT_FILE, DEFAULT_HEADER, iter_clean_batches
+from changelog import write_base
+
+
+# ---------------------- CONFIGURATION ----------------------
+
+
+DEFAULT_RUN_ROWS = 500000    # Rows sorted in memory per run (sets the memory budget)
+MAX_FAN_IN = 64              # Runs merged at once; more runs are merged in passes
+NUMERIC_COLUMNS = range(4, 12)
+
+
+
+
+# ---------------------- SORT KEYS ----------------------
+
+
+def sort_spec(header, columns):
+    """Turns [(column_name, descending), ...] into [(index, is_numeric, descending), ...].
+
+    Raises ValueError for an unknown column or an empty key list.
+    """
+    if not columns:
+        raise ValueError("At least one sort column is needed")
+    spec = []
+    for name, descending in columns:
+        if name not in header:
+            raise ValueError(f"Unknown column: {name}")
+        index = header.index(name)
+        spec.append((index, index in NUMERIC_COLUMNS, bool(descending)))
+    return spec
+
+
+def _numeric(value):
+    """Sort value of a score cell: missing scores sort as -inf."""
+    if value is None or value == "":
+        return float("-inf")
+    return float(value)
+
+
+def _text(value):
+    """Sort value of a text cell: case-insensitive."""
+    return "" if value is None else str(value).lower()
+
+
+class _Descending:
+    """Wraps a text key so it sorts in reverse inside an ascending merge."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return self.value > other.value
+
+
+def row_key(spec):
+    """Key function for one row, used by the k-way merge."""
+    def key(row):
+        parts = []
+        for index, numeric, descending in spec:
+            if numeric:
+                value = _numeric(row[index])
+                parts.append(-value if descending else value)
+            else:
+                value = _text(row[index])
+                parts.append(_Descending(value) if descending else value)
+        return tuple(parts)
+    return key
+
+
+def sort_order(rows, spec):
+    """Stable order of a list of rows by spec, computed with np.lexsort.
+
+    Equal keys keep their input order, also for descending columns, so the
+    result is the same as a stable sorted() with row_key.
+    """
+    keys = []
+    for index, numeric, descending in spec:
+        if numeric:
+            column = np.array([_numeric(row[index]) for row in rows], dtype=float)
+            keys.append(-column if descending else column)
+        else:
+            column = np.array([_text(row[index]) for row in rows], dtype=str)
+            _, codes = np.unique(column, return_inverse=True)
+            codes = codes.ravel()
+            keys.append(-codes if descending else codes)
+    # lexsort treats its last key as the primary one
+    return np.lexsort(keys[::-1]) if rows else np.array([], dtype=np.intp)
+
+
+
+
+# ---------------------- RUNS AND MERGING ----------------------
+
+
+def _write_run(folder, rows):
+    fd, path = tempfile.mkstemp(prefix="run-", suffix=".csv", dir=folder)
+    with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(rows)
+    return path
+
+
+def _read_run(path):
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        yield from csv.reader(f)
+
+
+def _merge(paths, key):
+    """Lazily k-way merges sorted run files; equal keys come from earlier runs first."""
+    return heapq.merge(*[_read_run(path) for path in paths], key=key)
+
+
+def external_sort(filename=DEFAULT_FILE, header=DEFAULT_HEADER, columns=(("student_id", False),),
+                  run_rows=DEFAULT_RUN_ROWS):
+    """Sorts the validated rows of a CSV file that may not fit in memory.
+
+    columns is a list of (column_name, descending) pairs, e.g.
+    [("section", False), ("final", True)]. Validated rows (change log
+    applied) are read run_rows at a time, each run is sorted in memory and
+    written to a temp file, and the runs are k-way merged straight into
+    the new base file, which replaces the old one atomically. Text sorts
+    case-insensitively, missing scores sort as -inf and ties keep file
+    order, like the in-memory sort. Returns the number of rows written,
+    or None if the file does not exist.
+    """
+    spec = sort_spec(header, columns)
+    if run_rows < 1:
+        raise ValueError("run_rows must be at least 1")
+    if not os.path.exists(filename):
+        return None
+
+    folder = os.path.dirname(os.path.abspath(filename))
+    with tempfile.TemporaryDirectory(prefix=".sort-", dir=folder) as work:
+        runs = []
+        count = 0
+        for batch in iter_clean_batches(filename, header, run_rows):
+            runs.append(_write_run(work, [batch[i] for i in sort_order(batch, spec)]))
+            count += len(batch)
+
+        # Merge in passes until few enough runs are left for one final merge
+        key = row_key(spec)
+        while len(runs) > MAX_FAN_IN:
+            merged = []
+            for start in range(0, len(runs), MAX_FAN_IN):
+                group = runs[start:start + MAX_FAN_IN]
+                merged.append(_write_run(work, _merge(group, key)))
+                for path in group:
+                    os.remove(path)
+            runs = merged
+
+        write_base(filename, header, _merge(runs, key))
+    return count
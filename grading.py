@@ -0,0 +1,115 @@
+import numpy as np  # For fast numerical operations
+from columnar import SCORE_COLUMNS, QUIZ_SLICE, MIDTERM, FINAL, ATTENDANCE
+
+
+# ---------------- CONFIGURATION ----------------
+COMPONENTS = ("quiz", "midterm", "final", "attendance")
+
+# Missing-score policies:
+#   "zero"     a missing component counts as 0 (what both modules have always done)
+#   "reweight" a missing component is left out and the other weights are scaled up
+MISSING_POLICIES = ("zero", "reweight")
+
+DEFAULT_CUTOFFS = (("A", 90.0), ("B", 80.0), ("C", 70.0), ("D", 60.0))
+DEFAULT_FAIL_LETTER = "F"
+NO_GRADE = "N/A"
+
+
+
+
+# ---------------- GRADING POLICY ----------------
+class GradingPolicy:
+    """Weights, missing-score policy and letter cutoffs, validated and
+    compiled once so whole score matrices can be graded in one call.
+
+    Each module builds its own policy: analytics.POLICY and reports.POLICY
+    share this code and the cutoffs but not the weights.
+
+    weights  dict with quiz/midterm/final/attendance weights (must total 1.0)
+    missing  one of MISSING_POLICIES
+    cutoffs  (letter, minimum grade) pairs from best to worst; anything
+             below the last cutoff gets fail_letter
+    """
+
+    def __init__(self, weights, missing="zero", cutoffs=DEFAULT_CUTOFFS,
+                 fail_letter=DEFAULT_FAIL_LETTER, decimals=2):
+        if set(weights) != set(COMPONENTS):
+            raise ValueError(f"weights must have exactly these keys: {', '.join(COMPONENTS)}")
+        vector = np.array([float(weights[c]) for c in COMPONENTS], dtype=float)
+        if (vector < 0).any():
+            raise ValueError("weights cannot be negative")
+        if not np.isclose(vector.sum(), 1.0):
+            raise ValueError(f"weights must total 1.0 (got {vector.sum():.4f})")
+        if missing not in MISSING_POLICIES:
+            raise ValueError(f"missing must be one of: {', '.join(MISSING_POLICIES)}")
+
+        letters = [letter for letter, _ in cutoffs]
+        bounds = [float(bound) for _, bound in cutoffs]
+        if any(not 0 <= b <= 100 for b in bounds):
+            raise ValueError("cutoffs must be between 0 and 100")
+        if any(a <= b for a, b in zip(bounds, bounds[1:])):
+            raise ValueError("cutoffs must be strictly decreasing")
+
+        self.weights = dict(zip(COMPONENTS, vector.tolist()))
+        self.missing = missing
+        self.cutoffs = tuple(zip(letters, bounds))
+        self.fail_letter = fail_letter
+        self.decimals = decimals
+
+        # Compiled form: weight vector, ascending bounds and the letter for
+        # each searchsorted bucket (below the lowest bound -> fail letter)
+        self.weight_vector = vector
+        self.bounds = np.array(bounds[::-1], dtype=float)
+        self.bucket_letters = np.array([fail_letter] + letters[::-1])
+        self.letter_order = tuple(letters) + (fail_letter,)
+
+    # ---------- batch kernel ----------
+
+    def components(self, scores):
+        """(N, 4) matrix of quiz average, midterm, final, attendance (NaN if missing)."""
+        scores = np.asarray(scores, dtype=float).reshape(-1, len(SCORE_COLUMNS))
+
+        # Average quiz grade (skip blanks) without warning on all-blank rows
+        quizzes = scores[:, QUIZ_SLICE]
+        taken = (~np.isnan(quizzes)).sum(axis=1)
+        quiz_sum = np.nansum(quizzes, axis=1)
+        avg_quiz = np.divide(quiz_sum, taken, out=np.full(len(scores), np.nan), where=taken > 0)
+
+        return np.column_stack([avg_quiz, scores[:, MIDTERM], scores[:, FINAL], scores[:, ATTENDANCE]])
+
+    def grades(self, scores):
+        """Weighted grades for an (N, 8) score matrix, NaN where a student has no score at all."""
+        parts = self.components(scores)
+        present = ~np.isnan(parts)
+        no_data = ~present.any(axis=1)
+
+        weighted = np.nan_to_num(parts, nan=0.0) @ self.weight_vector
+        if self.missing == "reweight":
+            used = present @ self.weight_vector
+            weighted = np.divide(weighted, used, out=np.zeros_like(weighted), where=used > 0)
+
+        weighted = np.round(weighted, self.decimals)
+        weighted[no_data] = np.nan
+        return weighted
+
+    def letters(self, grades):
+        """Letter for every grade (searchsorted over the cutoffs); NO_GRADE for NaN."""
+        grades = np.asarray(grades, dtype=float)
+        buckets = np.searchsorted(self.bounds, np.nan_to_num(grades, nan=-np.inf), side="right")
+        letters = self.bucket_letters[buckets].astype(object)
+        letters[np.isnan(grades)] = NO_GRADE
+        return letters.astype(str)
+
+    def apply(self, scores):
+        """Grade a whole score matrix at once. Returns (grades, letters)."""
+        grades = self.grades(scores)
+        return grades, self.letters(grades)
+
+    def letter_counts(self, grades):
+        """Number of grades per letter, best letter first (NaN grades are skipped)."""
+        grades = np.asarray(grades, dtype=float)
+        grades = grades[~np.isnan(grades)]
+        counts = np.bincount(np.searchsorted(self.bounds, grades, side="right"),
+                             minlength=len(self.bucket_letters))
+        by_letter = dict(zip(self.bucket_letters.tolist(), counts.tolist()))
+        return {letter: by_letter[letter] for letter in self.letter_order}
@@ -0,0 +1,64 @@
+import numpy as np  # For fast numerical operations
+
+
+
+
+# ---------------- GROUP-BY ----------------
+def group_rows(codes, n_groups):
+    """Row indices of each group: a list of n_groups int arrays, rows in file order.
+
+    One stable argsort of the codes, cut at the bincount group sizes;
+    rows with code -1 (no group) are left out.
+    """
+    if not n_groups:
+        return []
+    codes = np.asarray(codes)
+    order = np.argsort(codes, kind="stable")
+    ungrouped = int((codes < 0).sum())   # Code -1 sorts first
+    sizes = np.bincount(codes[codes >= 0], minlength=n_groups)
+    return np.split(order[ungrouped:], np.cumsum(sizes)[:-1])
+
+
+def group_stats(codes, n_groups, grades, policy):
+    """Per-group count, mean, SD, min, max and letter cross-tab in one pass.
+
+    codes     int array of group codes per row (-1 = no group, skipped)
+    n_groups  number of groups (codes run from 0 to n_groups - 1)
+    grades    float array of grades per row (NaN = no grade, skipped)
+    policy    GradingPolicy whose cutoffs decide the letters
+
+    Everything is a bincount over the codes, so the cost is O(n) whatever
+    the number of groups. Returns a dict of arrays indexed by code:
+    count, mean, stdev (population), min and max (NaN for empty groups),
+    and letters, an (n_groups, n_letters) count matrix whose columns
+    follow policy.letter_order.
+    """
+    codes = np.asarray(codes)
+    grades = np.asarray(grades, dtype=float)
+    keep = (codes >= 0) & ~np.isnan(grades)
+    codes, grades = codes[keep], grades[keep]
+
+    count = np.bincount(codes, minlength=n_groups)
+    total = np.bincount(codes, weights=grades, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        # Squared distances from each group's own mean, for a stable SD
+        spread = np.bincount(codes, weights=(grades - mean[codes]) ** 2, minlength=n_groups)
+        stdev = np.sqrt(spread / count)
+
+    low = np.full(n_groups, np.inf)
+    high = np.full(n_groups, -np.inf)
+    np.minimum.at(low, codes, grades)
+    np.maximum.at(high, codes, grades)
+    empty = count == 0
+    low[empty] = high[empty] = np.nan
+
+    # Cross-tab: one flat bincount over (code, letter bucket) pairs
+    n_buckets = len(policy.bucket_letters)
+    buckets = np.searchsorted(policy.bounds, grades, side="right")
+    table = np.bincount(codes * n_buckets + buckets, minlength=n_groups * n_buckets)
+    table = table.reshape(n_groups, n_buckets)
+    bucket_of = {letter: i for i, letter in enumerate(policy.bucket_letters.tolist())}
+    letters = table[:, [bucket_of[letter] for letter in policy.letter_order]]
+
+    return {"count": count, "mean": mean, "stdev": stdev, "min": low, "max": high, "letters": letters}
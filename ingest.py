@@ -1,5 +1,14 @@
 import csv
+import gc
+import io
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from operator import itemgetter, not_
+import numpy as np  # Column-wise validation
+from changelog import read_log, replay, fold, apply_state, tail_rows, log_path  # Pending adds/updates/deletes
+import profiling  # Opt-in phase timings (no-op unless enabled)
 
 
 # ---------------------- CONFIGURATION ----------------------
@@ -11,84 +20,508 @@ DEFAULT_HEADER = [
     "quiz1","quiz2","quiz3","quiz4","quiz5",
     "midterm","final","attendance_percent"
 ]
+DEFAULT_BATCH_SIZE = 10000
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024   # Smaller files are read serially (pool start-up costs more)
+SCAN_BLOCK = 1024 * 1024                # Bytes read at a time when placing range boundaries
+# Pool workers are started fresh instead of forked: clean_ingest also runs
+# on background threads (the initial load, export jobs), and forking a
+# process that has other threads can copy a lock held by one of them
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
 
+TEXT_FIELDS = range(1, 4)       # last_name, first_name, section
+SCORE_FIELDS = range(4, 12)     # quiz1..quiz5, midterm, final, attendance_percent
 
+# Reason codes from validate_rows, one uint32 bit field per row (0 = clean):
+#   bit 0          missing student ID (row rejected)
+#   bit 1          row shorter than the header needs (row rejected)
+#   bits 2..9      score column 4..11 out of range (cell cleared to None)
+#   bits 10..17    score column 4..11 not a number (cell cleared to None)
+MISSING_ID = 1 << 0
+SHORT_ROW = 1 << 1
+OUT_OF_RANGE = 1 << 2
+UNPARSEABLE = 1 << (2 + len(SCORE_FIELDS))
+REJECTED = MISSING_ID | SHORT_ROW
+REASON_BITS = 2 + 2 * len(SCORE_FIELDS)
+
+# Score cells that mean "no score", spelled the way they usually appear
+_MISSING_CELLS = {"": "nan", "none": "nan", "None": "nan", "NONE": "nan"}
 
 
-# ---------------------- CLEAN AND VALIDATE CSV ----------------------
 
 
-def clean_ingest(filename=DEFAULT_FILE, header=DEFAULT_HEADER):
-    """Reads a CSV file, validates each row, and separates valid and invalid data."""
-    if not os.path.exists(filename):
-        print("File not found.")
-        return [], []
+# ---------------------- VALIDATE ONE ROW ----------------------
+
+
+def validate_row(row, width, header=DEFAULT_HEADER):
+    """Cleans one CSV row in place. Raises ValueError if the row must be rejected."""
+    # Ensure row has complete columns
+    while len(row) < width:
+        row.append("")
+
+
+    # Check for missing Student ID
+    if not row[0].strip():
+        raise ValueError("Missing Student ID")
+
+
+    # Fill missing text columns
+    for i in range(1, 4):
+        if not row[i].strip():
+            row[i] = "none"
+
+
+    # Validate numeric fields (quiz1–attendance)
+    for i in range(4, 12):
+        val = row[i].strip() if isinstance(row[i], str) else row[i]
+        if val == "" or str(val).lower() == "none":
+            row[i] = None
+        else:
+            try:
+                num_val = float(val)
+                if not (0 <= num_val <= 100):
+                    raise ValueError(f"{header[i]} out of range")
+                row[i] = num_val
+            except ValueError:
+                row[i] = None
+
+
+    return row
+
+
+
+
+# ---------------------- VALIDATE MANY ROWS ----------------------
+
+
+def _parse_cell(cell):
+    """(value, missing, unparseable) for one score cell (NaN when not a number)."""
+    text = cell.strip() if isinstance(cell, str) else cell
+    if text == "" or str(text).lower() == "none":
+        return np.nan, True, False
+    try:
+        return float(text), False, False
+    except (TypeError, ValueError):
+        return np.nan, False, True
+
+
+def _parse_scores(cells):
+    """Parses one score column. Returns (values, missing, unparseable) arrays.
+
+    The usual column (numbers and blank/none cells) is converted in one
+    C-level float() pass. A column with anything else falls back to
+    parsing each distinct cell text once and spreading the results back
+    by index.
+    """
+    n = len(cells)
+    try:
+        values = np.array(list(map(float, map(_MISSING_CELLS.get, cells, cells))), dtype=float)
+    except (TypeError, ValueError):
+        index = {cell: i for i, cell in enumerate(dict.fromkeys(cells))}
+        parsed = np.array([_parse_cell(cell) for cell in index], dtype=object).reshape(-1, 3)
+        codes = np.fromiter(map(index.__getitem__, cells), np.intp, n)
+        return (parsed[:, 0].astype(float)[codes], parsed[:, 1].astype(bool)[codes],
+                parsed[:, 2].astype(bool)[codes])
+
+    # Only NaN cells can be missing ones
+    missing = np.zeros(n, dtype=bool)
+    nan_at = np.flatnonzero(np.isnan(values))
+    if nan_at.size > n // 16:
+        missing = np.fromiter(map(_MISSING_CELLS.__contains__, cells), bool, n)
+    elif nan_at.size:
+        missing[nan_at] = [cells[i] in _MISSING_CELLS for i in nan_at.tolist()]
+    return values, missing, np.zeros(n, dtype=bool)
+
+
+def validate_rows(rows, width, header=DEFAULT_HEADER):
+    """Cleans many CSV rows at once with the same rules as validate_row.
+
+    Score columns are parsed as whole arrays and the 0–100 check is a
+    mask, instead of float() in a try/except per cell. Rows are cleaned in
+    place like validate_row does. Returns (valid_rows, bad_rows, reasons):
+    reasons holds one reason code per input row (see MISSING_ID and
+    friends at the top of this file), and bad rows carry describe_reasons
+    of their code as a last column, like clean_ingest.
+    """
+    n = len(rows)
+    reasons = np.zeros(n, dtype=np.uint32)
+    if not n:
+        return [], [], reasons
+
+    # Pad rows to the file's width, as validate_row does
+    lengths = np.fromiter(map(len, rows), np.int64, n)
+    for i in np.flatnonzero(lengths < width).tolist():
+        rows[i].extend([""] * (width - len(rows[i])))
+    lengths = np.maximum(lengths, width)
+    usable = lengths >= len(header)
+
+    # Missing ID first (validate_row checks it before anything else)
+    ids = (row[0] if row else "x" for row in rows)
+    no_id = ~np.fromiter(map(bool, map(str.strip, ids)), bool, n) & (lengths > 0)
+    reasons[no_id] |= MISSING_ID
+    reasons[~usable & ~no_id] |= SHORT_ROW
+
+    # Clean the rows that hold every field (and have an ID), column by column
+    good = usable & ~no_id
+    full = rows if good.all() else [rows[i] for i in np.flatnonzero(good).tolist()]
+    full_reasons = np.zeros(len(full), dtype=np.uint32)
+    scores = []
+    for bit, i in enumerate(SCORE_FIELDS):
+        values, missing, unparseable = _parse_scores(list(map(itemgetter(i), full)))
+        with np.errstate(invalid="ignore"):
+            in_range = (values >= 0) & (values <= 100)
+        if not in_range.all():
+            full_reasons[~missing & ~unparseable & ~in_range] |= OUT_OF_RANGE << bit
+            full_reasons[unparseable] |= UNPARSEABLE << bit
+        cleared = np.flatnonzero(~in_range)
+        if cleared.size > len(values) // 16:
+            cells = values.astype(object)
+            cells[cleared] = None
+            cells = cells.tolist()
+        else:
+            cells = values.tolist()
+            for r in cleared.tolist():
+                cells[r] = None
+        scores.append(cells)
+    reasons[good] |= full_reasons
+    for row, cells in zip(full, zip(*scores)):
+        row[SCORE_FIELDS.start:SCORE_FIELDS.stop] = cells
+    for i in TEXT_FIELDS:
+        column = list(map(itemgetter(i), full))
+        if "" in column or any(map(str.isspace, column)):
+            for r in np.flatnonzero(np.fromiter(map(not_, map(str.strip, column)), bool, len(column))).tolist():
+                full[r][i] = "none"
+
+    if good.all():
+        return full, [], reasons
+
+    valid_rows, bad_rows = [], []
+    for row, code in zip(rows, reasons.tolist()):
+        if code & SHORT_ROW:
+            # Rare: validate_row cleans the cells it gets to before failing, as bad rows always showed
+            try:
+                validate_row(row, width, header)
+            except Exception:
+                pass
+        if code & REJECTED:
+            row.append("; ".join(describe_reasons(code, header)))
+            bad_rows.append(row)
+        else:
+            valid_rows.append(row)
+    return valid_rows, bad_rows, reasons
+
+
+def describe_reasons(code, header=DEFAULT_HEADER):
+    """Readable list of what a reason code from validate_rows means."""
+    notes = []
+    if code & MISSING_ID:
+        notes.append("Missing Student ID")
+    if code & SHORT_ROW:
+        notes.append("Row has fewer columns than the header")
+    for bit, i in enumerate(SCORE_FIELDS):
+        if code & (OUT_OF_RANGE << bit):
+            notes.append(f"{header[i]} out of range")
+        if code & (UNPARSEABLE << bit):
+            notes.append(f"{header[i]} is not a number")
+    return notes
 
 
-    valid_rows = []
-    bad_rows = []
+def reason_counts(reasons):
+    """Number of rows with each reason bit set (int64 array indexed by bit)."""
+    reasons = np.asarray(reasons, dtype=np.uint32)
+    flagged = reasons[reasons != 0]
+    return np.array([np.count_nonzero(flagged & (1 << bit)) for bit in range(REASON_BITS)], dtype=np.int64)
 
 
-    # Read CSV file
-    with open(filename, "r", newline="", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        rows = list(reader)
+def print_counts(valid, bad, counts, header=DEFAULT_HEADER):
+    """The valid/bad summary, with bad rows and cleared score cells broken down by reason."""
+    print(f"\nValid rows: {valid}")
+    print(f"Bad rows: {bad}")
+    counts = np.asarray(counts).tolist()
+    cleared = [(bit, n) for bit, n in enumerate(counts) if n and not (1 << bit) & REJECTED]
+    for bit, n in enumerate(counts):
+        if n and (1 << bit) & REJECTED:
+            print(f"  {describe_reasons(1 << bit, header)[0]}: {n}")
+    if cleared:
+        print(f"Score cells cleared (row kept): {sum(n for _, n in cleared)}")
+        for bit, n in cleared:
+            print(f"  {describe_reasons(1 << bit, header)[0]}: {n}")
 
 
-    if not rows:
+
+
+# ---------------------- CLEAN AND VALIDATE CSV ----------------------
+
+
+@profiling.profiled("ingest.clean_ingest")
+def clean_ingest(filename=DEFAULT_FILE, header=DEFAULT_HEADER, verbose=True, workers=1):
+    """Reads a CSV file, validates its rows, and separates valid and invalid data.
+
+    With workers > 1 (or None for one per CPU) a large file is validated in
+    byte ranges by a process pool, see parallel_ingest. The rows and their
+    order are the same either way.
+    """
+    if not os.path.exists(filename):
+        print("File not found.")
         return [], []
 
 
-    file_header = rows[0]
-    data_rows = rows[1:]
+    # Read the log first, so a compaction in between is harmless
+    entries = _read_log(filename)
+    result = None
+    if workers is None or workers > 1:
+        result = parallel_ingest(filename, header, workers, entries)
+    valid_rows, bad_rows, counts = result if result is not None else _serial_ingest(filename, header, entries)
 
 
-    # Validate each row of the CSV file
-    for row in data_rows:
-        try:
-            # Ensure row has complete columns
-            while len(row) < len(file_header):
-                row.append("")
+    # Display summary of results
+    if verbose:
+        print_counts(len(valid_rows), len(bad_rows), counts, header)
 
 
-            # Check for missing Student ID
-            if not row[0].strip():
-                raise ValueError("Missing Student ID")
+    return valid_rows, bad_rows
 
 
-            # Fill missing text columns
-            for i in range(1, 4):
-                if not row[i].strip():
-                    row[i] = "none"
+def _read_log(filename):
+    """read_log, timed as its own phase (the log is a separate read from the CSV)."""
+    with profiling.phase("ingest.read_log") as p:
+        entries = read_log(filename)
+        if p:
+            p.add(rows=len(entries), bytes_read=profiling.file_bytes(log_path(filename)))
+    return entries
 
 
-            # Validate numeric fields (quiz1–attendance)
-            for i in range(4, 12):
-                val = row[i].strip() if isinstance(row[i], str) else row[i]
-                if val == "" or str(val).lower() == "none":
-                    row[i] = None
-                else:
-                    try:
-                        num_val = float(val)
-                        if not (0 <= num_val <= 100):
-                            raise ValueError(f"{header[i]} out of range")
-                        row[i] = num_val
-                    except ValueError:
-                        row[i] = None
+def _serial_ingest(filename, header, entries):
+    """(valid_rows, bad_rows, reason_counts) of the whole file, read in this process."""
+    with profiling.phase("ingest.read") as p:
+        with open(filename, "r", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            rows = list(reader)
+        if p:
+            p.add(rows=max(len(rows) - 1, 0), bytes_read=profiling.file_bytes(filename))
 
 
-            valid_rows.append(row)
+    if not rows:
+        return [], [], reason_counts([])
 
 
-        except Exception as e:
-            row.append(str(e))
-            bad_rows.append(row)
+    file_header = rows[0]
+    data_rows = list(replay(rows[1:], entries))
+
+
+    # Validate all rows column by column
+    with profiling.phase("ingest.validate", rows=len(data_rows)) as p:
+        valid_rows, bad_rows, reasons = validate_rows(data_rows, len(file_header), header)
+        p.add(valid=len(valid_rows), bad=len(bad_rows))
+    return valid_rows, bad_rows, reason_counts(reasons)
+
+
+
+
+# ---------------------- PARALLEL INGEST ----------------------
+
+
+def _read_record(f, quotes=0):
+    """Reads whole lines until the quote count is even (outside a quoted field).
+
+    Returns (bytes_read, quotes).
+    """
+    data = b""
+    while True:
+        line = f.readline()
+        data += line
+        quotes += line.count(b'"')
+        if not line or quotes % 2 == 0:
+            return data, quotes
+
+
+def split_ranges(filename, parts):
+    """Splits the data rows of a CSV file into about parts byte ranges.
+
+    Each boundary is moved forward to the end of a line that is outside
+    any quoted field (an even number of quote characters before it), so
+    a range always holds whole records; this holds for any file written
+    by csv.writer. Returns (file_header, [(start, end), ...]), or None
+    for an empty file.
+    """
+    size = os.path.getsize(filename)
+    with open(filename, "rb") as f:
+        head, quotes = _read_record(f)
+        if not head:
+            return None
+        file_header = next(csv.reader(io.StringIO(head.decode("utf-8"), newline="")), [])
+
+        start = pos = f.tell()
+        bounds = [start]
+        for k in range(1, parts):
+            target = start + (size - start) * k // parts
+            if target <= pos:
+                continue
+            # Count quotes up to the target, then finish the record there
+            while pos < target:
+                block = f.read(min(SCAN_BLOCK, target - pos))
+                if not block:
+                    break
+                quotes += block.count(b'"')
+                pos += len(block)
+            rest, quotes = _read_record(f, quotes)
+            pos += len(rest)
+            if pos >= size:
+                break
+            bounds.append(pos)
+        bounds.append(size)
+    return file_header, [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+class _gc_paused:
+    """Turns the cyclic garbage collector off while building many row lists.
+
+    The rows hold no reference cycles, and collections triggered by
+    every few hundred new lists would otherwise cost more than the parsing.
+    """
+
+    def __enter__(self):
+        self.enabled = gc.isenabled()
+        gc.disable()
+
+    def __exit__(self, *exc):
+        if self.enabled:
+            gc.enable()
+
+
+def _ingest_range(filename, start, end, width, header, state):
+    """Worker: validates the rows in one byte range with the log state applied.
+
+    Returns (valid_rows, bad_rows, reason_counts, changed IDs met in the range).
+    """
+    with open(filename, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    with _gc_paused():
+        seen = set()
+        rows = list(apply_state(csv.reader(io.StringIO(text, newline="")), state, seen))
+        valid_rows, bad_rows, reasons = validate_rows(rows, width, header)
+    return valid_rows, bad_rows, reason_counts(reasons), seen
+
+
+def parallel_ingest(filename=DEFAULT_FILE, header=DEFAULT_HEADER, workers=None, entries=None):
+    """clean_ingest for large files, spread over a process pool.
+
+    The file is split into one byte range per worker at record
+    boundaries (split_ranges); each worker parses and validates its
+    range, and the valid and bad rows are joined back in file order, so
+    the result equals the serial read. Returns (valid_rows, bad_rows,
+    reason_counts) like _serial_ingest, or None when the serial read should be used instead: one worker, a file
+    under PARALLEL_MIN_BYTES, or a changed student ID found in more than
+    one range (only the serial replay knows which copy comes first).
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or os.path.getsize(filename) < PARALLEL_MIN_BYTES:
+        return None
+    if entries is None:
+        entries = _read_log(filename)
+    split = split_ranges(filename, workers)
+    if split is None:
+        return [], [], reason_counts([])
+    file_header, ranges = split
+
+    state = fold(entries)
+    results = []
+    if ranges:
+        # Read and validate happen together in the workers: one phase for both
+        with profiling.phase("ingest.parallel", workers=min(workers, len(ranges))) as p, \
+                _gc_paused(), ProcessPoolExecutor(max_workers=min(workers, len(ranges)),
+                                                  mp_context=multiprocessing.get_context(POOL_START_METHOD)) as pool:
+            futures = [pool.submit(_ingest_range, filename, start, end, len(file_header), header, state)
+                       for start, end in ranges]
+            results = [future.result() for future in futures]
+            if p:
+                p.add(rows=sum(len(valid) + len(bad) for valid, bad, _, _ in results),
+                      bytes_read=profiling.file_bytes(filename))
+
+    valid_rows, bad_rows, counts, seen = [], [], reason_counts([]), set()
+    for valid, bad, range_counts, met in results:
+        if seen & met:
+            return None
+        seen |= met
+        valid_rows.extend(valid)
+        bad_rows.extend(bad)
+        counts += range_counts
+
+    # Students that only exist in the log come last, as in replay
+    valid, bad, reasons = validate_rows(list(tail_rows(state, seen)), len(file_header), header)
+    valid_rows.extend(valid)
+    bad_rows.extend(bad)
+    return valid_rows, bad_rows, counts + reason_counts(reasons)
+
+
+
+
+# ---------------------- STREAMING INGEST ----------------------
+
+
+def iter_clean_batches(filename=DEFAULT_FILE, header=DEFAULT_HEADER,
+                       batch_size=DEFAULT_BATCH_SIZE, rejects_file=None, counts=None, verbose=False):
+    """Streams a CSV file and yields lists of at most batch_size valid rows.
+
+    Uses the same rules as clean_ingest but never holds more than one batch
+    (batch_size raw rows, validated together) in memory. Bad rows are
+    written to rejects_file (if given) as they are found, with the error
+    reason as the last column. If a counts dict is
+    passed, its "valid" and "bad" totals are kept up to date.
+
+    The totals are also the generator's return value (what `yield from`
+    gives back), and with verbose=True they are printed at the end of the
+    stream the way clean_ingest prints them.
+    """
+    if counts is None:
+        counts = {}
+    counts.setdefault("valid", 0)
+    counts.setdefault("bad", 0)
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    if not os.path.exists(filename):
+        print("File not found.")
+        return counts
 
 
-    # Display summary of results
-    print(f"\nValid rows: {len(valid_rows)}")
-    print(f"Bad rows: {len(bad_rows)}")
+    entries = _read_log(filename)
+    with open(filename, "r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        file_header = next(reader, None)
+        if file_header is None:
+            return counts
+        reader = replay(reader, entries)
 
 
-    return valid_rows, bad_rows
-    
+        reason_totals = reason_counts([])
+        rejects = None
+        if rejects_file:
+            rejects = open(rejects_file, "w", newline="", encoding="utf-8")
+        try:
+            reject_writer = csv.writer(rejects) if rejects else None
+            if reject_writer:
+                reject_writer.writerow(list(header) + ["error"])
+
+
+            # Validate batch_size raw rows at a time, column by column
+            while True:
+                chunk = list(islice(reader, batch_size))
+                if not chunk:
+                    break
+                batch, bad, reasons = validate_rows(chunk, len(file_header), header)
+                counts["valid"] += len(batch)
+                counts["bad"] += len(bad)
+                reason_totals += reason_counts(reasons)
+                if reject_writer:
+                    reject_writer.writerows(bad)
+                if batch:
+                    yield batch
+        finally:
+            if rejects:
+                rejects.close()
+
+
+    # Same summary as clean_ingest
+    if verbose:
+        print_counts(counts["valid"], counts["bad"], reason_totals, header)
+    return counts
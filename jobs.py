@@ -0,0 +1,158 @@
+import queue
+import threading
+import time
+
+
+# ---------------- CONFIGURATION ----------------
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+HISTORY = 20      # Finished jobs kept for the status view
+
+
+
+
+# ---------------- JOBS ----------------
+class Job:
+    """One unit of background work and its timing.
+
+    requests counts how many submissions were coalesced into this job.
+    """
+
+    def __init__(self, number, name, func, key):
+        self.number = number
+        self.name = name
+        self.func = func
+        self.key = key
+        self.status = QUEUED
+        self.requests = 1
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    def waited(self):
+        """Seconds spent in the queue (so far, if still queued)."""
+        return (self.started or time.time()) - self.submitted
+
+    def ran(self):
+        """Seconds spent running (so far, if still running), or None if not started."""
+        if self.started is None:
+            return None
+        return (self.finished or time.time()) - self.started
+
+
+class JobQueue:
+    """Runs jobs one at a time, in submission order, on a background thread.
+
+    submit() returns at once, so the caller never waits for the work.
+    A submission whose key matches a job that is still queued or running
+    is coalesced into it instead of running again, e.g. a key of (report,
+    data version) never has two exports of the same data waiting; once
+    that job has finished, the same key starts a new one.
+    The worker thread starts with the first job; shutdown() lets the
+    queued jobs finish and stops it.
+    """
+
+    def __init__(self, history=HISTORY):
+        self.history = history
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._jobs = []
+        self._by_key = {}
+        self._count = 0
+        self._thread = None
+        self._closed = False
+
+    def submit(self, name, func, key=None):
+        """Queue func() under a display name. Returns (job, queued_new_job)."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Job queue is shut down")
+            job = self._by_key.get(key) if key is not None else None
+            if job is not None and job.status in (QUEUED, RUNNING):
+                job.requests += 1
+                return job, False
+
+            self._count += 1
+            job = Job(self._count, name, func, key)
+            self._jobs.append(job)
+            if key is not None:
+                self._by_key[key] = job
+            self._trim()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name="job-queue", daemon=True)
+                self._thread.start()
+        self._queue.put(job)
+        return job, True
+
+    def jobs(self):
+        """The jobs still tracked, oldest first (queued and running ones are always kept)."""
+        with self._lock:
+            return list(self._jobs)
+
+    def pending(self):
+        """Number of jobs queued or running."""
+        with self._lock:
+            return sum(job.status in (QUEUED, RUNNING) for job in self._jobs)
+
+    def shutdown(self, wait=True):
+        """Stop taking jobs; with wait, block until the queued ones have run."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(None)  # Sentinel: runs after every queued job
+            if wait:
+                thread.join()
+
+    def _trim(self):
+        """Forget the oldest finished jobs beyond the history limit (lock held)."""
+        finished = [job for job in self._jobs if job.status in (DONE, FAILED)]
+        for job in finished[:max(0, len(finished) - self.history)]:
+            self._jobs.remove(job)
+            if self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                job.status = RUNNING
+                job.started = time.time()
+            try:
+                result, status, error = job.func(), DONE, None
+            except Exception as e:
+                result, status, error = None, FAILED, f"{type(e).__name__}: {e}"
+            with self._lock:
+                job.result, job.status, job.error = result, status, error
+                job.finished = time.time()
+                job.func = None  # Drop references held by the work itself
+                self._trim()
+
+
+
+
+# ---------------- STATUS VIEW ----------------
+def print_jobs(jobs):
+    """Print a status table of background jobs (from JobQueue.jobs())."""
+    if not jobs:
+        print("\nNo background jobs yet.")
+        return
+
+    print("\n=== BACKGROUND JOBS ===")
+    print(f"{'#':>3}  {'Job':<28} {'Status':<8} {'Queued at':<9} {'Wait':>7} {'Run':>7} {'Req':>4}  Note")
+    print("-" * 80)
+    for job in jobs:
+        ran = job.ran()
+        note = job.error or job.result or ""
+        print(f"{job.number:>3}  {job.name[:28]:<28} {job.status:<8} "
+              f"{time.strftime('%H:%M:%S', time.localtime(job.submitted)):<9} "
+              f"{job.waited():>6.2f}s {'-' if ran is None else f'{ran:.2f}s':>7} {job.requests:>4}  {note}")
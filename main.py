@@ -1,8 +1,33 @@
-import array_operations
-import analytics
-import reports
+import importlib
 import os
-from termcolor import colored, cprint
+import sys
+import threading
+import jobs
+
+
+class _LazyModule:
+    """Stands in for a module and imports it on first attribute access.
+
+    Keeps NumPy and the data modules out of start-up, so the menu shows
+    before they are loaded.
+    """
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self._name), attr)
+
+
+array_operations = _LazyModule("array_operations")
+analytics = _LazyModule("analytics")
+reports = _LazyModule("reports")
+
+
+def cprint(*args, **kwargs):
+    from termcolor import cprint as _cprint  # Imported on first use
+    _cprint(*args, **kwargs)
+
 
 # CSV file name and headers
 FILENAME = "studentRecord.csv"
@@ -13,14 +38,65 @@ HEADER = [
 
 
 def clear_screen():
-    os.system('cls' if os.name == 'nt' else 'clear')
+    if os.name == 'nt':
+        os.system('cls')
+    else:
+        print("\033[H\033[2J", end="", flush=True)  # ANSI clear, no `clear` subprocess
+
+
+class _BackgroundLoad:
+    """Loads the CSV into a StudentStore on a thread while the menu is shown.
+
+    result() waits for the load (usually long done by the first choice)
+    and re-raises anything it failed with.
+    """
+
+    def __init__(self, filename, header):
+        self._store = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(filename, header),
+                                        name="initial-load", daemon=True)
+        self._thread.start()
+
+    def _run(self, filename, header):
+        try:
+            from store import StudentStore
+            self._store = StudentStore.from_csv(filename, header, verbose=False)
+        except BaseException as e:
+            self._error = e
+
+    def wait(self):
+        self._thread.join()
+
+    def result(self):
+        self.wait()
+        if self._error is not None:
+            raise self._error
+        return self._store
 
 
 def menu():
-    # Load CSV at program start
-    valid_rows, bad_rows = array_operations.clean_ingest(FILENAME, HEADER)
-    existing_records = valid_rows.copy()  # In-memory copy of valid records
-    
+    # Load the data in the background so the first prompt shows at once
+    loader = _BackgroundLoad(FILENAME, HEADER)
+    # Background worker for exports, so the prompt never waits on them
+    export_jobs = jobs.JobQueue()
+    try:
+        _menu(export_jobs, loader)
+    finally:
+        _shutdown(export_jobs, loader)
+
+
+def _shutdown(export_jobs, loader):
+    pending = export_jobs.pending()
+    if pending:
+        cprint(f"Waiting for {pending} background export(s) to finish...", "blue")
+    export_jobs.shutdown(wait=True)
+    loader.wait()  # Never exit in the middle of the initial load
+
+
+def _menu(export_jobs, loader):
+    store = None
+
     clear_screen()
     while True:
        
@@ -37,40 +113,39 @@ def menu():
 
 
         choice = input("Enter choice: ").strip()
+        if store is None and choice in ("1", "2", "3", "4", "5", "6", "7"):
+            store = loader.result()
 
 
         if choice == "1":
-            # Add students and update in-memory list
-            existing_records = array_operations.add_data(existing_records)
+            # Add students and update in-memory store
+            store = array_operations.add_data(store)
 
 
         elif choice == "2":
-            # Reload from file in case of external changes
-            existing_records, bad_rows = array_operations.clean_ingest(FILENAME, HEADER)
-            if existing_records:
+            # Pick up external changes: only appended rows are read, unless the file was rewritten
+            store = store.refresh(FILENAME, HEADER)
+            if store:
                 print("\n📘 Valid rows:")
-                for row in existing_records:
+                for row in store:
                     print(row)
 
 
         elif choice == "3":
-            array_operations.delete_data(FILENAME)
-            # Reload after deletion
-            existing_records, bad_rows = array_operations.clean_ingest(FILENAME, HEADER)
+            # Store is updated in place, no reload needed
+            store = array_operations.delete_data(store)
 
 
         elif choice == "4":
-            array_operations.select_column(FILENAME)
+            array_operations.select_column(store)
 
 
         elif choice == "5":
-            array_operations.select_row(FILENAME)
+            array_operations.select_row(store)
 
 
         elif choice == "6":
-            array_operations.sort_data(FILENAME)
-            # Reload after sorting
-            existing_records, bad_rows = array_operations.clean_ingest(FILENAME, HEADER)
+            store = array_operations.sort_data(store)
 
 
         elif choice == "7":
@@ -83,10 +158,12 @@ def menu():
                 cprint("e. Improvement (Final vs Midterm)", "green")
                 cprint("f. Summary Reports", "green")
                 cprint("g. Display at-risk Students (at_risk_students.csv)", "green")
-                cprint("h. Back to Main Menu", "blue")
+                cprint("h. Section Statistics (per-section A–F)", "green")
+                cprint("i. Background Export Jobs (status and timing)", "green")
+                cprint("j. Back to Main Menu", "blue")
 
 
-                sub = input("Select an option (a–h): ").lower().strip()
+                sub = input("Select an option (a–j): ").lower().strip()
                 if sub == "a":
                     analytics.compute_grades()
                 elif sub == "b":
@@ -98,34 +175,32 @@ def menu():
                 elif sub == "e":
                     analytics.improvement()
                 elif sub == "f":
-                    reports.summary_report()
+                    # Store keeps grades up to date, so nothing is regraded here
+                    reports.summary_report(store=store)
                 elif sub == "g":
-                    reports.export_at_risk()
+                    reports.export_at_risk(store=store)
                 elif sub == "h":
+                    analytics.section_stats()
+                elif sub == "i":
+                    jobs.print_jobs(export_jobs.jobs())
+                elif sub == "j":
                     break
                 else:
                     print("Invalid choice. Try again.", "red")
 
 
         elif choice == "8":
-            # Show available sections first
+            # Show available sections first (from the section code table)
             try:
-                import csv
-                sections = set()
-                with open(reports.FILENAME, newline="", encoding="utf-8") as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        sec = row.get("section", "").strip()
-                        if sec:
-                            sections.add(sec)
+                sections = reports.section_names(reports.FILENAME)
+                if sections is None:
+                    cprint("\nNo data file found. Please add student records first.", "red")
+                    return
                 if sections:
                     cprint("\nAvailable Sections:", "green")
-                    print(", ".join(sorted(sections)))
+                    print(", ".join(sections))
                 else:
                     cprint("\nNo sections found in the records.", "red")
-            except FileNotFoundError:
-                cprint("\nNo data file found. Please add student records first.", "red")
-                return
             except Exception as e:
                 cprint("\nCould not read sections:", e)
                 return
@@ -139,18 +214,10 @@ def menu():
             reports.display_section_simple(section)
 
 
-            # Silently generate section CSVs in background
-            try:
-                reports.export_per_section(reports.FILENAME, out_folder=reports.OUT_DIR)
-            except Exception:
-                try:
-                    reports.summary_report(
-                        filename=reports.FILENAME,
-                        export_sections=True,
-                        out_folder=reports.OUT_DIR
-                    )
-                except Exception:
-                    pass
+            # Generate section CSVs in the background (requests for the same data share a pending export)
+            job, queued = reports.queue_section_export(export_jobs, reports.FILENAME, reports.OUT_DIR)
+            if queued:
+                cprint(f"\nSection CSV export queued as job #{job.number} (see menu 7 > i).", "blue")
 
 
 
@@ -166,6 +233,114 @@ def menu():
 
 
 
-if __name__ == "__main__":
+# ---------------- BATCH (NON-INTERACTIVE) MODE ----------------
+# Analytics that can run after the reports: option name -> analytics function(filename)
+ANALYTICS = {
+    "grades": "compute_grades",
+    "distribution": "grade_distribution",
+    "percentiles": "percentiles",
+    "outliers": "outliers",
+    "improvement": "improvement",
+    "section_stats": "section_stats",
+}
+REPORTS = ("summary", "stats", "sections", "at_risk")
+
+
+def build_parser():
+    import argparse  # Only the command-line mode needs it
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Student records. Without a command the interactive menu starts.")
+    commands = parser.add_subparsers(dest="command")
+
+    report = commands.add_parser(
+        "report", help="generate reports without prompts (e.g. from cron)",
+        description="Run the chosen reports over each CSV file with a single data load per "
+                    "file. With no report option, --summary --stats --sections --at-risk are run. "
+                    "Exit status: 0 if every file was processed, 1 otherwise.")
+    report.add_argument("files", nargs="*", default=[FILENAME], metavar="CSV",
+                        help=f"class file(s) to report on (default: {FILENAME})")
+    group = report.add_argument_group("reports (one shared pass over the data)")
+    group.add_argument("--summary", action="store_true", help="per-student table and summary.csv")
+    group.add_argument("--stats", action="store_true", help="count, mean, median, max and min grade")
+    group.add_argument("--sections", action="store_true", help="section_<name>.csv per section")
+    group.add_argument("--at-risk", action="store_true", help="at_risk_students.csv below --threshold")
+    group = report.add_argument_group("analytics")
+    group.add_argument("--grades", action="store_true", help="weighted grade per student")
+    group.add_argument("--distribution", action="store_true", help="A-F grade distribution")
+    group.add_argument("--percentiles", action="store_true", help="top/bottom 10%%")
+    group.add_argument("--outliers", action="store_true", help="grades beyond 1.5 SD")
+    group.add_argument("--improvement", action="store_true", help="final vs midterm")
+    group.add_argument("--section-stats", action="store_true", help="per-section statistics")
+    report.add_argument("--threshold", type=float, default=reports.PASSING_GRADE,
+                        help=f"passing grade for --at-risk (default: {reports.PASSING_GRADE:g})")
+    report.add_argument("--out", default=reports.OUT_DIR,
+                        help=f"output folder (default: {reports.OUT_DIR}/); with several files "
+                             "each gets a subfolder named after it")
+    report.add_argument("--batch-size", type=int, default=None,
+                        help="stream the file in validated batches of this many rows")
+    report.add_argument("--profile", metavar="FILE",
+                        help="append per-phase timings, row/byte counts and allocations as JSON "
+                             "lines to FILE (- for stderr); also enabled by the "
+                             "STUDENT_PROFILE environment variable; set "
+                             "STUDENT_PROFILE_ALLOCATIONS=0 to skip the (slow) allocation tracking")
+    return parser
+
+
+def run_report(args):
+    """Run the reports chosen in args over each file. Returns the exit status."""
+    chosen = {name: getattr(args, name) for name in REPORTS}
+    picked = [name for name in ANALYTICS if getattr(args, name)]
+    if not any(chosen.values()) and not picked:
+        chosen = dict.fromkeys(REPORTS, True)
+    if args.batch_size is not None and args.batch_size < 1:
+        print("--batch-size must be at least 1", file=sys.stderr)
+        return 2
+    if args.profile:
+        import profiling
+        profiling.enable(args.profile)
+
+    status = 0
+    for filename in args.files:
+        if not os.path.exists(filename):
+            print(f"{filename}: file not found", file=sys.stderr)
+            status = 1
+            continue
+        out = args.out
+        if len(args.files) > 1:
+            out = os.path.join(out, os.path.splitext(os.path.basename(filename))[0])
+        try:
+            if any(chosen.values()):
+                if chosen["summary"] or chosen["sections"] or chosen["at_risk"]:
+                    os.makedirs(out, exist_ok=True)
+                counts = {}
+                if not reports.run_reports(filename, out_folder=out, threshold=args.threshold,
+                                           batch_size=args.batch_size, counts=counts, **chosen):
+                    status = 1
+                if counts:
+                    # Same totals with or without --batch-size
+                    print(f"\nValid rows: {counts['valid']}")
+                    print(f"Bad rows: {counts['bad']}")
+            for name in picked:
+                getattr(analytics, ANALYTICS[name])(filename)
+        except Exception as e:
+            print(f"{filename}: {type(e).__name__}: {e}", file=sys.stderr)
+            status = 1
+    return status
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        menu()  # The usual case: skip building the parser
+        return 0
+    args = build_parser().parse_args(argv)
+    if args.command == "report":
+        return run_report(args)
     menu()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
 
@@ -0,0 +1,278 @@
+import json
+import os
+import shutil
+import tempfile
+import numpy as np  # For memory-mapped arrays
+from columnar import Roster, TEXT_COLUMNS, SCORE_COLUMNS, roster_from_rows
+from ingest import iter_clean_batches, DEFAULT_FILE, DEFAULT_HEADER, DEFAULT_BATCH_SIZE
+from snapshot import load_validated, file_stats, content_hash, is_fresh
+import profiling  # Opt-in phase timings (no-op unless enabled)
+
+
+# ---------------- CONFIGURATION ----------------
+FILENAME = DEFAULT_FILE
+HEADER = DEFAULT_HEADER
+
+MMAP_SUFFIX = ".cols"              # studentRecord.csv -> studentRecord.csv.cols/
+MMAP_VERSION = 1                   # Bump when the on-disk layout changes
+MMAP_MIN_BYTES = 64 * 1024 * 1024  # CSVs this big use the mmap format automatically
+
+# Layout inside the folder:
+#   meta.json                 row count and the CSV fingerprint it was built from
+#   scores.npy                float64, shape (8, N): one contiguous row per score column
+#   <text>.heap               UTF-8 bytes of every value of a text column, back to back
+#   <text>.offsets.npy        int64, shape (N + 1,): value i is heap[offsets[i]:offsets[i+1]]
+
+
+
+
+# ---------------- STRING HEAP ----------------
+class StringHeap:
+    """Read-only text column backed by a mmapped byte heap and offset array."""
+
+    def __init__(self, heap, offsets):
+        self.heap = heap
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return bytes(self.heap[start:end]).decode("utf-8")
+
+    def to_array(self):
+        """Decode the whole column into a NumPy string array."""
+        n = len(self)
+        if n == 0:
+            return np.array([], dtype=str)
+        raw = bytes(self.heap[: int(self.offsets[-1])])
+        text = raw.decode("utf-8")
+        bounds = self.offsets.tolist()
+        if len(text) != len(raw):
+            # Non-ASCII data: byte offsets differ from character offsets
+            return np.array([raw[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(n)], dtype=str)
+        return np.array([text[bounds[i]:bounds[i + 1]] for i in range(n)], dtype=str)
+
+
+
+
+# ---------------- MAPPED ROSTER ----------------
+class MappedRoster(Roster):
+    """Roster whose columns are read straight from the mmap folder.
+
+    Score columns are zero-copy views of scores.npy, so only the pages of
+    the columns actually used are read. Text columns are decoded on first
+    access, one column at a time.
+    """
+
+    def __init__(self, folder, rows, bad_count):
+        self.folder = folder
+        self.n_rows = rows
+        self.bad_count = bad_count
+        self._by_column = _load_array(os.path.join(folder, "scores.npy"))
+        self._heaps = {}
+        self._decoded = {}
+
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def scores(self):
+        """(N, 8) view of the column-major score file."""
+        return self._by_column.T
+
+    def heap(self, name):
+        """StringHeap for one text column (nothing is decoded)."""
+        if name not in self._heaps:
+            base = os.path.join(self.folder, name)
+            heap = _load_heap(base + ".heap")
+            self._heaps[name] = StringHeap(heap, _load_array(base + ".offsets.npy"))
+        return self._heaps[name]
+
+    def _text(self, name):
+        if name not in self._decoded:
+            self._decoded[name] = self.heap(name).to_array()
+        return self._decoded[name]
+
+    ids = property(lambda self: self._text("student_id"))
+    last_names = property(lambda self: self._text("last_name"))
+    first_names = property(lambda self: self._text("first_name"))
+    sections = property(lambda self: self._text("section"))
+
+    def column(self, name):
+        """Return one column; score columns are contiguous mmap slices."""
+        if name in SCORE_COLUMNS:
+            return self._by_column[SCORE_COLUMNS.index(name)]
+        return self._text(name)
+
+
+def _load_array(path):
+    """np.load with mmap, falling back to a normal read for empty arrays."""
+    try:
+        return np.load(path, mmap_mode="r", allow_pickle=False)
+    except ValueError:
+        return np.load(path, allow_pickle=False)  # mmap cannot map zero bytes
+
+
+def _load_heap(path):
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+
+
+# ---------------- BUILD / OPEN ----------------
+def mmap_dir(filename):
+    """Folder of the memory-mapped copy that sits next to the CSV."""
+    return filename + MMAP_SUFFIX
+
+
+def build_mmap(filename=FILENAME, header=HEADER, batch_size=DEFAULT_BATCH_SIZE):
+    """Stream the CSV through validation into a new mmap folder.
+
+    Memory use stays at one batch: every score column and text heap is
+    appended to its own temp file, then the score columns are copied into
+    one column-major scores.npy. The finished folder replaces the old one
+    with a rename.
+    """
+    stats, digest = file_stats(filename), content_hash(filename)
+    final = mmap_dir(filename)
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=os.path.dirname(os.path.abspath(final)))
+    try:
+        counts = {}
+        n = _write_columns(tmp, filename, header, batch_size, counts)
+
+        # Column-major score matrix from the per-column files
+        scores = np.lib.format.open_memmap(os.path.join(tmp, "scores.npy"), mode="w+",
+                                           dtype=np.float64, shape=(len(SCORE_COLUMNS), n))
+        for c, name in enumerate(SCORE_COLUMNS):
+            part = os.path.join(tmp, name + ".f64")
+            if n:
+                scores[c] = np.fromfile(part, dtype=np.float64)
+            os.remove(part)
+        scores.flush()
+        del scores
+
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": MMAP_VERSION, "rows": n, "bad_count": counts["bad"],
+                       "stats": stats, "hash": digest}, f)
+
+        _swap_dir(tmp, final)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def _write_columns(folder, filename, header, batch_size, counts):
+    """Append each validated batch to per-column files. Returns the row count."""
+    score_files = [open(os.path.join(folder, name + ".f64"), "wb") for name in SCORE_COLUMNS]
+    heap_files = [open(os.path.join(folder, name + ".heap"), "wb") for name in TEXT_COLUMNS]
+    offset_parts = [open(os.path.join(folder, name + ".offsets.i64"), "wb") for name in TEXT_COLUMNS]
+    ends = [0] * len(TEXT_COLUMNS)
+    n = 0
+    try:
+        for batch in iter_clean_batches(filename, header, batch_size, counts=counts):
+            roster = roster_from_rows(batch)
+            for c, f in enumerate(score_files):
+                f.write(np.ascontiguousarray(roster.scores[:, c]).tobytes())
+            for t, name in enumerate(TEXT_COLUMNS):
+                encoded = [s.encode("utf-8") for s in roster.column(name).tolist()]
+                offsets = ends[t] + np.cumsum([len(b) for b in encoded], dtype=np.int64)
+                heap_files[t].write(b"".join(encoded))
+                offset_parts[t].write(offsets.tobytes())
+                ends[t] = int(offsets[-1])
+            n += len(batch)
+    finally:
+        for f in score_files + heap_files + offset_parts:
+            f.close()
+
+    # Offsets start with 0, so each column gets N + 1 of them
+    for name in TEXT_COLUMNS:
+        part = os.path.join(folder, name + ".offsets.i64")
+        offsets = np.concatenate([[0], np.fromfile(part, dtype=np.int64)]).astype(np.int64)
+        np.save(os.path.join(folder, name + ".offsets.npy"), offsets)
+        os.remove(part)
+
+    counts.setdefault("bad", 0)
+    return n
+
+
+def _swap_dir(new, final):
+    """Move a finished folder into place, removing the previous one."""
+    if not os.path.exists(final):
+        os.replace(new, final)
+        return
+    old = tempfile.mkdtemp(prefix=".old-", dir=os.path.dirname(os.path.abspath(final)))
+    os.rmdir(old)
+    os.replace(final, old)
+    os.replace(new, final)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def open_mmap(filename=FILENAME, header=HEADER, rebuild=True):
+    """Open the mmap copy of filename, (re)building it first when stale.
+
+    Returns None if the CSV is missing, or if the copy is stale and
+    rebuild is False.
+    """
+    if not os.path.exists(filename):
+        return None
+    with profiling.phase("mmap.open") as p:
+        roster, rebuilt = _open_mmap(filename, header, rebuild)
+        if p and roster is not None:
+            # The mapped files count in full, though only the pages used are ever read
+            folder = mmap_dir(filename)
+            size = profiling.file_bytes(*[os.path.join(folder, name) for name in os.listdir(folder)])
+            p.add(rows=len(roster), bytes_read=size)
+            if rebuilt:
+                p.add(bytes_read=profiling.file_bytes(filename), bytes_written=size)
+    return roster
+
+
+def _open_mmap(filename, header, rebuild):
+    """(MappedRoster or None, whether the copy was rebuilt) for open_mmap."""
+    meta_path = os.path.join(mmap_dir(filename), "meta.json")
+    meta = None
+    if os.path.exists(meta_path):
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+
+    fresh = (meta is not None and meta.get("version") == MMAP_VERSION
+             and is_fresh(filename, meta["stats"], meta["hash"]))
+    if not fresh:
+        if not rebuild:
+            return None, False
+        build_mmap(filename, header)
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+
+    return MappedRoster(mmap_dir(filename), meta["rows"], meta["bad_count"]), not fresh
+
+
+def use_mmap(filename=FILENAME):
+    """The mmap format is used for big CSVs, or whenever a copy already exists."""
+    if not os.path.exists(filename):
+        return False
+    return os.path.isdir(mmap_dir(filename)) or os.path.getsize(filename) >= MMAP_MIN_BYTES
+
+
+
+
+# ---------------- COLUMN LOADER ----------------
+def load_columns(filename=FILENAME, header=HEADER):
+    """Return (roster, bad_count) from the best available columnar copy.
+
+    Big files (or files that already have an mmap folder) are served from
+    the memory-mapped format, everything else from the .npz snapshot.
+    Returns None if the file does not exist.
+    """
+    if use_mmap(filename):
+        roster = open_mmap(filename, header)
+        if roster is not None:
+            return roster, roster.bad_count
+    return load_validated(filename, header)
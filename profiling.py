@@ -0,0 +1,241 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+
+# ---------------- CONFIGURATION ----------------
+ENV_VAR = "STUDENT_PROFILE"      # File for the JSON lines, or "-" for stderr
+ALLOC_ENV_VAR = "STUDENT_PROFILE_ALLOCATIONS"   # "0": skip tracemalloc (it slows Python-heavy phases a lot)
+STDERR_TARGETS = ("-", "1", "stderr")
+
+# One JSON object per line, written when a phase ends (inner phases first):
+#   phase             dotted name, e.g. "ingest.validate"
+#   parent            enclosing phase in the same thread (null at the top)
+#   start, wall_s     epoch seconds at the start, and the wall time spent
+#   rows              rows handled; bytes_read / bytes_written on disk
+#   alloc_net_bytes   memory still allocated at the end minus at the start
+#   alloc_peak_bytes  highest allocation during the phase above its start
+#   error             exception type that ended the phase, or null
+#   pid, thread       where it ran
+# plus any extra counts a phase adds (e.g. valid, bad). Every record has
+# all of these keys, record() ones included (with 0 allocations). Like
+# wall_s, bytes_read / bytes_written include those of nested phases.
+# Allocations come from tracemalloc, which counts the whole process, so
+# they include other threads running at the same time.
+BYTE_COUNTS = ("bytes_read", "bytes_written")
+
+_lock = threading.Lock()
+_local = threading.local()
+_out = None
+_trace = False
+
+
+
+
+# ---------------- ON / OFF ----------------
+def enable(target="-", allocations=None):
+    """Start writing phase records to target (a path, appended to, or "-" for stderr).
+
+    allocations=None follows STUDENT_PROFILE_ALLOCATIONS (on unless "0").
+    Without tracemalloc the alloc_* fields are 0.
+    """
+    global _out, _trace
+    disable()
+    if allocations is None:
+        allocations = os.environ.get(ALLOC_ENV_VAR, "1") != "0"
+    out = sys.stderr if target in STDERR_TARGETS else open(target, "a", encoding="utf-8")
+    _trace = allocations and not tracemalloc.is_tracing()
+    if _trace:
+        tracemalloc.start()
+    _out = out
+
+
+def disable():
+    """Stop recording (and stop tracemalloc if enable() started it)."""
+    global _out, _trace
+    out, _out = _out, None
+    if out is not None and out is not sys.stderr:
+        out.close()
+    if _trace:
+        tracemalloc.stop()
+        _trace = False
+
+
+def enabled():
+    return _out is not None
+
+
+
+
+# ---------------- PHASES ----------------
+class _NoPhase:
+    """What phase() returns while profiling is off: does nothing, costs next to nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __bool__(self):
+        return False
+
+    def add(self, **counts):
+        pass
+
+    def top_up(self, **counts):
+        pass
+
+
+_NO_PHASE = _NoPhase()
+
+
+class _Phase:
+    __slots__ = ("name", "counts", "parent", "start", "clock", "mem", "peak")
+
+    def __init__(self, name, counts):
+        self.name = name
+        self.counts = {"rows": 0, "bytes_read": 0, "bytes_written": 0}
+        self.counts.update(counts)
+
+    def __bool__(self):
+        return True
+
+    def add(self, **counts):
+        """Add to this phase's counts (rows=, bytes_read=, bytes_written= or any other)."""
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+
+    def top_up(self, **counts):
+        """Raise counts to at least the given totals, e.g. the size of files
+        written partly inside nested phases that already counted their bytes."""
+        for key, value in counts.items():
+            self.counts[key] = max(self.counts.get(key, 0), value)
+
+    def __enter__(self):
+        stack = _stack()
+        self.parent = stack[-1].name if stack else None
+        self.mem = self.peak = 0
+        if tracemalloc.is_tracing():
+            _settle_peaks(stack)
+            self.mem = self.peak = tracemalloc.get_traced_memory()[0]
+        stack.append(self)
+        self.start = time.time()
+        self.clock = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.clock
+        stack = _stack()
+        net = peak = 0
+        if tracemalloc.is_tracing():
+            _settle_peaks(stack)
+            net = tracemalloc.get_traced_memory()[0] - self.mem
+            peak = self.peak - self.mem
+        if stack and stack[-1] is self:
+            stack.pop()
+            if stack:
+                stack[-1].add(**{key: self.counts[key] for key in BYTE_COUNTS})
+        _emit(_fields(self.name, self.parent, self.start, wall, self.counts,
+                      net, max(peak, 0), exc[0].__name__ if exc[0] else None))
+        return False
+
+
+def _fields(name, parent, start, wall, counts, net=0, peak=0, error=None):
+    """One record, always with the same keys in the same order."""
+    fields = {"phase": name, "parent": parent, "start": round(start, 6), "wall_s": round(wall, 6),
+              "rows": 0, "bytes_read": 0, "bytes_written": 0}
+    fields.update(counts)
+    fields.update(alloc_net_bytes=net, alloc_peak_bytes=peak, error=error)
+    return fields
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _settle_peaks(stack):
+    """Credit the peak since the last phase boundary to every open phase, then restart it."""
+    peak = tracemalloc.get_traced_memory()[1]
+    for open_phase in stack:
+        open_phase.peak = max(open_phase.peak, peak)
+    tracemalloc.reset_peak()
+
+
+def _emit(fields):
+    fields["pid"] = os.getpid()
+    fields["thread"] = threading.current_thread().name
+    line = json.dumps(fields, default=str)
+    with _lock:
+        out = _out
+        if out is not None:
+            out.write(line + "\n")
+            out.flush()
+
+
+def phase(name, **counts):
+    """Context manager timing one phase, e.g.
+
+        with profiling.phase("ingest.validate", rows=len(rows)) as p:
+            ...
+            p.add(valid=len(valid_rows))
+
+    Returns a shared no-op object when profiling is off.
+    """
+    if _out is None:
+        return _NO_PHASE
+    return _Phase(name, counts)
+
+
+def record(name, wall_s, **counts):
+    """Emit a record for time measured elsewhere (e.g. summed over many calls).
+
+    Allocations are not tracked for it (0), and its bytes are added to the
+    enclosing phase like a nested phase's.
+    """
+    if _out is None:
+        return
+    stack = _stack()
+    if stack:
+        stack[-1].add(**{key: counts[key] for key in BYTE_COUNTS if key in counts})
+    _emit(_fields(name, stack[-1].name if stack else None, time.time() - wall_s, wall_s, counts))
+
+
+def profiled(name):
+    """Decorator: run the whole function as one phase when profiling is on."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _out is None:
+                return func(*args, **kwargs)
+            with _Phase(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def file_bytes(*paths):
+    """Total size of the given files (missing ones count as 0)."""
+    total = 0
+    for path in paths:
+        try:
+            total += os.path.getsize(path)
+        except OSError:
+            pass
+    return total
+
+
+
+
+# Opt in from the environment, e.g.  STUDENT_PROFILE=profile.jsonl python main.py
+if os.environ.get(ENV_VAR):
+    enable(os.environ[ENV_VAR])
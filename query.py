@@ -0,0 +1,272 @@
+import re
+import numpy as np  # Predicates are evaluated as boolean masks
+from columnar import TEXT_COLUMNS, SCORE_COLUMNS
+from mmap_store import load_columns
+from ingest import DEFAULT_FILE, DEFAULT_HEADER
+from reports import POLICY  # Weights behind the computed final grade
+import sorted_index  # Range lookups on indexed columns
+
+
+# ---------------- CONFIGURATION ----------------
+FILENAME = DEFAULT_FILE
+HEADER = DEFAULT_HEADER
+
+GRADE = "final_grade"   # Computed column: the weighted final grade shown in reports
+COLUMNS = tuple(HEADER) + (GRADE,)
+MISSING_WORDS = ("none", "missing")
+
+# Filter syntax, e.g.  section == "AS" and final < 75 and attendance_percent >= 80
+#   comparison  <column> <op> <value>   op: == != < <= > >=
+#   value       number, "quoted text" or 'quoted text', bare word, or none
+#   combine     and / or / not and parentheses ("and" binds tighter than "or")
+# Text is compared with surrounding blanks stripped. A missing score or
+# grade never passes a comparison; test for it with  final == none.
+_TOKEN = re.compile(r"""\s*(?:
+    (?P<string>"[^"]*"|'[^']*')
+  | (?P<op>==|!=|<=|>=|<|>|=)
+  | (?P<paren>[()])
+  | (?P<word>[^\s()<>=!"']+)
+)""", re.VERBOSE)
+
+_COMPARE = {
+    "==": np.equal, "=": np.equal, "!=": np.not_equal,
+    "<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+}
+
+
+
+
+# ---------------- PARSING ----------------
+def _tokens(text):
+    pos, out = 0, []
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"Cannot read filter at: {text[pos:]!r}")
+        kind = m.lastgroup
+        out.append((kind, m.group(kind)))
+        pos = m.end()
+    return out
+
+
+class _Parser:
+    """Recursive-descent parser from filter text to a nested tuple tree."""
+
+    def __init__(self, text):
+        self.tokens = _tokens(text)
+        self.pos = 0
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _next(self):
+        token = self._peek()
+        if token[0] is None:
+            raise ValueError("Filter ends too early")
+        self.pos += 1
+        return token
+
+    def _keyword(self, word):
+        kind, value = self._peek()
+        if kind == "word" and value.lower() == word:
+            self.pos += 1
+            return True
+        return False
+
+    def parse(self):
+        tree = self._or()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected {self._peek()[1]!r} in filter")
+        return tree
+
+    def _or(self):
+        tree = self._and()
+        while self._keyword("or"):
+            tree = ("or", tree, self._and())
+        return tree
+
+    def _and(self):
+        tree = self._not()
+        while self._keyword("and"):
+            tree = ("and", tree, self._not())
+        return tree
+
+    def _not(self):
+        if self._keyword("not"):
+            return ("not", self._not())
+        if self._peek() == ("paren", "("):
+            self.pos += 1
+            tree = self._or()
+            if self._next() != ("paren", ")"):
+                raise ValueError("Missing ')' in filter")
+            return tree
+        return self._comparison()
+
+    def _comparison(self):
+        kind, column = self._next()
+        if kind != "word" or column not in COLUMNS:
+            raise ValueError(f"Unknown column in filter: {column}")
+        kind, op = self._next()
+        if kind != "op":
+            raise ValueError(f"Expected a comparison after {column}, got {op!r}")
+        kind, value = self._next()
+        if kind == "string" and column in TEXT_COLUMNS:
+            value = value[1:-1]
+        elif kind != "word":
+            raise ValueError(f"Expected a value after {column} {op}")
+        elif column in TEXT_COLUMNS:
+            pass  # Bare word compared as text (blank names are stored as "none")
+        elif value.lower() in MISSING_WORDS:
+            if op not in ("==", "=", "!="):
+                raise ValueError("Only == and != can be used with none")
+            return ("missing", column, op == "!=")
+        else:
+            try:
+                value = float(value)
+            except ValueError:
+                raise ValueError(f"{column} needs a number, got {value!r}") from None
+        return ("compare", column, op, value)
+
+
+
+
+# ---------------- COMPILING ----------------
+class Predicate:
+    """A parsed filter that evaluates to a boolean mask over a Roster.
+
+    Each comparison is one vectorized NumPy operation on a whole column,
+    so no Python code runs per row. Columns are fetched (and the final
+    grade computed) once per evaluation, however often they appear.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.tree = _Parser(text).parse() if text and text.strip() else None
+        self.columns = sorted(self._columns(self.tree)) if self.tree else []
+
+    def _columns(self, tree):
+        if tree[0] in ("and", "or"):
+            return self._columns(tree[1]) | self._columns(tree[2])
+        if tree[0] == "not":
+            return self._columns(tree[1])
+        return {tree[1]}
+
+    def mask(self, roster):
+        """Boolean array, True for the rows that pass the filter."""
+        if self.tree is None:
+            return np.ones(len(roster), dtype=bool)
+        values = {name: column_values(roster, name) for name in self.columns}
+        return self._eval(self.tree, values)
+
+    def _eval(self, tree, values):
+        kind = tree[0]
+        if kind == "and":
+            return self._eval(tree[1], values) & self._eval(tree[2], values)
+        if kind == "or":
+            return self._eval(tree[1], values) | self._eval(tree[2], values)
+        if kind == "not":
+            return ~self._eval(tree[1], values)
+        if kind == "missing":
+            _, column, negate = tree
+            missing = np.isnan(values[column])
+            return ~missing if negate else missing
+
+        _, column, op, value = tree
+        data = values[column]
+        if column in TEXT_COLUMNS:
+            return _COMPARE[op](data, value.strip())
+        with np.errstate(invalid="ignore"):
+            return _COMPARE[op](data, value) & ~np.isnan(data)
+
+
+def column_values(roster, name):
+    """Array for one queryable column: stripped text, float scores or the final grade."""
+    if name == GRADE:
+        return POLICY.grades(roster.scores)
+    if name in SCORE_COLUMNS:
+        return np.asarray(roster.column(name), dtype=float)
+    return np.char.strip(np.asarray(roster.column(name), dtype=str))
+
+
+
+
+# ---------------- RUNNING QUERIES ----------------
+def run_query(roster, where=None, columns=None, limit=None):
+    """Filter, project and limit a Roster.
+
+    where    filter text or a Predicate (None = every row)
+    columns  column names to return (None = all HEADER columns)
+    limit    maximum number of rows (None = no limit)
+
+    Returns (column_names, rows) where rows are lists in file order with
+    None for missing scores. Raises ValueError for a bad filter or column.
+    """
+    predicate = where if isinstance(where, Predicate) else Predicate(where)
+    columns = list(columns) if columns else list(HEADER)
+    unknown = [c for c in columns if c not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown column: {', '.join(unknown)}")
+    if limit is not None and limit < 0:
+        raise ValueError("limit cannot be negative")
+
+    picked = np.flatnonzero(predicate.mask(roster))
+    if limit is not None:
+        picked = picked[:limit]
+
+    out = []
+    for name in columns:
+        values = column_values(roster, name) if name == GRADE else roster.column(name)
+        values = np.asarray(values)[picked].tolist()
+        if name in TEXT_COLUMNS:
+            out.append(values)
+        else:
+            out.append([None if v != v else v for v in values])
+    return columns, [list(row) for row in zip(*out)]
+
+
+# Index range for each comparison: (low, high, include_low, include_high) from the value
+_RANGES = {
+    "==": lambda v: (v, v, True, True), "=": lambda v: (v, v, True, True),
+    "<": lambda v: (None, v, True, False), "<=": lambda v: (None, v, True, True),
+    ">": lambda v: (v, None, False, True), ">=": lambda v: (v, None, True, True),
+}
+
+
+def _index_rows(filename, predicate, header):
+    """Row numbers (file order) that pass a filter made of one numeric
+    comparison, looked up in that column's sorted index; None when the
+    filter is anything else or the column is not worth an index."""
+    tree = predicate.tree
+    if tree is None or tree[0] != "compare" or tree[1] in TEXT_COLUMNS or tree[2] not in _RANGES:
+        return None
+    _, column, op, value = tree
+    if not sorted_index.use_index(filename, column):
+        return None
+    index = sorted_index.open_index(filename, column, header)
+    if index is None:
+        return None
+    return np.sort(index.range(*_RANGES[op](value)))
+
+
+def select(filename=FILENAME, where=None, columns=None, limit=None, header=HEADER):
+    """Query the validated records of a CSV file, e.g.
+
+        select(where='section == "AS" and final < 75', columns=["student_id", "final"], limit=10)
+
+    A filter that is a single comparison on a score column or final_grade
+    (e.g. "final_grade < 75") is answered from that column's sorted index
+    when it has one (or the file is big): O(log n + k), and only the
+    matching rows are read. Returns (column_names, rows); rows is empty if
+    the file does not exist.
+    """
+    predicate = where if isinstance(where, Predicate) else Predicate(where)
+    rows = _index_rows(filename, predicate, header)
+    if rows is not None:
+        roster = sorted_index.roster(filename, header)
+        if roster is not None:
+            return run_query(sorted_index.take(roster, rows), predicate, columns, limit)
+    loaded = load_columns(filename, header)
+    if loaded is None:
+        return list(columns) if columns else list(header), []
+    return run_query(loaded[0], predicate, columns, limit)
@@ -1,15 +1,31 @@
-from typing import List, Dict, Tuple, Optional
-from ingest import clean_ingest
+from typing import List, Dict, Tuple, Optional, Iterator, Iterable
+from ingest import clean_ingest, iter_clean_batches
+from mmap_store import load_columns
+from columnar import Roster, score_matrix, encode_sections
+from groupby import group_rows  # Row indices per section code
+from grading import GradingPolicy
+from changelog import keep_mode
+from stats import RunningStats
+from snapshot import file_stats  # Data version of a CSV + change log
+import profiling  # Opt-in phase timings (no-op unless enabled)
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import csv
+import json
 import os
-import statistics
+import re
+import tempfile
+import time
+import numpy as np
 
 # Default configuration (same names used previously)
 FILENAME = "studentRecord.csv"
 OUT_DIR = "reports"
 PASSING_GRADE = 75.0
+EXPORT_WORKERS = 4          # Pool size for per-section CSV export (1 = no pool)
 
-# Weights (kept same as your previous reports/at_risk code)
+# Weights (kept same as your previous reports/at_risk code). Not the same as
+# analytics.py's (0.2/0.3/0.4/0.1): the exported reports, at-risk list and
+# the store's grades keep their own weights on purpose, see analytics.py.
 WEIGHTS = {
     "quiz": 0.3,
     "midterm": 0.3,
@@ -23,116 +39,113 @@ HEADER = [
     "midterm","final","attendance_percent"
 ]
 
+# Columns of each section_<name>.csv
+SECTION_FIELDS = HEADER + ["final_numeric", "final_grade", "letter"]
 
-# Helpers
 
-def _to_float_safe(val: Optional[str]) -> Optional[float]:
-    """Convert string-like to float, return None on empty or invalid."""
-    if val is None:
-        return None
-    if isinstance(val, float) or isinstance(val, int):
-        return float(val)
-    s = str(val).strip()
-    if s == "" or s.lower() == "none":
-        return None
-    try:
-        return float(s)
-    except Exception:
-        return None
-
-def _compute_final_from_row_map(row: Dict[str, str]) -> Optional[float]:
-    """
-    Compute weighted final grade from a dict-like CSV row.
-    Missing components are treated as 0 for the calculation (consistent with prior code).
-    Returns final as float rounded to 2 decimals, or None if no numeric data present.
-    """
-    # Collect quizzes
-    quizzes = []
-    for i in range(1, 6):
-        q = _to_float_safe(row.get(f"quiz{i}", None))
-        if q is not None:
-            quizzes.append(q)
-    quiz_avg = (sum(quizzes) / len(quizzes)) if quizzes else 0.0
-
-    mid = _to_float_safe(row.get("midterm", None))
-    final = _to_float_safe(row.get("final", None))
-    att = _to_float_safe(row.get("attendance_percent", None))
-
-    # If all components missing and length 0 quizzes, return None
-    if quiz_avg == 0.0 and mid is None and final is None and att is None:
-        # no numeric info at all
-        return None
-
-    mid_val = mid if mid is not None else 0.0
-    final_val = final if final is not None else 0.0
-    att_val = att if att is not None else 0.0
-
-    weighted = (
-        quiz_avg * WEIGHTS["quiz"]
-        + mid_val * WEIGHTS["midterm"]
-        + final_val * WEIGHTS["final"]
-        + att_val * WEIGHTS["attendance"]
-    )
-
-    return round(float(weighted), 2)
-
-def _letter_grade(score: Optional[float]) -> str:
-    if score is None:
-        return "N/A"
-    s = float(score)
-    if s >= 90:
-        return "A"
-    if s >= 80:
-        return "B"
-    if s >= 70:
-        return "C"
-    if s >= 60:
-        return "D"
-    return "F"
+# Compiled once; grades whole score matrices in one call
+POLICY = GradingPolicy(WEIGHTS)
 
 # -------------------------
 # File-reading helper
 # -------------------------
-def _read_csv_as_dicts(filename: str) -> List[Dict[str, str]]:
-    """Read CSV into list of dict rows. If file missing, returns []"""
-    if not os.path.exists(filename):
+def _load_enriched(filename: str, counts: Optional[Dict[str, int]] = None) -> List[Dict[str, object]]:
+    """
+    Validated rows of 'filename', graded straight from the cached score matrix.
+    If a counts dict is passed, its "valid" and "bad" totals are filled in.
+    """
+    with profiling.phase("reports.read") as p:
+        loaded = load_columns(filename, HEADER)
+        if loaded is not None:
+            p.add(rows=len(loaded[0]))
+    if loaded is None:
         return []
-    with open(filename, "r", encoding="utf-8", newline="") as f:
-        reader = csv.DictReader(f)
-        return [dict(r) for r in reader]
+    roster = loaded[0]
+    if counts is not None:
+        counts["valid"], counts["bad"] = len(roster), loaded[1]
+    with profiling.phase("reports.grade", rows=len(roster)):
+        finals, letters = _finals_and_letters(roster.scores)
+    with profiling.phase("reports.enrich", rows=len(roster)):
+        return [_with_grade(dict(zip(HEADER, r)), f, l) for r, f, l in zip(roster.to_rows(), finals, letters)]
+
+def _iter_enriched_batches(filename: str, batch_size: int,
+                           counts: Optional[Dict[str, int]] = None) -> Iterator[List[Dict[str, object]]]:
+    """
+    Yield graded dict rows from 'filename' one validated batch at a time
+    (via ingest.iter_clean_batches), so the file is never loaded whole.
+    A counts dict, if passed, keeps the "valid" and "bad" totals so far.
+    """
+    for batch in iter_clean_batches(filename, HEADER, batch_size, counts=counts):
+        yield _enrich_batch([dict(zip(HEADER, row)) for row in batch])
+
+def _finals_and_letters(scores) -> Tuple[List[Optional[float]], List[str]]:
+    """Grade a score matrix with POLICY; missing grades come back as None."""
+    grades, letters = POLICY.apply(scores)
+    return [None if g != g else g for g in grades.tolist()], letters.tolist()
+
+def grade_rows(rows: List[List[object]]) -> Tuple[List[Optional[float]], List[str]]:
+    """Final grades and letters for list rows in HEADER order, in one batched call."""
+    if not rows:
+        return [], []
+    return _finals_and_letters(score_matrix(rows))
+
+def _with_grade(row: Dict[str, object], final: Optional[float], letter: str) -> Dict[str, object]:
+    """Copy of row with final_numeric, final_grade (formatted) and letter added."""
+    enriched = dict(row)  # copy
+    enriched["final_numeric"] = final
+    enriched["final_grade"] = f"{final:.2f}" if final is not None else ""
+    enriched["letter"] = letter
+    return enriched
+
+def _enrich_batch(rows: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    """Grade a list of dict rows at once: adds final_numeric, final_grade and letter."""
+    finals, letters = grade_rows([[r.get(h) for h in HEADER] for r in rows])
+    return [_with_grade(r, f, l) for r, f, l in zip(rows, finals, letters)]
+
+def _print_section(sec_name: str, items: List[Dict[str, object]]) -> None:
+    print(f"\n=== Section {sec_name} ===")
+    print("{:<12} {:<15} {:<15} {:>10} {:>8}".format(
+        "student_id", "last_name", "first_name", "final_grade", "letter"
+    ))
+    print("-" * 70)
+    for s in items:
+        print("{:<12} {:<15} {:<15} {:>10.2f} {:>8}".format(
+            s["student_id"], s["last_name"], s["first_name"],
+            s["final_numeric"], s["letter"]
+        ))
 
 # -------------------------
-# Core functions (public)
+# Report plan and sinks
 # -------------------------
-def summary_report(filename: str = FILENAME, export_sections: bool = True, out_folder: str = OUT_DIR) -> None:
+class ReportSink:
     """
-    Read 'filename', compute final grades, print a formatted summary to terminal.
-    Optionally export per-section CSVs into 'out_folder' if export_sections is True.
+    One output of a ReportPlan. Receives every enriched row exactly once, in
+    file order. Sinks should only print from finish() (the terminal table is
+    the one exception) so outputs never interleave.
     """
-    rows = _read_csv_as_dicts(filename)
-    if not rows:
-        print("File not found or no data:", filename)
-        return
+    def start(self) -> None:
+        pass
 
-    enriched = []
-    grades = []
-    for r in rows:
-        final = _compute_final_from_row_map(r)
-        enriched_row = dict(r)  # copy
-        enriched_row["final_grade"] = f"{final:.2f}" if final is not None else ""
-        enriched_row["final_numeric"] = final
-        enriched_row["letter"] = _letter_grade(final)
-        enriched.append(enriched_row)
-        if final is not None:
-            grades.append(final)
-
-    # Print header table
-    print("\n=== SUMMARY REPORT ===")
-    print("{:<12} {:<15} {:<15} {:<10} {:>10} {:>8}".format(
-        "student_id", "last_name", "first_name", "section", "final_grade", "letter"
-    ))
-    print("-" * 76)
-    for r in enriched:
+    def add(self, row: Dict[str, object]) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+    def outputs(self) -> List[str]:
+        """Files written by finish() (used to count bytes written when profiling)."""
+        return []
+
+class TerminalSummarySink(ReportSink):
+    """Formatted per-student table on the terminal."""
+    def start(self) -> None:
+        print("\n=== SUMMARY REPORT ===")
+        print("{:<12} {:<15} {:<15} {:<10} {:>10} {:>8}".format(
+            "student_id", "last_name", "first_name", "section", "final_grade", "letter"
+        ))
+        print("-" * 76)
+
+    def add(self, r: Dict[str, object]) -> None:
         print("{:<12} {:<15} {:<15} {:<10} {:>10} {:>8}".format(
             r.get("student_id", ""),
             r.get("last_name", ""),
@@ -142,152 +155,448 @@ def summary_report(filename: str = FILENAME, export_sections: bool = True, out_f
             r.get("letter", "")
         ))
 
-    # Summary stats
-    if grades:
-        try:
-            mean_v = statistics.mean(grades)
-            med_v = statistics.median(grades)
-        except statistics.StatisticsError:
-            mean_v = med_v = 0.0
+class StatsSink(ReportSink):
+    """
+    Count, mean, median, max and min of the valid final grades, accumulated
+    in fixed-size chunks so memory stays constant however many rows pass.
+    Given totals already kept elsewhere (a StudentStore's summary()), the
+    rows are not looked at and those totals are reported instead.
+    """
+    CHUNK = 4096
+
+    def __init__(self, totals: Optional[Dict[str, object]] = None) -> None:
+        self.acc = RunningStats()
+        self.totals = totals
+        self._pending: List[float] = []
+        self.stats: Dict[str, float] = {}
+
+    def add(self, r: Dict[str, object]) -> None:
+        if self.totals is None and r["final_numeric"] is not None:
+            self._pending.append(r["final_numeric"])
+            if len(self._pending) >= self.CHUNK:
+                self.acc.update(self._pending)
+                self._pending = []
+
+    def finish(self) -> None:
+        self.acc.update(self._pending)
+        self._pending = []
+        s = self.totals if self.totals is not None else self.acc.as_dict()
+        if not s["count"]:
+            print("\nNo valid numeric grade data available for statistics.")
+            return
+        self.stats = {k: s[k] for k in ("count", "mean", "median", "max", "min")}
         print("\n--- SUMMARY STATISTICS ---")
-        print(f"Total Students (with valid grade): {len(grades)}")
-        print(f"Average Grade: {mean_v:.2f}")
-        print(f"Median Grade: {med_v:.2f}")
-        print(f"Highest Grade: {max(grades):.2f}")
-        print(f"Lowest Grade: {min(grades):.2f}")
-    else:
-        print("\nNo valid numeric grade data available for statistics.")
-
-    # Export per-section CSVs if requested
-    if export_sections:
-        export_per_section(enriched, out_folder=out_folder)
-
-    # Optionally save an overall summary CSV for instructor convenience
-    os.makedirs(out_folder, exist_ok=True)
-    summary_csv = os.path.join(out_folder, "summary.csv")
-    try:
-        with open(summary_csv, "w", newline="", encoding="utf-8") as f:
-            fieldnames = ["student_id","last_name","first_name","section","final_grade","letter"]
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            for r in enriched:
-                writer.writerow({
-                    "student_id": r.get("student_id",""),
-                    "last_name": r.get("last_name",""),
-                    "first_name": r.get("first_name",""),
-                    "section": r.get("section",""),
-                    "final_grade": r.get("final_grade",""),
-                    "letter": r.get("letter","")
-                })
-        print(f"\nSaved overall summary to: {summary_csv}")
-    except Exception as e:
-        print("Could not save summary CSV:", e)
-
-def export_per_section(rows_or_filename, out_folder: str = OUT_DIR, only_section: str = None, show_only: bool = False) -> None:
-    """Export CSVs per section. Only prints if show_only=True."""
-    if isinstance(rows_or_filename, str):
-        rows = _read_csv_as_dicts(rows_or_filename)
-        if not rows:
-            print("No data found.")
+        print(f"Total Students (with valid grade): {s['count']}")
+        print(f"Average Grade: {s['mean']:.2f}")
+        print(f"Median Grade: {s['median']:.2f}")
+        print(f"Highest Grade: {s['max']:.2f}")
+        print(f"Lowest Grade: {s['min']:.2f}")
+
+class SummaryCsvSink(ReportSink):
+    """Overall summary.csv (one line per student, written as rows arrive)."""
+    FIELDNAMES = ["student_id","last_name","first_name","section","final_grade","letter"]
+
+    def __init__(self, out_folder: str = OUT_DIR) -> None:
+        self.path = os.path.join(out_folder, "summary.csv")
+        self.file = None
+        self.writer = None
+        self.error: Optional[Exception] = None
+
+    def start(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.file = open(self.path, "w", newline="", encoding="utf-8")
+            self.writer = csv.DictWriter(self.file, fieldnames=self.FIELDNAMES)
+            self.writer.writeheader()
+        except Exception as e:
+            self.error = e
+
+    def add(self, r: Dict[str, object]) -> None:
+        if self.writer is None:
+            return
+        try:
+            self.writer.writerow({k: r.get(k, "") for k in self.FIELDNAMES})
+        except Exception as e:
+            self.error = e
+            self.writer = None
+
+    def finish(self) -> None:
+        if self.file is not None:
+            self.file.close()
+        if self.error is not None:
+            print("Could not save summary CSV:", self.error)
+        else:
+            print(f"\nSaved overall summary to: {self.path}")
+
+    def outputs(self) -> List[str]:
+        return [self.path] if self.file is not None else []
+
+class SectionSink(ReportSink):
+    """Groups rows by section and hands them to the per-section export.
+
+    Sections are dictionary-encoded once in finish() and the rows split by
+    code, so no per-row string keys are hashed; groups come out in the
+    order each section first appears, rows in file order.
+    """
+    def __init__(self, out_folder: str = OUT_DIR, only_section: Optional[str] = None, show_only: bool = False,
+                 workers: int = EXPORT_WORKERS, use_processes: bool = False, verbose: bool = True) -> None:
+        self.out_folder = out_folder
+        self.only_section = only_section
+        self.show_only = show_only
+        self.workers = workers
+        self.use_processes = use_processes
+        self.verbose = verbose
+        self.sections: Dict[str, List[Dict[str, object]]] = {}
+        self.written: List[str] = []
+        self._rows: List[Dict[str, object]] = []
+        self._section_of: List[str] = []
+
+    def add(self, r: Dict[str, object]) -> None:
+        self._rows.append(r)
+        self._section_of.append(r.get("section") or "")
+
+    def finish(self) -> None:
+        codes, names = encode_sections(self._section_of)
+        rows = self._rows
+        self.sections = {name: [rows[i] for i in group.tolist()]
+                         for name, group in zip(names.tolist(), group_rows(codes, len(names)))}
+        self._rows, self._section_of = [], []
+        self.written = _export_sections(self.sections, self.out_folder, self.only_section, self.show_only,
+                                        self.workers, self.use_processes, self.verbose)
+
+    def outputs(self) -> List[str]:
+        return self.written
+
+class SectionDisplaySink(ReportSink):
+    """Terminal table for one section only."""
+    def __init__(self, section_name: str) -> None:
+        self.section_name = section_name
+        self.items: List[Dict[str, object]] = []
+
+    def add(self, r: Dict[str, object]) -> None:
+        if (r.get("section") or "").strip() == self.section_name:
+            self.items.append(r)
+
+    def finish(self) -> None:
+        if self.items:
+            _print_section(self.section_name, self.items)
+        else:
+            print(f"No students found in section {self.section_name}")
+
+class AtRiskSink(ReportSink):
+    """Students below threshold: written to a CSV and printed as a table."""
+    FIELDNAMES = ["student_id","last_name","first_name","section","final_grade"]
+
+    def __init__(self, output_file: str = os.path.join(OUT_DIR, "at_risk_students.csv"), threshold: float = PASSING_GRADE) -> None:
+        self.output_file = output_file
+        self.threshold = threshold
+        self.at_risk: List[Dict[str, str]] = []
+        self.saved = False
+
+    def add(self, r: Dict[str, object]) -> None:
+        final = r["final_numeric"]
+        if final is not None and final < self.threshold:
+            self.at_risk.append({k: r.get(k, "") for k in self.FIELDNAMES})
+
+    def finish(self) -> None:
+        at_risk = self.at_risk
+        if not at_risk:
+            print(" No students are currently at risk.")
             return
-    else:
-        rows = rows_or_filename
 
-    if not rows:
-        print("No data to process.")
-        return
+        # Ensure output dir exists
+        os.makedirs(os.path.dirname(self.output_file) or ".", exist_ok=True)
 
-    # Calculate grades for all rows
-    enriched = []
-    for r in rows:
-        final = _compute_final_from_row_map(r)
-        enriched.append({
-            **r,
-            "final_grade": final,
-            "letter_grade": _letter_grade(final)
-        })
-
-    # Group by section
-    sections = {}
-    for row in enriched:
-        sec = row.get("section", "").strip()
-        if sec:
-            if sec not in sections:
-                sections[sec] = []
-            sections[sec].append(row)
+        # Write CSV
+        try:
+            with open(self.output_file, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=self.FIELDNAMES)
+                writer.writeheader()
+                writer.writerows(at_risk)
+            self.saved = True
+            print(f"\nSaved at-risk list to: {self.output_file}")
+        except Exception as e:
+            print("Failed to write at-risk CSV:", e)
+            return
+
+        # Print formatted table
+        print("\n AT-RISK STUDENTS")
+        print("{:<12} {:<15} {:<15} {:<10} {:>10}".format("student_id","last_name","first_name","section","final_grade"))
+        print("-" * 70)
+        for s in at_risk:
+            print("{:<12} {:<15} {:<15} {:<10} {:>10}".format(
+                s["student_id"], s["last_name"], s["first_name"], s["section"], s["final_grade"]
+            ))
+        print(f"\n{len(at_risk)} student(s) found below {self.threshold}.")
+
+    def outputs(self) -> List[str]:
+        return [self.output_file] if self.saved else []
+
+class ReportPlan:
+    """
+    Reads and grades 'filename' once and fans every enriched row out to all
+    added sinks in the same pass, e.g.:
+
+        ReportPlan().add(StatsSink()).add(AtRiskSink(threshold=70)).run()
 
+    With batch_size set, rows are streamed in validated batches. With a
+    StudentStore, its rows and already-materialized grades are used and
+    nothing is read or regraded.
+
+    After a run from the file, counts holds the "valid" and "bad" row
+    totals, the same whether the file was streamed or loaded whole.
+    """
+    def __init__(self, filename: str = FILENAME, batch_size: Optional[int] = None, store=None) -> None:
+        self.filename = filename
+        self.batch_size = batch_size
+        self.store = store
+        self.sinks: List[ReportSink] = []
+        self.counts: Dict[str, int] = {}
+
+    def add(self, sink: ReportSink) -> "ReportPlan":
+        self.sinks.append(sink)
+        return self
+
+    def run(self) -> bool:
+        """Run the pass. Returns False (and touches no sink) if there is no data."""
+        if self.store is not None:
+            if not self.store:
+                return False
+            enriched_rows: Iterable[Dict[str, object]] = (
+                _with_grade(dict(zip(HEADER, row)), final, letter)
+                for row, final, letter in self.store.graded_rows()
+            )
+        elif self.batch_size:
+            if not os.path.exists(self.filename):
+                return False
+            enriched_rows = (r for batch in _iter_enriched_batches(self.filename, self.batch_size, self.counts)
+                             for r in batch)
+        else:
+            enriched_rows = _load_enriched(self.filename, self.counts)
+            if not enriched_rows:
+                return False
+
+        if profiling.enabled():
+            self._fan_out_profiled(enriched_rows)
+            return True
+        for sink in self.sinks:
+            sink.start()
+        for enriched in enriched_rows:
+            for sink in self.sinks:
+                sink.add(enriched)
+        for sink in self.sinks:
+            sink.finish()
+        return True
+
+    def _fan_out_profiled(self, enriched_rows: Iterable[Dict[str, object]]) -> None:
+        """The same pass as run(), timing each sink: one record for its add() calls, one phase for finish()."""
+        clock = time.perf_counter
+        spent = [0.0] * len(self.sinks)
+        for sink in self.sinks:
+            sink.start()
+        count = 0
+        for enriched in enriched_rows:
+            count += 1
+            for i, sink in enumerate(self.sinks):
+                started = clock()
+                sink.add(enriched)
+                spent[i] += clock() - started
+        for sink, seconds in zip(self.sinks, spent):
+            name = "reports." + type(sink).__name__
+            profiling.record(name + ".add", seconds, rows=count)
+            with profiling.phase(name + ".finish", rows=count) as p:
+                sink.finish()
+                # Nested phases (e.g. reports.write) may have counted part of these already
+                p.top_up(bytes_written=profiling.file_bytes(*sink.outputs()))
+
+# -------------------------
+# Core functions (public)
+# -------------------------
+@profiling.profiled("reports.run_reports")
+def run_reports(filename: str = FILENAME, summary: bool = True, stats: bool = True, sections: bool = True,
+                at_risk: bool = True, out_folder: str = OUT_DIR, threshold: float = PASSING_GRADE,
+                batch_size: Optional[int] = None, store=None, counts: Optional[Dict[str, int]] = None) -> bool:
+    """
+    Run any combination of reports over a single read-and-grade pass
+    (or over a StudentStore's materialized grades and running totals,
+    if one is given).
+    If a counts dict is passed, the file's "valid" and "bad" row totals
+    are copied into it (streamed or not; left empty for a store).
+    """
+    plan = ReportPlan(filename, batch_size, store)
+    if summary:
+        plan.add(TerminalSummarySink())
+    if stats:
+        # A store keeps running totals of its grades, so they are not recomputed
+        plan.add(StatsSink(store.summary() if store is not None else None))
+    if sections:
+        plan.add(SectionSink(out_folder=out_folder))
+    if summary:
+        plan.add(SummaryCsvSink(out_folder))
+    if at_risk:
+        plan.add(AtRiskSink(os.path.join(out_folder, "at_risk_students.csv"), threshold))
+    ran = plan.run()
+    if counts is not None:
+        counts.update(plan.counts)
+    if not ran:
+        print("File not found or no data:", filename)
+        return False
+    return True
+
+def summary_report(filename: str = FILENAME, export_sections: bool = True, out_folder: str = OUT_DIR, store=None) -> None:
+    """
+    Read 'filename', compute final grades, print a formatted summary to terminal.
+    Optionally export per-section CSVs into 'out_folder' if export_sections is True.
+    Pass the menu's StudentStore to reuse its grades instead of rereading the file.
+    """
+    run_reports(filename, summary=True, stats=True, sections=export_sections,
+                at_risk=False, out_folder=out_folder, store=store)
+
+def _section_filename(sec_name: str) -> str:
+    """section_<name>.csv with anything unsafe in a file name replaced by '_'."""
+    return "section_" + re.sub(r"[^A-Za-z0-9_-]", "_", sec_name) + ".csv"
+
+def _write_section_file(path: str, rows: List[List[object]]) -> str:
+    """
+    Write one section CSV (runs in a pool worker). The file is written to a
+    temp name in the same folder and renamed, so readers never see half a file.
+    """
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=".csv", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(SECTION_FIELDS)
+            writer.writerows(rows)
+        keep_mode(tmp, path)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path
+
+def _export_sections(sections: Dict[str, List[Dict[str, object]]], out_folder: str = OUT_DIR,
+                     only_section: Optional[str] = None, show_only: bool = False,
+                     workers: int = EXPORT_WORKERS, use_processes: bool = False,
+                     verbose: bool = True) -> List[str]:
+    """
+    Export grouped, already-graded rows to one section_<name>.csv per section.
+    With show_only=True the requested section is printed and nothing is written.
+    Files are written by a pool of 'workers' threads (or processes); each file
+    is built by one task from rows in file order, so the output is identical
+    whatever the worker count. Returns the paths written.
+    """
     # Process only requested section if specified
     only_clean = only_section.strip() if only_section else None
 
-    for sec_name, items in sections.items():
-        if only_clean and sec_name != only_clean:
-            continue
-            
-        if show_only and sec_name == only_clean:
-            print(f"\n=== Section {sec_name} ===")
-            print("{:<12} {:<15} {:<15} {:>10} {:>8}".format(
-                "student_id", "last_name", "first_name", "final_grade", "letter"
-            ))
-            print("-" * 70)
-            for s in items:
-                print("{:<12} {:<15} {:<15} {:>10.2f} {:>8}".format(
-                    s["student_id"], s["last_name"], s["first_name"],
-                    s["final_grade"], s["letter_grade"]
-                ))
-            return  # Stop after showing the requested section
-
-def export_at_risk(filename: str = FILENAME, output_file: str = os.path.join(OUT_DIR, "at_risk_students.csv"), threshold: float = PASSING_GRADE) -> None:
+    if show_only:
+        if only_clean in sections:
+            _print_section(only_clean, sections[only_clean])
+        return []
+
+    # One task per section; names that sanitize to the same file get a suffix
+    tasks = []
+    used = set()
+    with profiling.phase("reports.format") as p:
+        for sec_name, items in sections.items():
+            if only_clean and sec_name != only_clean:
+                continue
+            name = _section_filename(sec_name)
+            n = 2
+            while name in used:
+                name = _section_filename(f"{sec_name}_{n}")
+                n += 1
+            used.add(name)
+            cells = [["" if r.get(k) is None else r.get(k) for k in SECTION_FIELDS] for r in items]
+            tasks.append((os.path.join(out_folder, name), cells))
+            p.add(rows=len(cells))
+
+    if not tasks:
+        return []
+    os.makedirs(out_folder, exist_ok=True)
+
+    written, errors = [], []
+    with profiling.phase("reports.write", files=len(tasks), workers=workers) as p:
+        if workers <= 1 or len(tasks) == 1:
+            for path, cells in tasks:
+                try:
+                    written.append(_write_section_file(path, cells))
+                except Exception as e:
+                    errors.append((path, e))
+        else:
+            executor = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+            with executor(max_workers=workers) as pool:
+                futures = [(path, pool.submit(_write_section_file, path, cells)) for path, cells in tasks]
+                for path, future in futures:
+                    try:
+                        written.append(future.result())
+                    except Exception as e:
+                        errors.append((path, e))
+        if p:
+            p.add(rows=sum(len(cells) for _, cells in tasks), bytes_written=profiling.file_bytes(*written))
+
+    for path, e in errors:
+        print("Could not write section CSV:", path, e)
+    if verbose and written:
+        print(f"\nSaved {len(written)} section file(s) to: {out_folder}")
+    return written
+
+@profiling.profiled("reports.export_per_section")
+def export_per_section(rows_or_filename, out_folder: str = OUT_DIR, only_section: str = None, show_only: bool = False,
+                       workers: int = EXPORT_WORKERS, use_processes: bool = False, verbose: bool = True) -> None:
     """
-    Identify students whose final grade < threshold and export to a CSV.
-    Also prints the list to terminal (formatted).
+    Export section_<name>.csv per section into 'out_folder' using a pool of
+    'workers' threads (or processes). Only prints if show_only=True.
     """
-    rows = _read_csv_as_dicts(filename)
+    sink = SectionSink(out_folder, only_section, show_only, workers, use_processes, verbose)
+    if isinstance(rows_or_filename, str):
+        if not ReportPlan(rows_or_filename).add(sink).run():
+            print("No data found.")
+        return
+
+    rows = rows_or_filename
     if not rows:
-        print("File not found or no data:", filename)
+        print("No data to process.")
         return
 
-    at_risk: List[Dict[str, str]] = []
+    # Rows from a ReportPlan are already graded
+    if not all("final_numeric" in r for r in rows):
+        rows = _enrich_batch(rows)
+    sink.start()
     for r in rows:
-        final = _compute_final_from_row_map(r)
-        if final is None:
-            continue
-        if final < threshold:
-            at_risk.append({
-                "student_id": r.get("student_id",""),
-                "last_name": r.get("last_name",""),
-                "first_name": r.get("first_name",""),
-                "section": r.get("section",""),
-                "final_grade": f"{final:.2f}"
-            })
-
-    if not at_risk:
-        print(" No students are currently at risk.")
-        return
+        sink.add(r)
+    sink.finish()
 
-    # Ensure output dir exists
-    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+def _export_sections_quietly(filename: str, out_folder: str) -> str:
+    """export_per_section without terminal output; returns a short note for the job status."""
+    sink = SectionSink(out_folder, verbose=False)
+    if not ReportPlan(filename).add(sink).run():
+        return "No data found"
+    return f"Exported to {out_folder}/"
 
-    # Write CSV
-    try:
-        with open(output_file, "w", newline="", encoding="utf-8") as f:
-            fieldnames = ["student_id","last_name","first_name","section","final_grade"]
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(at_risk)
-        print(f"\nSaved at-risk list to: {output_file}")
-    except Exception as e:
-        print("Failed to write at-risk CSV:", e)
-        return
+def queue_section_export(jobs, filename: str = FILENAME, out_folder: str = OUT_DIR):
+    """
+    Queue the per-section CSV export on a jobs.JobQueue and return at once.
+    A request for the same version of the data (CSV + change log) while
+    an export of it is still queued or running is coalesced into that
+    export. Returns (job, queued_new_job).
+    """
+    version = json.dumps(file_stats(filename))
+    return jobs.submit(f"Section CSVs -> {out_folder}/",
+                       lambda: _export_sections_quietly(filename, out_folder),
+                       key=("sections", os.path.abspath(filename), os.path.abspath(out_folder), version))
 
-    # Print formatted table
-    print("\n AT-RISK STUDENTS")
-    print("{:<12} {:<15} {:<15} {:<10} {:>10}".format("student_id","last_name","first_name","section","final_grade"))
-    print("-" * 70)
-    for s in at_risk:
-        print("{:<12} {:<15} {:<15} {:<10} {:>10}".format(
-            s["student_id"], s["last_name"], s["first_name"], s["section"], s["final_grade"]
-        ))
-    print(f"\n{len(at_risk)} student(s) found below {threshold}.")
+@profiling.profiled("reports.export_at_risk")
+def export_at_risk(filename: str = FILENAME, output_file: str = os.path.join(OUT_DIR, "at_risk_students.csv"), threshold: float = PASSING_GRADE, batch_size: Optional[int] = None, store=None) -> None:
+    """
+    Identify students whose final grade < threshold and export to a CSV.
+    Also prints the list to terminal (formatted).
+    With batch_size set, the input is streamed in validated batches so only
+    the at-risk students are kept in memory. With a StudentStore, its
+    materialized grades are used.
+    """
+    if not ReportPlan(filename, batch_size, store).add(AtRiskSink(output_file, threshold)).run():
+        print("File not found or no data:", filename)
 
 # If run standalone, do a demo summary
 if __name__ == "__main__":
@@ -298,37 +607,37 @@ if __name__ == "__main__":
 # backward-compat shim so main.py's import at_risk still works.
 
 
+def section_names(filename: str = FILENAME) -> Optional[List[str]]:
+    """
+    Sorted section names, read from the roster's section code table (the
+    cached columnar copy, not the CSV). None if the file does not exist.
+    """
+    loaded = load_columns(filename, HEADER)
+    if loaded is None:
+        return None
+    return sorted(loaded[0].section_codes()[1].tolist())
+
 def display_section_simple(section_name: str, folder: str = OUT_DIR):
-    """Display simple section report without exporting files."""
-    rows = _read_csv_as_dicts(FILENAME)
-    if not rows:
+    """
+    Display simple section report without exporting files. Rows are picked
+    by section code, so only that section's students are graded.
+    """
+    loaded = load_columns(FILENAME, HEADER)
+    if loaded is None or not len(loaded[0]):
         print("No data found.")
         return
-
-    # Process only the requested section
-    enriched = []
-    for r in rows:
-        if r.get("section", "").strip() == section_name:
-            final = _compute_final_from_row_map(r)
-            enriched.append({
-                **r,
-                "final_grade": final,
-                "letter_grade": _letter_grade(final)
-            })
-
-    if enriched:
-        print(f"\n=== Section {section_name} ===")
-        print("{:<12} {:<15} {:<15} {:>10} {:>8}".format(
-            "student_id", "last_name", "first_name", "final_grade", "letter"
-        ))
-        print("-" * 70)
-        for s in enriched:
-            print("{:<12} {:<15} {:<15} {:>10.2f} {:>8}".format(
-                s["student_id"], s["last_name"], s["first_name"],
-                s["final_grade"], s["letter_grade"]
-            ))
-    else:
-        print(f"No students found in section {section_name}")
+    roster = loaded[0]
+    codes, names = roster.section_codes()
+    hits = np.flatnonzero(names == section_name)
+    picked = np.flatnonzero(codes == hits[0]) if hits.size else np.array([], dtype=np.intp)
+
+    sink = SectionDisplaySink(section_name)
+    section = Roster(roster.ids[picked], roster.last_names[picked], roster.first_names[picked],
+                     roster.sections[picked], roster.scores[picked])
+    finals, letters = _finals_and_letters(section.scores)
+    for row, f, l in zip(section.to_rows(), finals, letters):
+        sink.add(_with_grade(dict(zip(HEADER, row)), f, l))
+    sink.finish()
 
 # allow direct call: python -m at_risk
 if __name__ == "__main__":
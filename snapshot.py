@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np  # For the .npz snapshot format
+from changelog import log_path, keep_mode
+from columnar import Roster, roster_from_rows
+from ingest import clean_ingest, DEFAULT_FILE, DEFAULT_HEADER
+import profiling  # Opt-in phase timings (no-op unless enabled)
+
+
+# ---------------- CONFIGURATION ----------------
+FILENAME = DEFAULT_FILE
+HEADER = DEFAULT_HEADER
+
+SNAPSHOT_SUFFIX = ".npz"      # studentRecord.csv -> studentRecord.csv.npz
+SNAPSHOT_VERSION = 1          # Bump when the stored layout changes
+HASH_CHUNK = 1024 * 1024
+
+
+
+
+# ---------------- FINGERPRINT ----------------
+def snapshot_path(filename):
+    """Path of the binary snapshot that sits next to the CSV."""
+    return filename + SNAPSHOT_SUFFIX
+
+
+def _sources(filename):
+    """Files whose contents make up the data: the base CSV and its change log."""
+    return [filename, log_path(filename)]
+
+
+def file_stats(filename):
+    """[size, mtime_ns] of the CSV and its change log ([0, 0] if missing)."""
+    stats = []
+    for path in _sources(filename):
+        if os.path.exists(path):
+            st = os.stat(path)
+            stats.append([st.st_size, st.st_mtime_ns])
+        else:
+            stats.append([0, 0])
+    return stats
+
+
+def content_hash(filename):
+    """SHA-256 over the CSV and its change log."""
+    h = hashlib.sha256()
+    for path in _sources(filename):
+        h.update(b"\0")  # Keep "csv + empty log" distinct from "csv moved into log"
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def is_fresh(filename, saved_stats, saved_hash):
+    """True if the CSV and its log still match a saved (stats, hash) key.
+
+    Size and mtime are checked first. If only the mtime moved (file touched
+    or rewritten with the same bytes) the content hash decides.
+    """
+    stats = file_stats(filename)
+    if stats == saved_stats:
+        return True
+    if [s[0] for s in stats] != [s[0] for s in saved_stats]:
+        return False
+    return content_hash(filename) == saved_hash
+
+
+
+
+# ---------------- SAVE / LOAD ----------------
+def save_snapshot(filename, roster, bad_count, stats=None, digest=None):
+    """Write the validated roster to the sidecar .npz (atomic rename, same permissions as the CSV)."""
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "stats": stats if stats is not None else file_stats(filename),
+        "hash": digest if digest is not None else content_hash(filename),
+        "bad_count": int(bad_count),
+    }
+    path = snapshot_path(filename)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=SNAPSHOT_SUFFIX,
+                               dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(
+                f,
+                meta=np.array(json.dumps(meta)),
+                ids=roster.ids,
+                last_names=roster.last_names,
+                first_names=roster.first_names,
+                sections=roster.sections,
+                scores=roster.scores,
+            )
+        keep_mode(tmp, filename)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def load_snapshot(filename):
+    """Return (roster, bad_count) from the snapshot if it is still fresh, else None."""
+    path = snapshot_path(filename)
+    if not os.path.exists(path):
+        return None
+
+    with profiling.phase("snapshot.load") as p:
+        loaded = _read_snapshot(filename, path)
+        if p and loaded is not None:
+            p.add(rows=len(loaded[0]), bytes_read=profiling.file_bytes(path))
+    return loaded
+
+
+def _read_snapshot(filename, path):
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != SNAPSHOT_VERSION:
+                return None
+
+            if not is_fresh(filename, meta["stats"], meta["hash"]):
+                return None
+            stats = file_stats(filename)
+            touched = stats != meta["stats"]
+
+            roster = Roster(
+                data["ids"], data["last_names"], data["first_names"],
+                data["sections"], data["scores"],
+            )
+    except (OSError, ValueError, KeyError):
+        return None  # Missing, truncated or foreign file: rebuild it
+
+    if touched:
+        # Same content under a new mtime: refresh the key so the next load is instant
+        _try_save(filename, roster, meta["bad_count"], stats, meta["hash"])
+    return roster, meta["bad_count"]
+
+
+def _try_save(filename, roster, bad_count, stats, digest):
+    try:
+        save_snapshot(filename, roster, bad_count, stats, digest)
+    except OSError:
+        pass  # Read-only folder: just skip caching
+
+
+
+
+# ---------------- VALIDATED LOAD ----------------
+def load_validated(filename=FILENAME, header=HEADER):
+    """Return (roster, bad_count) for the validated data in filename.
+
+    Served from the snapshot when it is fresh. Otherwise the CSV is run
+    through clean_ingest and the snapshot is rebuilt. Returns None if the
+    file does not exist.
+    """
+    cached = load_snapshot(filename)
+    if cached is not None:
+        return cached
+
+    if not os.path.exists(filename):
+        return None
+
+    # Key the snapshot on what we are about to read, so a write during
+    # ingest makes it stale instead of silently wrong
+    stats, digest = file_stats(filename), content_hash(filename)
+    valid_rows, bad_rows = clean_ingest(filename, header, verbose=False, workers=None)
+    roster = roster_from_rows(valid_rows)
+    _try_save(filename, roster, len(bad_rows), stats, digest)
+    return roster, len(bad_rows)
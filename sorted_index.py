@@ -0,0 +1,254 @@
+import json
+import os
+import tempfile
+import numpy as np  # Sorted key arrays and row permutations
+from columnar import Roster, TEXT_COLUMNS, SCORE_COLUMNS
+from mmap_store import MappedRoster, load_columns, MMAP_MIN_BYTES
+from snapshot import file_stats, content_hash, is_fresh
+from ingest import DEFAULT_FILE, DEFAULT_HEADER
+from reports import POLICY  # Weights behind the computed final grade
+
+
+# ---------------- CONFIGURATION ----------------
+FILENAME = DEFAULT_FILE
+HEADER = DEFAULT_HEADER
+
+INDEX_SUFFIX = ".idx"       # studentRecord.csv -> studentRecord.csv.idx/
+INDEX_VERSION = 1           # Bump when the on-disk layout changes
+GRADE = "final_grade"       # Computed column: the weighted final grade shown in reports
+INDEXABLE = tuple(TEXT_COLUMNS) + tuple(SCORE_COLUMNS) + (GRADE,)
+
+# Layout inside the folder, per indexed column:
+#   <column>.keys.npy   sorted keys (float64, or lowercased text)
+#   <column>.rows.npy   int64 row numbers in the validated roster, in key order
+#   <column>.json       fingerprint of the CSV the index was built from
+# Rows without a value (missing score or grade) are left out of the index.
+
+# Roster each query reads its rows from, per CSV: abspath -> (file_stats, roster)
+_rosters = {}
+
+
+
+
+# ---------------- SORTED INDEX ----------------
+class SortedIndex:
+    """Sorted keys of one column plus the row number each key came from.
+
+    Equal keys are stored in row order. Range and ordered-scan queries
+    are a binary search plus a slice, O(log n + k), and return row numbers
+    of the validated roster (what load_columns returns), so the base
+    file's order is never touched.
+    """
+
+    def __init__(self, column, keys, rows):
+        self.column = column
+        self.keys = keys
+        self.rows = rows
+        self.text = keys.dtype.kind == "U"
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _key(self, value):
+        return str(value).lower() if self.text else float(value)
+
+    def range(self, low=None, high=None, include_low=True, include_high=True):
+        """Row numbers with low <= key <= high (either end may be None), in key order.
+
+        include_low/include_high False make that end strict (low < key, key < high).
+        """
+        start = 0 if low is None else int(np.searchsorted(
+            self.keys, self._key(low), side="left" if include_low else "right"))
+        end = len(self.keys) if high is None else int(np.searchsorted(
+            self.keys, self._key(high), side="right" if include_high else "left"))
+        return np.asarray(self.rows[start:max(start, end)])
+
+    def first(self, k, descending=False):
+        """Row numbers of the first k keys (the last k when descending); ties stay in row order."""
+        n = len(self.keys)
+        k = min(max(int(k), 0), n)
+        if not descending or k == 0:
+            return np.asarray(self.rows[:k])
+
+        # Highest k keys: everything above the k-th highest key, then the
+        # earliest rows from the block of keys equal to it
+        boundary = self.keys[n - k]
+        block_start = int(np.searchsorted(self.keys, boundary, side="left"))
+        block_end = int(np.searchsorted(self.keys, boundary, side="right"))
+        above = np.asarray(self.rows[block_end:])
+        ties = np.asarray(self.rows[block_start:block_start + k - len(above)])
+
+        # Above the boundary: descending key, equal keys in row order
+        above_keys = np.asarray(self.keys[block_end:])
+        _, codes = np.unique(above_keys, return_inverse=True)
+        above = above[np.lexsort((above, -codes.ravel()))]
+        return np.concatenate([above, ties])
+
+
+
+
+# ---------------- BUILD / OPEN ----------------
+def index_dir(filename):
+    """Folder of the secondary indexes that sits next to the CSV."""
+    return filename + INDEX_SUFFIX
+
+
+def _paths(filename, column):
+    base = os.path.join(index_dir(filename), column)
+    return base + ".keys.npy", base + ".rows.npy", base + ".json"
+
+
+def column_keys(roster, column):
+    """Index keys for every roster row and a mask of the rows that have one."""
+    if column not in INDEXABLE:
+        raise ValueError(f"Cannot index column: {column}")
+    if column == GRADE:
+        values = POLICY.grades(roster.scores)
+    elif column in SCORE_COLUMNS:
+        values = np.asarray(roster.column(column), dtype=float)
+    else:
+        values = np.char.lower(np.asarray(roster.column(column), dtype=str))
+        return values, np.ones(len(values), dtype=bool)
+    return values, ~np.isnan(values)
+
+
+def _save(path, array):
+    """np.save to a temp file in the same folder, then rename over path."""
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=".npy", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def build_index(filename=FILENAME, column=GRADE, header=HEADER):
+    """(Re)build the index for one column. Returns the SortedIndex, or None if the CSV is missing."""
+    stats, digest = file_stats(filename), content_hash(filename)
+    loaded = load_columns(filename, header)
+    if loaded is None:
+        return None
+
+    values, present = column_keys(loaded[0], column)
+    rows = np.flatnonzero(present).astype(np.int64)
+    order = np.argsort(values[rows], kind="stable")
+    keys, rows = values[rows][order], rows[order]
+
+    os.makedirs(index_dir(filename), exist_ok=True)
+    keys_path, rows_path, meta_path = _paths(filename, column)
+    _save(keys_path, keys)
+    _save(rows_path, rows)
+    # Fingerprint goes last, so a half-written index is never taken as fresh
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=index_dir(filename))
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_VERSION, "column": column, "rows": len(rows),
+                   "stats": stats, "hash": digest}, f)
+    os.replace(tmp, meta_path)
+    return SortedIndex(column, keys, rows)
+
+
+def use_index(filename=FILENAME, column=GRADE):
+    """Whether queries on column should go through its index: when one was
+    already built, or when the CSV is big enough for the mmap format (the
+    index is then worth building)."""
+    if column not in INDEXABLE or not os.path.exists(filename):
+        return False
+    return os.path.exists(_paths(filename, column)[2]) or os.path.getsize(filename) >= MMAP_MIN_BYTES
+
+
+def _load(path):
+    """np.load with mmap, falling back to a normal read for empty arrays."""
+    try:
+        return np.load(path, mmap_mode="r", allow_pickle=False)
+    except ValueError:
+        return np.load(path, allow_pickle=False)  # mmap cannot map zero bytes
+
+
+def open_index(filename=FILENAME, column=GRADE, header=HEADER, rebuild=True):
+    """Open the index for one column, (re)building it first when stale or missing.
+
+    The arrays are memory-mapped, so a query only reads the pages its
+    binary search and slice touch. Returns None if the CSV is missing, or
+    if the index is stale and rebuild is False.
+    """
+    if column not in INDEXABLE:
+        raise ValueError(f"Cannot index column: {column}")
+    if not os.path.exists(filename):
+        return None
+
+    keys_path, rows_path, meta_path = _paths(filename, column)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") == INDEX_VERSION and is_fresh(filename, meta["stats"], meta["hash"]):
+            keys, rows = _load(keys_path), _load(rows_path)
+            if len(keys) == len(rows) == meta["rows"]:
+                return SortedIndex(column, keys, rows)
+    except (OSError, ValueError, KeyError):
+        pass  # Missing, empty or half-written: rebuild it
+
+    return build_index(filename, column, header) if rebuild else None
+
+
+
+
+# ---------------- QUERIES ----------------
+def roster(filename=FILENAME, header=HEADER):
+    """The validated roster row numbers refer to (what load_columns returns), or None.
+
+    Kept per file until the CSV or its log changes, so repeated queries do
+    not reload it; with the mmap format nothing is decoded up front.
+    """
+    key = os.path.abspath(filename)
+    stats = file_stats(filename)
+    cached = _rosters.get(key)
+    if cached is not None and cached[0] == stats:
+        return cached[1]
+    loaded = load_columns(filename, header)
+    if loaded is None:
+        _rosters.pop(key, None)
+        return None
+    _rosters[key] = (stats, loaded[0])
+    return loaded[0]
+
+
+def take(roster, rows):
+    """A Roster of just the given row numbers, in that order.
+
+    For a MappedRoster only those rows' text is decoded from the heaps and
+    only their scores are read, so the cost is O(k), not O(n).
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    scores = np.asarray(roster.scores[rows], dtype=float).reshape(len(rows), len(SCORE_COLUMNS))
+    if isinstance(roster, MappedRoster):
+        text = [np.array([roster.heap(name)[i] for i in rows.tolist()], dtype=str) for name in TEXT_COLUMNS]
+    else:
+        text = [np.asarray(roster.column(name))[rows] for name in TEXT_COLUMNS]
+    return Roster(*text, scores)
+
+
+def _records(filename, header, rows):
+    """Validated rows (HEADER order) for the given row numbers, in that order."""
+    loaded = roster(filename, header)
+    if loaded is None:
+        return []
+    return take(loaded, rows).to_rows()
+
+
+def range_query(filename=FILENAME, column=GRADE, low=None, high=None, header=HEADER):
+    """Records with low <= column <= high, ordered by that column."""
+    index = open_index(filename, column, header)
+    if index is None:
+        return []
+    return _records(filename, header, index.range(low, high))
+
+
+def ordered(filename=FILENAME, column=GRADE, k=10, descending=False, header=HEADER):
+    """First k records by column (last k when descending)."""
+    index = open_index(filename, column, header)
+    if index is None:
+        return []
+    return _records(filename, header, index.first(k, descending))
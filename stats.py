@@ -0,0 +1,122 @@
+import numpy as np  # For fast numerical operations
+
+
+# ---------------- CONFIGURATION ----------------
+# Width of one median-sketch bin. Grades are rounded to 2 decimals, so with
+# 0.01 every distinct grade gets its own bin and the median is exact; any
+# value in 0–100 needs at most 10,001 bins whatever the number of students.
+MEDIAN_RESOLUTION = 0.01
+
+
+
+
+# ---------------- HISTOGRAM QUANTILES ----------------
+def histogram_quantile(bins, q, scale):
+    """Value at quantile q of a histogram {bin number: count}, bin b standing
+    for the value b / scale; interpolated like np.quantile (nan if empty)."""
+    count = sum(bins.values())
+    if not count:
+        return float("nan")
+    keys = np.array(sorted(bins), dtype=np.int64)
+    ends = np.cumsum([bins[b] for b in keys.tolist()])
+
+    pos = q * (count - 1)
+    lo, hi = int(np.floor(pos)), int(np.ceil(pos))
+    lo_v, hi_v = keys[np.searchsorted(ends, [lo, hi], side="right")] / scale
+    return float(lo_v + (hi_v - lo_v) * (pos - lo))
+
+
+
+
+# ---------------- RUNNING STATISTICS ----------------
+class RunningStats:
+    """Count, mean, variance, min, max and median of a stream of grades.
+
+    Grades come in chunk by chunk (update) and two accumulators built from
+    different chunks, batches or sections combine with merge, giving the
+    same result as one accumulator fed everything. Memory stays constant:
+    mean/variance use Welford's method (Chan's formula to combine chunks)
+    and the median comes from a histogram of MEDIAN_RESOLUTION-wide bins.
+    NaN grades are skipped.
+    """
+
+    def __init__(self, values=(), resolution=MEDIAN_RESOLUTION):
+        self.resolution = resolution
+        self._scale = 1 / resolution   # 100.0 for 0.01, so bin / scale is exact
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0        # Sum of squared distances from the mean
+        self.min = None
+        self.max = None
+        self._bins = {}       # Bin number -> number of grades in it
+        self.update(values)
+
+    # ---------- feeding ----------
+
+    def update(self, values):
+        """Add a chunk of grades (any iterable or array). Returns self."""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return self
+
+        n = values.size
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        self._combine(n, mean, m2, float(values.min()), float(values.max()))
+
+        bins, counts = np.unique(np.rint(values * self._scale).astype(np.int64), return_counts=True)
+        for b, c in zip(bins.tolist(), counts.tolist()):
+            self._bins[b] = self._bins.get(b, 0) + c
+        return self
+
+    def merge(self, other):
+        """Fold another accumulator (same resolution) into this one. Returns self."""
+        if other.resolution != self.resolution:
+            raise ValueError("Cannot merge stats with different median resolutions")
+        if not other.count:
+            return self
+        self._combine(other.count, other.mean, other._m2, other.min, other.max)
+        for b, c in other._bins.items():
+            self._bins[b] = self._bins.get(b, 0) + c
+        return self
+
+    def _combine(self, n, mean, m2, low, high):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    # ---------- results ----------
+
+    def variance(self, ddof=0):
+        """Population variance by default (ddof=1 for the sample variance)."""
+        if self.count <= ddof:
+            return float("nan")
+        return self._m2 / (self.count - ddof)
+
+    def stdev(self, ddof=0):
+        return float(np.sqrt(self.variance(ddof)))
+
+    def quantile(self, q):
+        """Grade at quantile q in [0, 1] from the histogram, interpolated like np.quantile.
+
+        Exact when every grade sits on a bin (e.g. 2-decimal grades at the
+        default resolution), otherwise within half a bin.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        return histogram_quantile(self._bins, q, self._scale)
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def as_dict(self):
+        """count, mean, median, max, min and SD (None when there is no data)."""
+        if not self.count:
+            return {"count": 0, "mean": None, "median": None, "max": None, "min": None, "stdev": None}
+        return {"count": self.count, "mean": self.mean, "median": self.median(),
+                "max": self.max, "min": self.min, "stdev": self.stdev()}
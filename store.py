@@ -0,0 +1,310 @@
+import os
+import numpy as np  # Reason codes from validate_rows
+from ingest import DEFAULT_FILE, DEFAULT_HEADER, REJECTED, validate_rows
+from changelog import fold
+from snapshot import load_validated, file_stats  # Cached, validated CSV data and its version
+from reports import grade_rows  # Batched final grades + letters
+from tail import Tail  # Read position in the CSV and its change log
+from stats import histogram_quantile  # Median from the grade counts
+
+
+# ---------------------- STUDENT STORE ----------------------
+
+
+class StudentStore:
+    """In-memory student records with a hash index on student_id.
+
+    Rows are kept in insertion order under a running sequence number, and
+    the index maps each student_id to the sequence numbers of its rows, so
+    lookups, duplicate checks, adds and deletes are all O(1) per row.
+
+    Each row's final grade and letter are computed once when the row comes
+    in and kept next to it, together with running totals (count, sum,
+    min, max), so only added, changed or deleted rows are ever regraded.
+
+    version goes up on every change to the rows. in_step() uses it to tell
+    whether the rows are still exactly the ones read from the file, in the
+    file's order, which is when the file's cached columns (snapshot or
+    mmap) can stand in for them.
+    """
+
+    def __init__(self, rows=()):
+        self.tail = None    # Where the CSV was read up to (set by from_csv)
+        self.version = 0
+        self._source = None  # (CSV path, file_stats, version) the rows were read at
+        self.replace_all(rows)
+
+    @classmethod
+    def from_csv(cls, filename=DEFAULT_FILE, header=DEFAULT_HEADER, verbose=True):
+        """Load and validate a CSV file into a new store (bad rows are skipped).
+
+        Uses the binary snapshot when it is fresh, so large files open fast.
+        The read position is kept so refresh() can pick up appended rows.
+        With verbose=False nothing is printed (e.g. when loading in the
+        background).
+        """
+        tail = Tail.capture(filename)
+        stats = file_stats(filename)
+        loaded = load_validated(filename, header)
+        if loaded is None:
+            if verbose:
+                print("File not found.")
+            return cls()
+        roster, bad_count = loaded
+        if verbose:
+            print(f"\nValid rows: {len(roster)}")
+            print(f"Bad rows: {bad_count}")
+        store = cls(roster.to_rows())
+        # Only trust the position (and the rows' version) if nothing was written while loading
+        if tail is not None and tail.same_position(Tail.capture(filename)):
+            store.tail = tail
+        if file_stats(filename) == stats:
+            store._source = (os.path.abspath(filename), stats, store.version)
+        return store
+
+    def in_step(self, filename=DEFAULT_FILE):
+        """True if the rows are exactly the validated rows of filename as it is now, in file order.
+
+        That holds from from_csv until either side changes: any add,
+        update, delete or reorder here, or any write to the CSV or its
+        change log (this session's own logged edits included). Row i is
+        then row i of the file's cached columns.
+        """
+        return (self._source is not None and self._source[2] == self.version
+                and self._source[0] == os.path.abspath(filename) and self._source[1] == file_stats(filename))
+
+    def refresh(self, filename=DEFAULT_FILE, header=DEFAULT_HEADER):
+        """Bring the store up to date with filename and return the store to use.
+
+        Only the rows appended to the CSV and the change log since the
+        last read are parsed and validated, so a refresh costs O(new
+        rows). A full reload (a new store from from_csv) is done when the
+        file was rewritten or truncated, or when a change touches a
+        student the store already holds (this session's own logged edits
+        included) or would land anywhere but the end, e.g. a student
+        deleted and added again, who goes back to their old place.
+        """
+        tail = self.tail
+        # Rows untouched since they were read stay in step with the file once the tail is applied
+        unchanged = self._source is not None and self._source[2] == self.version
+        stats = file_stats(filename)
+        changes = tail.read() if tail is not None and tail.filename == filename else None
+        if changes is None or not self._apply_tail(tail, *changes, header):
+            return StudentStore.from_csv(filename, header)
+        if unchanged and self._source[0] == os.path.abspath(filename) and file_stats(filename) == stats:
+            self._source = (self._source[0], stats, self.version)
+        return self
+
+    def _apply_tail(self, tail, rows, entries, marks, header):
+        """Append new base rows and log-only students as replay() would. False if a full reload is needed.
+
+        Replay puts a changed student back at their place in the base file
+        and log-only students after every base row, in the order the log
+        first names them. The store can only append, so the new rows are
+        applied here only when all of them go at the end, in that order.
+        """
+        state = fold(entries)
+        present = self._index.keys()
+        # A change to a row the store holds: where it ends up depends on where replay put it
+        if any(sid in present for sid in state):
+            return False
+        new_ids = {row[0] if row else "" for row in rows}
+        if rows:
+            # New base rows go before log-only students and must not be in the log
+            if new_ids & tail.logged or new_ids & state.keys():
+                return False
+            if present - tail.base_ids():
+                return False
+        for sid, row in state.items():
+            # A student back after a delete (or a bad row) returns to their old place
+            if row is not None and (sid in tail.logged or sid in tail.base_ids()):
+                return False
+
+        # Validate everything new in one call, the same way clean_ingest does; deletes
+        # only name students the store does not hold, so there is nothing to remove
+        batch = [list(row) for row in rows] + [list(row) for row in state.values() if row is not None]
+        reasons = validate_rows(batch, tail.width, header)[2] if batch else np.zeros(0, dtype=np.uint32)
+        ok = ((reasons & REJECTED) == 0).tolist()
+        self.extend([row for row, good in zip(batch, ok) if good])
+
+        tail.advance(marks, rows, state)
+        bad = ok[:len(rows)].count(False)
+        print(f"\nRead {len(rows)} new row(s) ({bad} bad) and {len(entries)} logged change(s)")
+        print(f"Valid rows: {len(self)}")
+        return True
+
+    # ---------- internal ----------
+
+    def _append(self, row):
+        """Store and index a row (not graded yet). Returns its sequence number."""
+        self.version += 1
+        seq = self._next_seq
+        self._next_seq += 1
+        self._rows[seq] = row
+        self._index.setdefault(row[0], []).append(seq)
+        return seq
+
+    def _remove(self, seq):
+        self.version += 1
+        del self._rows[seq]
+        self._ungrade(seq)
+
+    def _grade(self, seqs):
+        """Grade the given rows in one batched call and add them to the totals."""
+        finals, letters = grade_rows([self._rows[seq] for seq in seqs])
+        for seq, final, letter in zip(seqs, finals, letters):
+            self._grades[seq] = (final, letter)
+            if final is not None:
+                self._count_in(final)
+
+    def _count_in(self, final):
+        # Grades have 2 decimals, so totals are kept exactly in hundredths
+        cents = round(final * 100)
+        self._cents[cents] = self._cents.get(cents, 0) + 1
+        self._count += 1
+        self._sum_cents += cents
+        if self._min is None or cents < self._min:
+            self._min = cents
+        if self._max is None or cents > self._max:
+            self._max = cents
+
+    def _ungrade(self, seq):
+        final, _ = self._grades.pop(seq)
+        if final is None:
+            return
+        cents = round(final * 100)
+        self._count -= 1
+        self._sum_cents -= cents
+        self._cents[cents] -= 1
+        if self._cents[cents]:
+            return
+        del self._cents[cents]
+        # Only rescan when the last copy of the min/max leaves; there are at
+        # most 10,001 distinct grades between 0.00 and 100.00
+        if cents == self._min:
+            self._min = min(self._cents) if self._cents else None
+        if cents == self._max:
+            self._max = max(self._cents) if self._cents else None
+
+    # ---------- queries ----------
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return iter(self._rows.values())
+
+    def __contains__(self, student_id):
+        return student_id in self._index
+
+    def rows(self):
+        """Return all rows as a list, in insertion order."""
+        return list(self._rows.values())
+
+    def ids(self):
+        """Return the set-like view of all student IDs."""
+        return self._index.keys()
+
+    def get(self, student_id):
+        """Return the first row for student_id, or None."""
+        seqs = self._index.get(student_id)
+        return self._rows[seqs[0]] if seqs else None
+
+    def get_all(self, student_id):
+        """Return every row stored under student_id (older files may hold duplicates)."""
+        return [self._rows[seq] for seq in self._index.get(student_id, [])]
+
+    def graded_rows(self):
+        """Yield (row, final_grade, letter) in insertion order, without regrading."""
+        for seq, row in self._rows.items():
+            final, letter = self._grades[seq]
+            yield row, final, letter
+
+    def summary(self):
+        """Running totals of the valid final grades: count, sum, mean, median, min, max.
+
+        Kept up to date on every add/update/delete, so this costs O(distinct
+        grades) (at most 10,001) for the median and O(1) for the rest.
+        """
+        if not self._count:
+            return {"count": 0, "sum": 0.0, "mean": None, "median": None, "min": None, "max": None}
+        return {
+            "count": self._count,
+            "sum": self._sum_cents / 100,
+            "mean": self._sum_cents / 100 / self._count,
+            "median": histogram_quantile(self._cents, 0.5, 100),
+            "min": self._min / 100,
+            "max": self._max / 100,
+        }
+
+    # ---------- updates ----------
+
+    def add(self, row):
+        """Add a new row. Raises ValueError if its student_id already exists."""
+        if row[0] in self._index:
+            raise ValueError(f"Student ID {row[0]} already exists")
+        self._grade([self._append(row)])
+
+    def add_many(self, rows):
+        """Add several new rows, graded in one batched call.
+
+        Raises ValueError (and adds nothing) if any student_id already
+        exists or appears twice in rows.
+        """
+        rows = list(rows)
+        seen = set()
+        for row in rows:
+            if row[0] in self._index or row[0] in seen:
+                raise ValueError(f"Student ID {row[0]} already exists")
+            seen.add(row[0])
+        self._grade([self._append(row) for row in rows])
+
+    def extend(self, rows):
+        """Append rows as they come from a file: duplicate IDs are kept, like from_csv."""
+        self._grade([self._append(row) for row in rows])
+
+    def update(self, row):
+        """Replace the row(s) for row's student_id. Raises KeyError if it is unknown."""
+        seqs = self._index.get(row[0])
+        if not seqs:
+            raise KeyError(row[0])
+        self.version += 1
+        for seq in seqs[1:]:
+            self._remove(seq)
+        self._ungrade(seqs[0])
+        self._rows[seqs[0]] = row
+        self._grade(seqs[:1])
+        self._index[row[0]] = seqs[:1]
+
+    def delete(self, student_id):
+        """Remove every row for student_id. Returns the number of rows removed."""
+        seqs = self._index.pop(student_id, [])
+        for seq in seqs:
+            self._remove(seq)
+        return len(seqs)
+
+    def replace_all(self, rows):
+        """Swap in a new row list and rebuild the index and grades."""
+        self._rows = {}     # seq -> row (dicts keep insertion order)
+        self._index = {}    # student_id -> [seq, ...]
+        self._grades = {}   # seq -> (final_grade, letter)
+        self._cents = {}    # grade in hundredths -> number of students
+        self._count = 0
+        self._sum_cents = 0
+        self._min = None
+        self._max = None
+        self._next_seq = 0
+        self._grade([self._append(row) for row in rows])
+
+    def reorder(self, rows):
+        """Put the same rows in a new order (e.g. after sorting) without regrading."""
+        old = {id(row): self._grades[seq] for seq, row in self._rows.items()}
+        self.version += 1
+        self._rows, self._index, self._grades = {}, {}, {}
+        self._next_seq = 0
+        for row in rows:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._rows[seq] = row
+            self._index.setdefault(row[0], []).append(seq)
+            self._grades[seq] = old[id(row)]
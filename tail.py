@@ -0,0 +1,146 @@
+import csv
+import io
+import os
+from changelog import log_path, record_end, OPS
+
+
+# ---------------------- FILE MARKS ----------------------
+
+
+class Mark:
+    """Identity of a file (device, inode) and how far it has been read.
+
+    offset is always the end of a complete record, so reading resumes at
+    the start of the next record.
+    """
+
+    __slots__ = ("dev", "ino", "offset")
+
+    def __init__(self, dev, ino, offset):
+        self.dev = dev
+        self.ino = ino
+        self.offset = offset
+
+    def __eq__(self, other):
+        return isinstance(other, Mark) and (self.dev, self.ino, self.offset) == (other.dev, other.ino, other.offset)
+
+
+def _stat(path):
+    """os.stat of path, or None if it does not exist."""
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def _read_lines(path, start, end):
+    """Text of the complete records between byte offsets start and end.
+
+    A last record without its newline (or inside a quoted field) is a
+    write still in progress and is left for the next read. Returns
+    (text, offset after the last record).
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    cut = record_end(data)
+    return data[:cut].decode("utf-8"), start + cut
+
+
+def _rows(text):
+    return list(csv.reader(io.StringIO(text, newline="")))
+
+
+
+
+# ---------------------- TAIL OF A CSV + CHANGE LOG ----------------------
+
+
+class Tail:
+    """How far a loader has read a base CSV and its change log.
+
+    read() returns only what was appended since, so a refresh costs
+    O(new rows). It returns None when the files were rewritten (new
+    inode, e.g. a compaction or an atomic save) or truncated (smaller
+    than what was read), which calls for a full reload.
+
+    logged holds every student ID met in the change log so far, and
+    base_ids() every ID in the base file (read once, when first needed);
+    the store uses them to tell where replay would put a changed row.
+    """
+
+    def __init__(self, filename, base, log, width, logged):
+        self.filename = filename
+        self.base = base
+        self.log = log
+        self.width = width
+        self.logged = logged
+        self._base_ids = None
+
+    @classmethod
+    def capture(cls, filename):
+        """Mark the current end of filename and its log. None if the file is missing or mid-write."""
+        st = _stat(filename)
+        if st is None or not st.st_size:
+            return None
+        with open(filename, "rb") as f:
+            first = f.readline()
+            f.seek(st.st_size - 1)
+            if f.read(1) != b"\n":
+                return None  # Last line still being written: position is unclear
+        header = next(csv.reader(io.StringIO(first.decode("utf-8"), newline="")), [])
+        base = Mark(st.st_dev, st.st_ino, st.st_size)
+
+        log, logged = None, set()
+        path = log_path(filename)
+        lst = _stat(path)
+        if lst is not None:
+            text, offset = _read_lines(path, 0, lst.st_size)
+            logged = {entry[1] for entry in _rows(text) if len(entry) > 1 and entry[0] in OPS}
+            log = Mark(lst.st_dev, lst.st_ino, offset)
+        return cls(filename, base, log, len(header), logged)
+
+    def same_position(self, other):
+        """True if other marks the same files at the same offsets."""
+        return other is not None and self.base == other.base and self.log == other.log
+
+    def read(self):
+        """(new base rows, new log entries, (base mark, log mark)) or None for a full reload.
+
+        The marks are only taken over by advance(), once the changes are applied.
+        """
+        st = _stat(self.filename)
+        if st is None or (st.st_dev, st.st_ino) != (self.base.dev, self.base.ino) or st.st_size < self.base.offset:
+            return None
+        text, offset = _read_lines(self.filename, self.base.offset, st.st_size)
+        rows = _rows(text)
+        base = Mark(st.st_dev, st.st_ino, offset)
+
+        path = log_path(self.filename)
+        lst = _stat(path)
+        if self.log is not None and (lst is None or (lst.st_dev, lst.st_ino) != (self.log.dev, self.log.ino)
+                                     or lst.st_size < self.log.offset):
+            return None
+        log, entries = None, []
+        if lst is not None:
+            start = self.log.offset if self.log is not None else 0
+            text, offset = _read_lines(path, start, lst.st_size)
+            entries = [entry for entry in _rows(text) if entry and entry[0] in OPS]
+            log = Mark(lst.st_dev, lst.st_ino, offset)
+        return rows, entries, (base, log)
+
+    def base_ids(self):
+        """Every student ID in the base file up to the mark (valid rows or not)."""
+        if self._base_ids is None:
+            text, _ = _read_lines(self.filename, 0, self.base.offset)
+            reader = csv.reader(io.StringIO(text, newline=""))
+            next(reader, None)
+            self._base_ids = {row[0] if row else "" for row in reader}
+        return self._base_ids
+
+    def advance(self, marks, rows, state):
+        """Take over the marks from read() once its rows and log state are applied."""
+        self.base, self.log = marks
+        self.logged.update(state)
+        if self._base_ids is not None:
+            self._base_ids.update(row[0] if row else "" for row in rows)
@@ -0,0 +1,49 @@
+import csv
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the repository, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HEADER = [
+    "student_id", "last_name", "first_name", "section",
+    "quiz1", "quiz2", "quiz3", "quiz4", "quiz5",
+    "midterm", "final", "attendance_percent"]
+
+# A small roster with a bit of everything: blank and out-of-range scores,
+# a blank name, two rows without an ID and one row cut short (padded)
+ROWS = [
+    ["1010", "Santos", "Ana", "AS", "80", "90", "70", "85", "88", "75", "10", "95"],
+    ["2222", "Reyes", "Juan", "AS", "60", "", "65", "70", "72", "68", "99", "90"],
+    ["3333", "Cruz", "Maria", "pi", "95", "92", "none", "90", "91", "89", "66", "100"],
+    ["", "Nobody", "Here", "AS", "50", "50", "50", "50", "50", "50", "50", "50"],
+    ["4444", "", "Jose", "99", "77", "140", "79", "80", "81", "82", "83", "84"],
+    ["5555", "Garcia", "Mark", "pi", "abc", "70", "71", "72", "73", "74", "50", "76"],
+    ["6666", "Tan", "Grace"],
+    ["7777", "Lim", "Joy", "AS", "", "", "", "", "", "", "", ""],
+    ["", "", "", "", "", "", "", "", "", "", "", ""],
+    ["8888", "Chua", "Liza", "pi", "88", "77", "66", "55", "44", "33", "66", "90"],
+]
+
+
+def write_csv(path, rows, header=HEADER):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))[1:]
+
+
+@pytest.fixture
+def roster(tmp_path, monkeypatch):
+    """studentRecord.csv with ROWS in a fresh working folder; returns its path."""
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / "studentRecord.csv")
+    write_csv(path, ROWS)
+    return path
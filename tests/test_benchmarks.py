@@ -0,0 +1,66 @@
+import json
+import os
+import sys
+
+import pytest
+
+import ingest
+
+# The benchmark scripts import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import generate  # noqa: E402
+import run  # noqa: E402
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_roster_has_the_asked_size_and_share_of_bad_rows(tmp_path):
+    path = str(tmp_path / "roster.csv")
+    assert generate.generate_roster(path, 20000, sections=5, missing_rate=0.1, bad_rate=0.1, seed=1) == 20000
+    valid, bad = ingest.clean_ingest(path, verbose=False)
+    assert len(valid) + len(bad) == 20000
+    assert 1700 < len(bad) < 2300
+    assert {row[3] for row in valid} == {"SEC01", "SEC02", "SEC03", "SEC04", "SEC05"}
+
+    generate.generate_roster(path, 1000, bad_rate=0)
+    assert len(ingest.clean_ingest(path, verbose=False)[1]) == 0
+
+
+def test_roster_is_the_same_for_the_same_seed(tmp_path):
+    paths = [str(tmp_path / name) for name in ("a.csv", "b.csv", "c.csv")]
+    generate.generate_roster(paths[0], 2000, seed=7)
+    generate.generate_roster(paths[1], 2000, seed=7)
+    generate.generate_roster(paths[2], 2000, seed=8)
+    assert read(paths[0]) == read(paths[1]) != read(paths[2])
+    with pytest.raises(ValueError):
+        generate.generate_roster(paths[0], 10, bad_rate=2)
+
+
+def test_runner_times_an_operation_and_saves_a_baseline(tmp_path, capsys):
+    baseline = str(tmp_path / "baseline.json")
+    args = ["--rows", "300", "--ops", "clean_ingest", "--repeat", "1", "--baseline", baseline]
+    assert run.main(args + ["--save-baseline"]) == 0
+    with open(baseline, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved["settings"]["rows"] == 300
+    result = saved["results"]["clean_ingest"]
+    assert result["seconds"] > 0 and result["rows_per_sec"] > 0
+
+    assert run.main(args + ["--tolerance", "1000"]) == 0
+    assert "clean_ingest         ok" in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        run.main(["--ops", "no_such_op"])
+
+
+def test_compare_flags_slower_or_bigger_operations():
+    old = {"a": {"seconds": 1.0, "peak_mb": 100}, "b": {"seconds": 1.0, "peak_mb": 100}}
+    now = {"a": {"seconds": 1.1, "peak_mb": 100}, "b": {"seconds": 1.0, "peak_mb": 200}, "c": {"seconds": 1.0, "peak_mb": None}}
+    lines, regressed = run.compare(now, old, 0.25)
+    assert regressed
+    assert lines[0].split()[:2] == ["a", "ok"]
+    assert lines[1].split()[:2] == ["b", "REGRESSION"]
+    assert "not in baseline" in lines[2]
+    assert run.compare({"a": now["a"]}, old, 0.25) == ([lines[0]], False)
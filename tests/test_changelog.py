@@ -0,0 +1,94 @@
+import os
+import stat
+
+import changelog
+from conftest import HEADER, read_csv, write_csv
+
+
+def row(sid, final="50"):
+    return [sid, "Last", "First", "AS", "1", "2", "3", "4", "5", "6", final, "7"]
+
+
+BASE = [row("A"), row("B"), row("C")]
+
+
+def test_replay_keeps_positions_and_appends_log_only_students():
+    entries = [
+        [changelog.UPDATE] + row("B", "99"),
+        [changelog.ADD] + row("N"),
+        [changelog.DELETE, "A"],
+        [changelog.DELETE, "C"],
+        [changelog.ADD] + row("C", "10"),   # Back after a delete: old place
+    ]
+    assert list(changelog.replay(BASE, entries)) == [row("B", "99"), row("C", "10"), row("N")]
+
+
+def test_replay_twice_gives_the_same_rows():
+    entries = [[changelog.UPDATE] + row("A", "1"), [changelog.ADD] + row("N")]
+    once = list(changelog.replay(BASE, entries))
+    assert list(changelog.replay(once, entries)) == once
+
+
+def test_record_after_a_cut_off_write(roster):
+    changelog.record(roster, changelog.ADD, [row("N1")])
+    with open(changelog.log_path(roster), "ab") as f:
+        f.write(b"add,N2,Last,Fir")   # Crash in the middle of a record
+    changelog.record(roster, changelog.DELETE, [["2222"]])
+
+    assert changelog.read_log(roster) == [[changelog.ADD] + row("N1"), [changelog.DELETE, "2222"]]
+    with open(changelog.log_path(roster), "rb") as f:
+        assert b"N2" not in f.read()
+
+
+def test_record_after_a_log_with_only_a_partial_line(roster):
+    with open(changelog.log_path(roster), "wb") as f:
+        f.write(b"add,N2,La")
+    changelog.record(roster, changelog.DELETE, [["2222"]])
+    assert changelog.read_log(roster) == [[changelog.DELETE, "2222"]]
+
+
+def test_compact_merges_the_log_into_the_base(tmp_path):
+    path = str(tmp_path / "data.csv")
+    write_csv(path, BASE)
+    os.chmod(path, 0o640)
+    changelog.record(path, changelog.UPDATE, [row("A", "80")])
+    changelog.record(path, changelog.DELETE, [["B"]])
+    changelog.record(path, changelog.ADD, [row("N")])
+
+    expected = list(changelog.replay(BASE, changelog.read_log(path)))
+    assert changelog.compact(path, HEADER)
+    assert read_csv(path) == expected == [row("A", "80"), row("C"), row("N")]
+    assert not os.path.exists(changelog.log_path(path))
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    assert not changelog.compact(path, HEADER)   # Nothing left to merge
+
+
+def test_background_compaction_leaves_no_temp_files(tmp_path):
+    path = str(tmp_path / "data.csv")
+    write_csv(path, BASE)
+    changelog.record(path, changelog.ADD, [row(f"N{i}") for i in range(50)])
+
+    worker = changelog.maybe_compact(path, HEADER, threshold=1)
+    assert worker is not None and not worker.daemon
+    worker.join()
+    assert len(read_csv(path)) == 53
+    assert [name for name in os.listdir(tmp_path) if name.startswith(".tmp-")] == []
+
+
+def test_log_keeps_newlines_inside_quoted_fields(tmp_path):
+    path = str(tmp_path / "data.csv")
+    write_csv(path, BASE)
+    multi = ["N", "Last\nName", 'First "Jr"\nX'] + row("N")[3:]
+    changelog.record(path, changelog.ADD, [multi])
+    changelog.record(path, changelog.UPDATE, [row("A", "80")])
+    assert changelog.read_log(path) == [[changelog.ADD] + multi, [changelog.UPDATE] + row("A", "80")]
+
+    # A write cut off inside the quoted field is dropped, not joined onto the next record
+    with open(changelog.log_path(path), "a", encoding="utf-8") as f:
+        f.write('add,M,"Half\n')
+    assert changelog.read_log(path)[-1] == [changelog.UPDATE] + row("A", "80")
+    changelog.record(path, changelog.DELETE, [["B"]])
+    assert changelog.read_log(path)[-1] == [changelog.DELETE, "B"]
+
+    assert changelog.compact(path, HEADER)
+    assert read_csv(path) == [row("A", "80"), row("C"), multi]
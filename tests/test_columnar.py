@@ -0,0 +1,57 @@
+import math
+
+import numpy as np
+
+import analytics
+import columnar
+from conftest import HEADER, ROWS, write_csv
+
+
+def weighted(row, weights):
+    """The per-row formula the batch kernel replaced: quiz average over the
+    quizzes taken, missing components count as 0, rounded to 2 decimals."""
+    scores = [columnar.parse_score(v) for v in row[4:12]]
+    quizzes = [q for q in scores[:5] if not math.isnan(q)]
+    parts = [sum(quizzes) / len(quizzes) if quizzes else math.nan] + scores[5:]
+    if all(math.isnan(p) for p in parts):
+        return math.nan
+    return round(sum(0.0 if math.isnan(p) else p * w for p, w in zip(parts, weights)), 2)
+
+
+def test_parse_score_column_handles_blanks_and_text():
+    column = columnar.parse_score_column(["1", " 2 ", "", "none", "abc", None, 3.5])
+    assert column[[0, 1, 6]].tolist() == [1.0, 2.0, 3.5]
+    assert np.isnan(column[2:6]).all()
+
+
+def test_roster_pads_short_rows():
+    roster = columnar.roster_from_rows([["1", "A", "B"], ROWS[0]])
+    assert roster.sections.tolist() == ["", "AS"]
+    assert np.isnan(roster.scores[0]).all()
+    assert roster.to_rows()[1][:4] == ROWS[0][:4]
+
+
+def test_load_roster_maps_columns_by_name(tmp_path):
+    path = str(tmp_path / "shuffled.csv")
+    order = HEADER[::-1]
+    write_csv(path, [[row[HEADER.index(h)] for h in order] for row in ROWS[:3]], header=order)
+    roster = columnar.load_roster(path)
+    assert roster.ids.tolist() == ["1010", "2222", "3333"]
+    assert roster.scores[0].tolist() == [80, 90, 70, 85, 88, 75, 10, 95]
+    assert columnar.load_roster(str(tmp_path / "missing.csv")) is None
+
+
+def test_batch_grades_match_the_row_formula(roster):
+    loaded = columnar.load_roster(roster)
+    weights = [analytics.QUIZ_WEIGHT, analytics.MIDTERM_WEIGHT, analytics.FINAL_WEIGHT, analytics.ATTENDANCE_WEIGHT]
+    rows = [row + [""] * (12 - len(row)) for row in ROWS]
+    expected = [weighted(row, weights) for row in rows]
+    np.testing.assert_array_equal(analytics.POLICY.grades(loaded.scores), np.array(expected))
+
+
+def test_compute_grades_prints_every_valid_student(roster, capsys):
+    analytics.compute_grades(roster)
+    out = capsys.readouterr().out
+    assert len([line for line in out.splitlines() if line.startswith("1010")]) == 1
+    assert "Nobody" not in out                  # Rejected: no student ID
+    assert "Lim, Joy" in out and "N/A" in out   # Valid row without any score
@@ -0,0 +1,38 @@
+import numpy as np
+
+import analytics
+import reports
+
+
+def test_analytics_and_reports_weight_the_final_differently():
+    # quiz avg 100, midterm 100, final 0, attendance 100
+    scores = np.array([[100, 100, 100, 100, 100, 100, 0, 100]], dtype=float)
+    assert analytics.POLICY.grades(scores).tolist() == [60.0]
+    assert reports.POLICY.grades(scores).tolist() == [70.0]
+    assert analytics.POLICY.cutoffs == reports.POLICY.cutoffs
+
+
+def test_top_and_bottom_match_the_stable_sort_they_replace():
+    rng = np.random.default_rng(3)
+    for _ in range(200):
+        grades = rng.integers(0, 6, size=rng.integers(1, 40)).astype(float)
+        order = np.argsort(grades, kind="stable")[::-1]
+        for k in range(1, len(grades) + 1):
+            assert analytics.top_k(grades, k).tolist() == order[:k].tolist()
+            assert analytics.bottom_k(grades, k)[::-1].tolist() == order[-k:].tolist()
+
+
+def test_top_three_ties_go_to_the_latest_rows():
+    grades = np.array([50, 90, 70, 70, 60, 90, 90, 10, 80, 90], dtype=float)
+    assert analytics.top_k(grades, 3).tolist() == [9, 6, 5]
+
+
+def test_percentiles_take_quantiles_as_an_array(roster, capsys):
+    analytics.percentiles(roster, quantiles=np.array([0.5, 0.9]))
+    as_array = capsys.readouterr().out
+    analytics.percentiles(roster, quantiles=[0.5, 0.9])
+    assert capsys.readouterr().out == as_array
+    assert "=== QUANTILES ===" in as_array and "p50:" in as_array and "p90:" in as_array
+
+    analytics.percentiles(roster, quantiles=np.array([]))
+    assert "QUANTILES" not in capsys.readouterr().out
@@ -0,0 +1,93 @@
+import json
+
+import array_operations
+import changelog
+from conftest import HEADER, read_csv, write_csv
+from store import StudentStore
+
+
+def student(sid, final="80", last="Doe"):
+    return [sid, last, "Jane", "AS", "80", "81", "82", "83", "84", "85", final, "90"]
+
+
+def counting_records(monkeypatch):
+    calls = []
+    record = changelog.record
+    monkeypatch.setattr(changelog, "record", lambda *a, **k: calls.append(a[1]) or record(*a, **k))
+    return calls
+
+
+def test_csv_import_adds_valid_rows_in_one_log_write(roster, tmp_path, monkeypatch):
+    source = str(tmp_path / "new.csv")
+    write_csv(source, [
+        student("9001"),
+        student("1010"),                # Already in the roster
+        student("9002", final="101"),   # Out of range
+        student("9001"),                # Earlier in this file
+        student("9003", last="D0e"),
+        student("9004"),
+    ])
+    calls = counting_records(monkeypatch)
+    store = StudentStore.from_csv(roster, verbose=False)
+    rejects = str(tmp_path / "rejects.csv")
+
+    store, accepted, rejections = array_operations.bulk_import(source, store, roster, rejects)
+    assert [row[0] for row in accepted] == ["9001", "9004"]
+    assert accepted[0] == ["9001", "Doe", "Jane", "AS", 80.0, 81.0, 82.0, 83.0, 84.0, 85.0, 80.0, 90.0]
+    assert [(line, sid) for line, sid, _ in rejections] == [(3, "1010"), (4, "9002"), (5, "9001"), (6, "9003")]
+    assert rejections[0][2] == "student_id: This Student ID already exists."
+    assert rejections[1][2] == "final: Scores must be between 0 and 100."
+    assert rejections[3][2].startswith("last_name:")
+
+    assert calls == [changelog.ADD]
+    assert [entry[1] for entry in changelog.read_log(roster)] == ["9001", "9004"]
+    assert store.get("9004") is not None and len(store) == 10
+    assert [row[0] for row in StudentStore.from_csv(roster, verbose=False).rows()][-2:] == ["9001", "9004"]
+
+    with open(rejects, newline="", encoding="utf-8") as f:
+        assert f.readline().rstrip("\r\n").split(",") == HEADER + ["error"]
+    rejected = read_csv(rejects)
+    assert [r[0] for r in rejected] == ["1010", "9002", "9001", "9003"]
+    assert rejected[1][:-1] == student("9002", final="101")
+    assert rejected[1][-1] == rejections[1][2]
+
+
+def test_jsonl_import_takes_objects_and_lists(roster, tmp_path, monkeypatch):
+    source = str(tmp_path / "new.jsonl")
+    obj = dict(zip(HEADER, student("9101")))
+    obj["final"] = 70                   # Numbers need not be strings
+    lines = [
+        json.dumps(obj),
+        "",
+        json.dumps(student("9102")),    # A list in HEADER order
+        "{not json",
+        "42",
+        json.dumps({"error": "boom"}),  # An ordinary record that happens to have an "error" key
+        json.dumps(student("1010")),
+    ]
+    with open(source, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    calls = counting_records(monkeypatch)
+    store = StudentStore.from_csv(roster, verbose=False)
+
+    store, accepted, rejections = array_operations.bulk_import(source, store, roster)
+    assert [row[0] for row in accepted] == ["9101", "9102"]
+    assert accepted[0][10] == 70.0
+    assert [(line, sid) for line, sid, _ in rejections] == [(4, ""), (5, ""), (6, ""), (7, "1010")]
+    assert rejections[0][2].startswith("Invalid JSON")
+    assert rejections[1][2] == "Each line must be a JSON object or list."
+    assert rejections[2][2] == "student_id: Student ID cannot be empty."
+    assert calls == [changelog.ADD]
+
+
+def test_import_with_nothing_valid_writes_nothing(roster, tmp_path, monkeypatch):
+    source = str(tmp_path / "new.csv")
+    write_csv(source, [student("1010"), student("2222")])
+    calls = counting_records(monkeypatch)
+    rejects = str(tmp_path / "rejects.csv")
+
+    store, accepted, rejections = array_operations.bulk_import(source, StudentStore.from_csv(roster, verbose=False),
+                                                               roster, rejects)
+    assert accepted == [] and len(rejections) == 2
+    assert calls == [] and changelog.read_log(roster) == []
+    assert len(read_csv(rejects)) == 2
@@ -0,0 +1,76 @@
+import changelog
+import ingest
+import reports
+from conftest import ROWS, write_csv
+
+
+def test_streamed_totals_match_clean_ingest(roster):
+    valid, bad = ingest.clean_ingest(roster, verbose=False)
+    counts = {}
+    streamed = [row for batch in ingest.iter_clean_batches(roster, batch_size=3, counts=counts) for row in batch]
+    assert streamed == valid
+    assert counts == {"valid": len(valid), "bad": len(bad)}
+    assert len(bad) == 2
+
+
+def test_streamed_totals_are_returned_and_printed(roster, capsys):
+    def consume():
+        totals = yield from ingest.iter_clean_batches(roster, batch_size=4, verbose=True)
+        return totals
+
+    gen = consume()
+    try:
+        while True:
+            next(gen)
+    except StopIteration as done:
+        totals = done.value
+    assert totals == {"valid": 8, "bad": 2}
+    assert "Valid rows: 8\nBad rows: 2" in capsys.readouterr().out
+
+
+def test_report_counts_same_with_batch_size(roster):
+    whole, streamed = {}, {}
+    assert reports.run_reports(roster, summary=False, sections=False, at_risk=False, counts=whole)
+    assert reports.run_reports(roster, summary=False, sections=False, at_risk=False, batch_size=2, counts=streamed)
+    assert whole == streamed == {"valid": 8, "bad": 2}
+
+
+def test_bad_rows_and_summary_give_the_reasons(roster, tmp_path, capsys):
+    valid, bad = ingest.clean_ingest(roster, workers=1)
+    out = capsys.readouterr().out
+    assert [row[-1] for row in bad] == ["Missing Student ID", "Missing Student ID"]
+    assert "Missing Student ID: 2" in out
+    assert "quiz2 out of range: 1" in out and "quiz1 is not a number: 1" in out
+
+    rejects = str(tmp_path / "rejects.csv")
+    for _ in ingest.iter_clean_batches(roster, batch_size=3, rejects_file=rejects, verbose=True):
+        pass
+    assert "Score cells cleared (row kept): 2" in capsys.readouterr().out
+    with open(rejects, encoding="utf-8") as f:
+        assert f.read().count("Missing Student ID") == 2
+
+
+def test_short_rows_are_rejected_with_their_reason():
+    rows = [["1", "A", "B", "C", "50"], ["", "x"]]
+    valid, bad, reasons = ingest.validate_rows(rows, 5)
+    assert valid == []
+    assert [row[-1] for row in bad] == ["Row has fewer columns than the header", "Missing Student ID"]
+    assert ingest.reason_counts(reasons).tolist()[:2] == [1, 1]
+
+
+def test_parallel_ingest_matches_serial(tmp_path, monkeypatch):
+    path = str(tmp_path / "big.csv")
+    # 40 copies of ROWS with unique IDs (rows without an ID stay without one)
+    write_csv(path, [[f"{i}-{r[0]}" if r[0] else ""] + r[1:] for i in range(40) for r in ROWS])
+    changelog.record(path, changelog.UPDATE, [["3-1010"] + ROWS[0][1:10] + ["1", "2"]])
+    changelog.record(path, changelog.DELETE, [["5-2222"]])
+    changelog.record(path, changelog.ADD, [["NEW"] + ROWS[1][1:]])
+
+    monkeypatch.setattr(ingest, "PARALLEL_MIN_BYTES", 0)
+    entries = changelog.read_log(path)
+    serial = ingest._serial_ingest(path, ingest.DEFAULT_HEADER, entries)
+    parallel = ingest.parallel_ingest(path, ingest.DEFAULT_HEADER, workers=3, entries=entries)
+    assert parallel is not None
+    assert parallel[0] == serial[0] and parallel[1] == serial[1]
+    assert parallel[2].tolist() == serial[2].tolist()
+    assert len(serial[0]) == 40 * 8 and serial[0][-1][0] == "NEW"
@@ -0,0 +1,94 @@
+import os
+import threading
+import time
+
+import pytest
+
+import jobs
+import reports
+
+
+def wait_for(job, timeout=5):
+    deadline = time.time() + timeout
+    while job.status in (jobs.QUEUED, jobs.RUNNING):
+        assert time.time() < deadline, "job did not finish"
+        time.sleep(0.01)
+
+
+def test_pending_jobs_with_the_same_key_are_coalesced():
+    q = jobs.JobQueue()
+    release = threading.Event()
+    first, new = q.submit("slow", release.wait, key="a")
+    assert new
+    second, new = q.submit("other", lambda: "b", key="b")
+    assert new and second.status == jobs.QUEUED
+
+    assert q.submit("slow again", lambda: "never", key="a") == (first, False)   # Queued or running
+    assert q.submit("other again", lambda: "never", key="b") == (second, False)  # Still queued
+    assert (first.requests, second.requests) == (2, 2)
+    assert q.pending() == 2
+
+    release.set()
+    q.shutdown()
+    assert (first.status, second.status) == (jobs.DONE, jobs.DONE)
+    assert second.result == "b"
+
+
+def test_finished_jobs_are_run_again():
+    q = jobs.JobQueue()
+    runs = []
+    done, _ = q.submit("ok", lambda: runs.append("ok"), key="ok")
+    wait_for(done)
+    again, new = q.submit("ok", lambda: runs.append("ok"), key="ok")
+    assert new and again is not done
+
+    failed, _ = q.submit("bad", lambda: 1 / 0, key="bad")
+    wait_for(failed)
+    assert failed.status == jobs.FAILED and failed.error.startswith("ZeroDivisionError")
+    retry, new = q.submit("bad", lambda: "fixed", key="bad")
+    assert new and retry is not failed
+
+    q.shutdown()
+    assert runs == ["ok", "ok"] and retry.result == "fixed"
+    assert [job.number for job in q.jobs()] == [1, 2, 3, 4]
+
+
+def test_shutdown_runs_queued_jobs_and_stops_the_worker():
+    q = jobs.JobQueue()
+    q.shutdown()   # Never started: nothing to stop
+    with pytest.raises(RuntimeError):
+        q.submit("late", lambda: None)
+
+    q = jobs.JobQueue()
+    started = [q.submit(f"job {i}", lambda i=i: time.sleep(0.01) or i)[0] for i in range(3)]
+    worker = q._thread
+    q.shutdown(wait=True)
+    assert [job.status for job in started] == [jobs.DONE] * 3
+    assert [job.result for job in started] == [0, 1, 2]
+    assert not worker.is_alive() and q.pending() == 0
+    q.shutdown()   # A second call does nothing
+    with pytest.raises(RuntimeError):
+        q.submit("late", lambda: None)
+
+
+def test_history_keeps_only_the_latest_finished_jobs():
+    q = jobs.JobQueue(history=2)
+    for i in range(5):
+        wait_for(q.submit(f"job {i}", lambda: None, key=i)[0])
+    q.shutdown()
+    assert [job.number for job in q.jobs()] == [4, 5]
+
+
+def test_section_export_is_queued_again_once_finished(roster):
+    q = jobs.JobQueue()
+    job, new = reports.queue_section_export(q, roster, "out")
+    assert new
+    wait_for(job)
+    assert job.status == jobs.DONE and job.result == "Exported to out/"
+    assert sorted(os.listdir("out")) == ["section_99.csv", "section_AS.csv", "section_none.csv", "section_pi.csv"]
+
+    os.remove(os.path.join("out", "section_AS.csv"))
+    again, new = reports.queue_section_export(q, roster, "out")
+    assert new and again is not job
+    q.shutdown()
+    assert os.path.exists(os.path.join("out", "section_AS.csv"))
@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import main
+from conftest import ROWS, write_csv
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+def test_report_writes_every_output_and_exits_0(roster, capsys):
+    assert main.main(["report", roster, "--out", "out"]) == 0
+    out = capsys.readouterr().out
+    assert "Valid rows: 8" in out and "Bad rows: 2" in out
+    assert {"summary.csv", "at_risk_students.csv", "section_AS.csv"} <= set(os.listdir("out"))
+
+
+def test_report_on_several_files_uses_a_folder_per_file(roster, capsys):
+    write_csv("other.csv", ROWS[:3])
+    assert main.main(["report", roster, "other.csv", "--sections", "--batch-size", "2"]) == 0
+    capsys.readouterr()
+    assert sorted(os.listdir("reports")) == ["other", "studentRecord"]
+    assert sorted(os.listdir(os.path.join("reports", "other"))) == ["section_AS.csv", "section_pi.csv"]
+
+
+def test_missing_file_exits_1_but_the_others_still_run(roster, capsys):
+    assert main.main(["report", "missing.csv", roster, "--stats"]) == 1
+    captured = capsys.readouterr()
+    assert "missing.csv: file not found" in captured.err
+    assert "Valid rows: 8" in captured.out
+
+
+def test_bad_arguments_exit_2(roster, capsys):
+    assert main.main(["report", roster, "--batch-size", "0"]) == 2
+    assert "--batch-size must be at least 1" in capsys.readouterr().err
+    with pytest.raises(SystemExit) as exited:
+        main.main(["report", "--no-such-option"])
+    assert exited.value.code == 2
+
+
+def test_exit_status_reaches_the_shell(tmp_path):
+    run = lambda *args: subprocess.run([sys.executable, MAIN, "report", *args], cwd=tmp_path,
+                                       capture_output=True, text=True)
+    assert run("missing.csv").returncode == 1
+    assert run("--batch-size", "0").returncode == 2
+    write_csv(str(tmp_path / "studentRecord.csv"), ROWS)
+    assert run("--stats").returncode == 0
+
+
+def test_starting_up_imports_no_data_modules():
+    code = "import sys, main; print(sorted({'numpy', 'reports', 'analytics', 'array_operations'} & set(sys.modules)))"
+    done = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(MAIN), capture_output=True, text=True)
+    assert done.stdout.strip() == "[]"
+
+
+def test_background_load_gives_the_same_store(roster):
+    from store import StudentStore
+    loader = main._BackgroundLoad(roster, main.HEADER)
+    assert loader.result().rows() == StudentStore.from_csv(roster, verbose=False).rows()
+    assert main._BackgroundLoad("missing.csv", main.HEADER).result().rows() == []
+
+
+def test_background_load_reraises_its_error(roster, monkeypatch):
+    import store
+
+    def broken(*args, **kwargs):
+        raise OSError("disk on fire")
+    monkeypatch.setattr(store.StudentStore, "from_csv", broken)
+    loader = main._BackgroundLoad(roster, main.HEADER)
+    with pytest.raises(OSError, match="disk on fire"):
+        loader.result()
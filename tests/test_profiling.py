@@ -0,0 +1,73 @@
+import json
+import os
+
+import pytest
+
+import analytics
+import changelog
+import ingest
+import mmap_store
+import profiling
+import reports
+import snapshot
+
+KEYS = {"phase", "parent", "start", "wall_s", "rows", "bytes_read", "bytes_written",
+        "alloc_net_bytes", "alloc_peak_bytes", "error", "pid", "thread"}
+
+
+@pytest.fixture
+def records(tmp_path):
+    """Profiling on for the test; call the fixture's value to get the records so far."""
+    out = str(tmp_path / "profile.jsonl")
+    profiling.enable(out, allocations=False)
+
+    def read():
+        with open(out, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+    yield read
+    profiling.disable()
+
+
+def by_phase(records, name):
+    return [r for r in records if r["phase"] == name]
+
+
+def test_every_record_has_the_same_keys(roster, records, tmp_path):
+    analytics.percentiles(roster)
+    reports.run_reports(roster, out_folder=str(tmp_path / "out"))
+    found = records()
+    assert by_phase(found, "reports.StatsSink.add")           # A record() line
+    for record in found:
+        assert KEYS <= record.keys(), record["phase"]
+
+
+def test_read_phases_count_the_cache_they_read(roster, records):
+    analytics.compute_grades(roster)        # Cold: builds the snapshot from the CSV
+    analytics.compute_grades(roster)        # Warm: served from the snapshot
+    cold, warm = by_phase(records(), "analytics.read")
+    assert cold["bytes_read"] == os.path.getsize(roster)
+    assert warm["bytes_read"] == os.path.getsize(snapshot.snapshot_path(roster))
+    assert by_phase(records(), "snapshot.load")[-1]["parent"] == "analytics.read"
+
+    mmap_store.build_mmap(roster)
+    reports.run_reports(roster, summary=False, sections=False, at_risk=False)
+    read = by_phase(records(), "reports.read")[-1]
+    assert read["bytes_read"] == by_phase(records(), "mmap.open")[-1]["bytes_read"] > 0
+
+
+def test_ingest_reads_count_the_csv_and_the_log_apart(roster, records):
+    changelog.record(roster, changelog.DELETE, [["1010"]])
+    ingest.clean_ingest(roster, verbose=False)
+    found = records()
+    assert by_phase(found, "ingest.read")[0]["bytes_read"] == os.path.getsize(roster)
+    assert by_phase(found, "ingest.read_log")[0]["bytes_read"] == os.path.getsize(changelog.log_path(roster))
+    assert by_phase(found, "ingest.clean_ingest")[0]["bytes_read"] == (
+        os.path.getsize(roster) + os.path.getsize(changelog.log_path(roster)))
+
+
+def test_written_bytes_are_not_counted_twice(roster, records, tmp_path):
+    out = tmp_path / "out"
+    reports.run_reports(roster, summary=False, stats=False, at_risk=False, out_folder=str(out))
+    written = sum(os.path.getsize(out / name) for name in os.listdir(out))
+    assert by_phase(records(), "reports.SectionSink.finish")[0]["bytes_written"] == written
+    assert by_phase(records(), "reports.run_reports")[0]["bytes_written"] == written
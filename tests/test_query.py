@@ -0,0 +1,71 @@
+import pytest
+
+import query
+from conftest import HEADER
+from mmap_store import load_columns
+
+
+def ids(roster, where):
+    return [row[0] for row in query.run_query(roster, where, ["student_id"])[1]]
+
+
+@pytest.fixture
+def loaded(roster):
+    return load_columns(roster, HEADER)[0]
+
+
+@pytest.mark.parametrize("text", [
+    "final <",                       # Ends too early
+    "grade > 5",                     # Unknown column
+    "(final < 5",                    # Unbalanced parentheses
+    "final < 5)",
+    "final < abc",                   # Not a number
+    "final > none",                  # none only with == and !=
+    "final 5",                       # No operator
+    "section == AS and",
+    "final < 5 ! 3",
+])
+def test_bad_filters_raise_value_error(text):
+    with pytest.raises(ValueError):
+        query.Predicate(text)
+
+
+def test_and_binds_tighter_than_or_and_not_tightest():
+    tree = query.Predicate("final < 1 or final > 2 and not quiz1 == 3").tree
+    assert tree == ("or", ("compare", "final", "<", 1.0),
+                    ("and", ("compare", "final", ">", 2.0), ("not", ("compare", "quiz1", "==", 3.0))))
+    assert query.Predicate("(final < 1 or final > 2) and quiz1 == 3").tree[0] == "and"
+    assert query.Predicate("  ").tree is None
+
+
+def test_filters_over_the_roster(loaded):
+    assert ids(loaded, None) == ["1010", "2222", "3333", "4444", "5555", "6666", "7777", "8888"]
+    assert ids(loaded, 'section == "AS" and final < 75') == ["1010"]
+    assert ids(loaded, "final < 60 or section == pi and not final > 60") == ["1010", "5555"]
+    assert ids(loaded, "not (section == AS or section == pi)") == ["4444", "6666"]
+    assert ids(loaded, "section == ' AS '") == ["1010", "2222", "7777"]
+
+
+def test_missing_scores_only_match_none(loaded):
+    assert ids(loaded, "final == none") == ["6666", "7777"]
+    assert ids(loaded, "final != missing") == ["1010", "2222", "3333", "4444", "5555", "8888"]
+    assert ids(loaded, "final_grade < 100") == ids(loaded, "final_grade != none")
+    assert "6666" not in ids(loaded, "final < 1000") + ids(loaded, "final >= 0")
+    assert ids(loaded, "last_name == none") == ["4444"]   # Blank names are stored as "none"
+
+
+def test_run_query_projects_and_limits(loaded):
+    columns, rows = query.run_query(loaded, "section == AS", ["final", "student_id", "final_grade"], limit=5)
+    assert columns == ["final", "student_id", "final_grade"]
+    assert rows == [[10.0, "1010", 59.78], [99.0, "2222", 79.12], [None, "7777", None]]
+    assert query.run_query(loaded, "section == AS", ["student_id"], limit=2)[1] == [["1010"], ["2222"]]
+    assert query.run_query(loaded, None, limit=0)[1] == []
+    assert query.run_query(loaded, None)[0] == HEADER
+    with pytest.raises(ValueError):
+        query.run_query(loaded, None, ["student_id", "nickname"])
+    with pytest.raises(ValueError):
+        query.run_query(loaded, None, limit=-1)
+
+
+def test_select_on_a_missing_file(tmp_path):
+    assert query.select(str(tmp_path / "missing.csv"), "final < 5", ["student_id"]) == (["student_id"], [])
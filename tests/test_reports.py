@@ -0,0 +1,143 @@
+import os
+
+import numpy as np
+
+import reports
+from conftest import read_csv
+from groupby import group_rows
+from stats import RunningStats
+from store import StudentStore
+
+
+def stats_of(roster, store=None):
+    plan = reports.ReportPlan(roster, store=store)
+    sink = reports.StatsSink(store.summary() if store is not None else None)
+    assert plan.add(sink).run()
+    return sink.stats
+
+
+def test_store_totals_match_a_pass_over_the_file(roster):
+    store = StudentStore.from_csv(roster, verbose=False)
+    from_file = stats_of(roster)
+    from_store = stats_of(roster, store)
+    assert from_store.keys() == from_file.keys()
+    for key, value in from_file.items():
+        assert abs(from_store[key] - value) < 1e-9, key
+
+
+def test_store_totals_follow_edits(roster):
+    store = StudentStore.from_csv(roster, verbose=False)
+    store.delete("1010")
+    store.update(store.get("2222")[:10] + [0.0] + store.get("2222")[11:])
+    fresh = StudentStore(store.rows()).summary()
+    assert store.summary() == fresh
+    finals = sorted(f for _, f, _ in store.graded_rows() if f is not None)
+    assert store.summary()["median"] == RunningStats(finals).median()
+
+
+def test_section_sink_groups_like_a_dict_of_lists(tmp_path):
+    sections = [" AS", "pi", "", "AS ", "99", None, "pi", "AS"]
+    rows = [{"student_id": str(i), "section": sec} for i, sec in enumerate(sections)]
+    expected = {}
+    for r in rows:
+        if (r["section"] or "").strip():
+            expected.setdefault(r["section"].strip(), []).append(r)
+
+    sink = reports.SectionSink(str(tmp_path), show_only=True)
+    for r in rows:
+        sink.add(r)
+    sink.finish()
+    assert sink.sections == expected
+    assert list(sink.sections) == ["AS", "pi", "99"]
+
+
+def test_group_rows_skips_rows_without_a_group():
+    groups = group_rows(np.array([1, -1, 0, 1, 0, -1, 2]), 4)
+    assert [g.tolist() for g in groups] == [[2, 4], [0, 3], [6], []]
+    assert group_rows(np.array([-1, -1]), 0) == []
+
+
+class RecordingSink(reports.ReportSink):
+    def __init__(self):
+        self.calls = []
+
+    def start(self):
+        self.calls.append("start")
+
+    def add(self, row):
+        self.calls.append(row["student_id"])
+
+    def finish(self):
+        self.calls.append("finish")
+
+
+def files_in(folder):
+    out = {}
+    for name in sorted(os.listdir(folder)):
+        with open(os.path.join(folder, name), encoding="utf-8") as f:
+            out[name] = f.read()
+    return out
+
+
+def test_plan_reads_once_and_feeds_every_sink_every_row(roster, monkeypatch):
+    reads = []
+    load_columns = reports.load_columns
+    monkeypatch.setattr(reports, "load_columns", lambda *a: reads.append(a) or load_columns(*a))
+
+    first, second = RecordingSink(), RecordingSink()
+    plan = reports.ReportPlan(roster).add(first).add(second)
+    assert plan.run()
+    ids = ["1010", "2222", "3333", "4444", "5555", "6666", "7777", "8888"]
+    assert first.calls == second.calls == ["start"] + ids + ["finish"]
+    assert len(reads) == 1
+    assert plan.counts == {"valid": 8, "bad": 2}
+
+    streamed = RecordingSink()
+    plan = reports.ReportPlan(roster, batch_size=3).add(streamed)
+    assert plan.run()
+    assert streamed.calls == first.calls
+    assert plan.counts == {"valid": 8, "bad": 2}
+
+
+def test_plan_without_data_touches_no_sink(tmp_path):
+    sink = RecordingSink()
+    assert not reports.ReportPlan(str(tmp_path / "missing.csv")).add(sink).run()
+    assert not reports.ReportPlan(str(tmp_path / "missing.csv"), batch_size=2).add(sink).run()
+    assert sink.calls == []
+
+
+def test_one_pass_writes_the_same_files_as_separate_reports(roster, capsys):
+    reports.summary_report(roster, out_folder="separate")
+    reports.export_at_risk(roster, os.path.join("separate", "at_risk_students.csv"), threshold=70)
+    assert reports.run_reports(roster, out_folder="combined", threshold=70)
+    assert reports.run_reports(roster, out_folder="streamed", threshold=70, batch_size=3)
+    capsys.readouterr()
+
+    separate = files_in("separate")
+    assert {"summary.csv", "at_risk_students.csv", "section_AS.csv", "section_pi.csv", "section_99.csv"} <= set(separate)
+    assert files_in("combined") == separate
+    assert files_in("streamed") == separate
+
+
+def test_section_export_is_the_same_for_any_pool(roster, capsys):
+    reports.export_per_section(roster, "serial", workers=1)
+    reports.export_per_section(roster, "threads", workers=4)
+    reports.export_per_section(roster, "processes", workers=4, use_processes=True)
+    capsys.readouterr()
+
+    serial = files_in("serial")
+    assert sorted(serial) == ["section_99.csv", "section_AS.csv", "section_none.csv", "section_pi.csv"]
+    assert files_in("threads") == serial
+    assert files_in("processes") == serial
+    assert [r[0] for r in read_csv(os.path.join("serial", "section_pi.csv"))] == ["3333", "5555", "8888"]
+
+
+def test_section_file_names_are_sanitized_without_collisions(tmp_path):
+    sink = reports.SectionSink(str(tmp_path), workers=4, verbose=False)
+    for i, sec in enumerate(["A/B", "A?B", "../x", "A/B"]):
+        sink.add({"student_id": str(i), "section": sec})
+    sink.finish()
+    assert sorted(os.listdir(tmp_path)) == ["section_A_B.csv", "section_A_B_2.csv", "section____x.csv"]
+    assert sorted(sink.written) == sorted(str(tmp_path / name) for name in os.listdir(tmp_path))
+    assert [r[0] for r in read_csv(str(tmp_path / "section_A_B.csv"))] == ["0", "3"]
+    assert [r[0] for r in read_csv(str(tmp_path / "section_A_B_2.csv"))] == ["1"]
@@ -0,0 +1,20 @@
+import os
+import stat
+
+import snapshot
+
+
+def test_snapshot_has_the_permissions_of_the_csv(roster):
+    os.chmod(roster, 0o640)
+    roster_data, bad = snapshot.load_validated(roster)
+    assert (len(roster_data), bad) == (8, 2)
+    assert stat.S_IMODE(os.stat(snapshot.snapshot_path(roster)).st_mode) == 0o640
+
+
+def test_snapshot_is_used_until_the_csv_changes(roster):
+    first = snapshot.load_validated(roster)
+    assert snapshot.load_snapshot(roster) is not None
+    with open(roster, "a", encoding="utf-8") as f:
+        f.write("9999,New,Row,AS,1,2,3,4,5,6,7,8\n")
+    assert snapshot.load_snapshot(roster) is None
+    assert len(snapshot.load_validated(roster)[0]) == len(first[0]) + 1
@@ -0,0 +1,84 @@
+import builtins
+
+import array_operations
+import changelog
+import mmap_store
+from conftest import read_csv
+from store import StudentStore
+
+
+def answer(monkeypatch, *replies):
+    replies = iter(replies)
+    monkeypatch.setattr(builtins, "input", lambda prompt="": next(replies))
+
+
+def finals(rows):
+    return [(r[0], r[10]) for r in rows]
+
+
+def test_sort_after_delete_and_re_add_with_mmap_columns(roster, monkeypatch, capsys):
+    mmap_store.build_mmap(roster)
+    assert mmap_store.use_mmap(roster)
+    store = StudentStore.from_csv(roster)
+
+    # Same row count as the mmap copy, but 2222 has moved to the end with a new final
+    readded = store.get("2222")[:10] + [100.0] + store.get("2222")[11:]
+    store.delete("2222")
+    array_operations.log_changes(changelog.DELETE, [["2222"]], roster)
+    store.add(readded)
+    array_operations.log_changes(changelog.ADD, [readded], roster)
+
+    answer(monkeypatch, "final", "2")
+    store = array_operations.sort_data(store, roster)
+    assert "Error" not in capsys.readouterr().out
+
+    written = finals(read_csv(roster))
+    by_final = sorted(written, key=lambda r: -float(r[1]) if r[1] else float("inf"))
+    assert written == by_final
+    assert written[0] == ("2222", "100.0")
+    assert finals(store.rows()) == [(sid, float(f) if f else None) for sid, f in written]
+
+
+def test_store_in_step_only_until_it_changes(roster):
+    store = StudentStore.from_csv(roster, verbose=False)
+    assert store.in_step(roster)
+    store.delete("1010")
+    assert not store.in_step(roster)
+    assert StudentStore.from_csv(roster, verbose=False).in_step(roster)
+    assert not StudentStore(store.rows()).in_step(roster)
+
+
+def test_multi_key_sort_after_delete_and_re_add_with_mmap_columns(roster, monkeypatch):
+    mmap_store.build_mmap(roster)
+    store = StudentStore.from_csv(roster)
+    moved = store.get("8888")[:3] + ["AS"] + store.get("8888")[4:]
+    store.delete("8888")
+    store.add(moved)
+    array_operations.log_changes(changelog.DELETE, [["8888"]], roster)
+    array_operations.log_changes(changelog.ADD, [moved], roster)
+
+    answer(monkeypatch, "section,final", "1", "2")
+    store = array_operations.sort_data(store, roster)
+
+    written = [(r[0], r[3], r[10]) for r in read_csv(roster)]
+    expected = sorted(written, key=lambda r: (r[1].lower(), -float(r[2]) if r[2] else float("inf")))
+    assert written == expected
+    assert ("8888", "AS", "66.0") in written
+    assert [r[0] for r in store.rows()] == [r[0] for r in written]
+
+
+def test_external_sort_only_while_the_store_matches_the_file(roster, monkeypatch):
+    monkeypatch.setattr(array_operations, "EXTERNAL_SORT_BYTES", 0)
+    store = StudentStore.from_csv(roster)
+    store.delete("1010")     # Not logged: only the store knows about it
+
+    answer(monkeypatch, "final", "1")
+    store = array_operations.sort_data(store, roster)
+    assert "1010" not in [r[0] for r in read_csv(roster)]
+    assert [r[0] for r in store.rows()] == [r[0] for r in read_csv(roster)]
+
+    answer(monkeypatch, "last_name", "1")
+    store = array_operations.sort_data(StudentStore.from_csv(roster), roster)
+    names = [r[1].lower() for r in read_csv(roster)]
+    assert names == sorted(names)
+    assert len(store) == len(names)
@@ -0,0 +1,85 @@
+import builtins
+
+import numpy as np
+import pytest
+
+import array_operations
+import changelog
+import mmap_store
+import query
+import sorted_index
+from mmap_store import load_columns
+from store import StudentStore
+
+
+FILTERS = ["final_grade < 70", "final_grade >= 70", "final > 66", "final <= 66", "midterm == 68", "quiz1 = 80"]
+
+
+def without_index(roster, where):
+    return query.run_query(load_columns(roster)[0], where)
+
+
+@pytest.mark.parametrize("mapped", [False, True])
+def test_select_through_the_index_matches_a_full_scan(roster, mapped):
+    if mapped:
+        mmap_store.build_mmap(roster)
+    for where in FILTERS:
+        column = query.Predicate(where).tree[1]
+        sorted_index.build_index(roster, column)
+        assert query._index_rows(roster, query.Predicate(where), query.HEADER) is not None
+        assert query.select(roster, where) == without_index(roster, where), where
+
+
+def test_select_without_an_index_scans(roster):
+    assert not sorted_index.use_index(roster, "final")
+    assert query._index_rows(roster, query.Predicate("final > 50"), query.HEADER) is None
+    assert query.select(roster, "final > 50") == without_index(roster, "final > 50")
+
+
+def test_take_gathers_only_the_given_rows(roster):
+    mmap_store.build_mmap(roster)
+    mapped = load_columns(roster)[0]
+    assert isinstance(mapped, mmap_store.MappedRoster)
+    rows = np.array([4, 0, 2])
+    taken = sorted_index.take(mapped, rows).to_rows()
+    assert mapped._decoded == {}     # No text column was decoded whole
+    full = load_columns(roster)[0].to_rows()
+    assert taken == [full[i] for i in rows]
+
+
+def test_roster_is_reused_until_the_file_changes(roster):
+    first = sorted_index.roster(roster)
+    assert sorted_index.roster(roster) is first
+    changelog.record(roster, changelog.DELETE, [["1010"]])
+    second = sorted_index.roster(roster)
+    assert second is not first and len(second) == len(first) - 1
+    index = sorted_index.open_index(roster, "final")
+    assert "1010" not in [r[0] for r in sorted_index.range_query(roster, "final")]
+    assert len(index) == len(sorted_index.range_query(roster, "final"))
+
+
+def test_strict_range_bounds():
+    index = sorted_index.SortedIndex("final", np.array([1.0, 2.0, 2.0, 3.0]), np.array([3, 0, 2, 1]))
+    assert index.range(2, 3).tolist() == [0, 2, 1]
+    assert index.range(2, 3, include_low=False).tolist() == [1]
+    assert index.range(2, 3, include_high=False).tolist() == [0, 2]
+    assert index.range(None, 2, include_high=False).tolist() == [3]
+
+
+def test_menu_filter_uses_the_index_while_the_store_matches(roster, monkeypatch, capsys):
+    sorted_index.build_index(roster, "final_grade")
+    looked_up = []
+    index_rows = query._index_rows
+    monkeypatch.setattr(query, "_index_rows", lambda *a: looked_up.append(a) or index_rows(*a))
+    monkeypatch.setattr(builtins, "input", lambda prompt="": "where final_grade < 70")
+
+    store = StudentStore.from_csv(roster, verbose=False)
+    array_operations.select_row(store)
+    from_index = capsys.readouterr().out
+    assert looked_up and "student(s) found" in from_index
+
+    store.add(["9999"] + store.get("1010")[1:])   # Now ahead of the file
+    looked_up.clear()
+    array_operations.select_row(store)
+    assert not looked_up
+    assert capsys.readouterr().out.count("student_id: 9999") == 1
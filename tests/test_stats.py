@@ -0,0 +1,61 @@
+import math
+
+import numpy as np
+import pytest
+
+import analytics
+import reports
+from stats import RunningStats
+
+
+def test_chunks_and_merges_match_numpy():
+    rng = np.random.default_rng(5)
+    grades = np.round(rng.uniform(0, 100, 1001), 2)
+    grades[::97] = np.nan   # Skipped
+
+    whole = RunningStats(grades)
+    chunked = RunningStats()
+    for chunk in np.array_split(grades, 7):
+        chunked.update(chunk)
+    merged = RunningStats()
+    for chunk in np.array_split(grades, 5):
+        merged.merge(RunningStats(chunk))
+    merged.merge(RunningStats())   # An empty part changes nothing
+
+    valid = grades[~np.isnan(grades)]
+    for acc in (whole, chunked, merged):
+        assert acc.count == len(valid)
+        assert acc.mean == pytest.approx(valid.mean())
+        assert acc.stdev() == pytest.approx(valid.std())
+        assert acc.variance(ddof=1) == pytest.approx(valid.var(ddof=1))
+        assert (acc.min, acc.max) == (valid.min(), valid.max())
+        assert acc.median() == pytest.approx(np.median(valid))
+        for q in (0, 0.1, 0.25, 0.9, 1):
+            assert acc.quantile(q) == pytest.approx(np.quantile(valid, q))
+
+
+def test_empty_stats_and_bad_arguments():
+    acc = RunningStats()
+    assert acc.as_dict()["count"] == 0 and acc.as_dict()["median"] is None
+    assert math.isnan(acc.median()) and math.isnan(RunningStats([3.0]).variance(ddof=1))
+    with pytest.raises(ValueError):
+        acc.quantile(1.5)
+    with pytest.raises(ValueError):
+        acc.merge(RunningStats(resolution=0.5))
+
+
+def test_streamed_outliers_match_the_whole_file(roster, capsys):
+    analytics.outliers(roster)
+    whole = capsys.readouterr().out
+    analytics.outliers(roster, batch_size=2)
+    assert capsys.readouterr().out == whole
+    assert "Mean = " in whole and "=== OUTLIERS ===" in whole
+
+
+def test_streamed_summary_stats_match_the_whole_file(roster, capsys):
+    whole, streamed = reports.StatsSink(), reports.StatsSink()
+    assert reports.ReportPlan(roster).add(whole).run()
+    assert reports.ReportPlan(roster, batch_size=3).add(streamed).run()
+    capsys.readouterr()
+    assert streamed.stats == whole.stats
+    assert whole.stats["count"] == 6   # 6666 and 7777 have no scores
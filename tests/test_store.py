@@ -0,0 +1,114 @@
+import builtins
+import random
+
+import pytest
+
+import array_operations
+import changelog
+from conftest import ROWS
+from store import StudentStore
+
+
+def new_row(sid, final="70"):
+    return [sid, "New", "Student", "AS", "80", "80", "80", "80", "80", "75", final, "90"]
+
+
+def session_add(store, row, filename):
+    row = list(row)
+    store.add([row[0]] + row[1:4] + [float(v) for v in row[4:]])
+    array_operations.log_changes(changelog.ADD, [row], filename)
+
+
+def session_delete(store, sid, filename):
+    store.delete(sid)
+    array_operations.log_changes(changelog.DELETE, [[sid]], filename)
+
+
+def assert_same_as_reload(store, filename):
+    refreshed = store.refresh(filename)
+    assert refreshed.rows() == StudentStore.from_csv(filename, verbose=False).rows()
+    return refreshed
+
+
+def test_refresh_after_own_edits_and_another_writer(roster):
+    store = StudentStore.from_csv(roster, verbose=False)
+    session_add(store, new_row("N1"), roster)
+    session_delete(store, "2222", roster)
+    changelog.record(roster, changelog.ADD, [new_row("X9")])     # Another writer
+    store = assert_same_as_reload(store, roster)
+    assert [r[0] for r in store.rows()][-2:] == ["N1", "X9"]
+
+
+def test_refresh_picks_up_appended_rows_and_log_changes(roster, capsys):
+    store = StudentStore.from_csv(roster, verbose=False)
+    with open(roster, "a", encoding="utf-8") as f:
+        f.write("9000,Late,Row,AS,1,2,3,4,5,6,7,8\n,No,Id,AS,1,2,3,4,5,6,7,8\n")
+    changelog.record(roster, changelog.ADD, [new_row("X1")])
+    refreshed = assert_same_as_reload(store, roster)
+    assert refreshed is store                # Applied in place, no full reload
+    assert "Read 2 new row(s) (1 bad) and 1 logged change(s)" in capsys.readouterr().out
+    assert store.in_step(roster)
+
+
+def test_refresh_matches_a_full_reload_after_random_edits(roster):
+    rng = random.Random(11)
+    ids = [row[0] for row in ROWS if len(row) > 1 and row[0]]
+    for _ in range(30):
+        store = StudentStore.from_csv(roster, verbose=False)
+        for step in range(rng.randint(1, 6)):
+            sid = rng.choice(ids + [f"N{step}", "X9"])
+            action = rng.choice(["own add", "own delete", "other add", "other update", "other delete", "append"])
+            if action == "own add" and sid not in store:
+                session_add(store, new_row(sid), roster)
+            elif action == "own delete" and sid in store:
+                session_delete(store, sid, roster)
+            elif action == "other add":
+                changelog.record(roster, changelog.ADD, [new_row(sid, str(rng.randint(0, 100)))])
+            elif action == "other update":
+                changelog.record(roster, changelog.UPDATE, [new_row(sid, "1")])
+            elif action == "other delete":
+                changelog.record(roster, changelog.DELETE, [[sid]])
+            elif action == "append":
+                with open(roster, "a", encoding="utf-8") as f:
+                    f.write(",".join(new_row(f"B{rng.randint(0, 99)}")) + "\n")
+            store = assert_same_as_reload(store, roster)
+
+
+def test_hash_index_lookups_adds_and_deletes():
+    rows = [new_row("A"), new_row("B"), new_row("A", "10")]     # Files may hold a duplicate ID
+    store = StudentStore(rows)
+    assert len(store) == 3 and "A" in store and "Z" not in store
+    assert store.get("A") is rows[0] and store.get_all("A") == [rows[0], rows[2]]
+    assert store.get("Z") is None
+
+    with pytest.raises(ValueError):
+        store.add(new_row("B"))
+    with pytest.raises(ValueError):
+        store.add_many([new_row("C"), new_row("C")])
+    assert "C" not in store                    # add_many adds all or nothing
+
+    assert store.delete("A") == 2 and store.delete("A") == 0
+    with pytest.raises(KeyError):
+        store.update(new_row("A"))
+    store.add(new_row("D"))
+    assert [row[0] for row in store.rows()] == ["B", "D"]
+
+
+def test_update_replaces_every_copy_and_reorder_keeps_grades():
+    store = StudentStore([new_row("A", "10"), new_row("B"), new_row("A", "20")])
+    store.update(new_row("A", "90"))
+    assert store.get_all("A") == [new_row("A", "90")]
+    graded = {row[0]: final for row, final, _ in store.graded_rows()}
+    store.reorder(store.rows()[::-1])
+    assert [row[0] for row in store.rows()] == ["B", "A"]
+    assert {row[0]: final for row, final, _ in store.graded_rows()} == graded
+
+
+def test_menu_delete_updates_the_store_and_the_log(roster, monkeypatch, capsys):
+    store = StudentStore.from_csv(roster, verbose=False)
+    monkeypatch.setattr(builtins, "input", lambda prompt="": "2222")
+    assert array_operations.delete_data(store) is store
+    assert "2222" not in store
+    assert changelog.read_log(roster) == [[changelog.DELETE, "2222"]]
+    array_operations.delete_data(store)
+    assert "No student found" in capsys.readouterr().out